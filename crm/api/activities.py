@@ -6,7 +6,7 @@ from frappe import _
 from frappe.desk.form.load import get_docinfo
 from frappe.query_builder import JoinType
 
-from crm.fcrm.doctype.crm_call_log.crm_call_log import parse_call_log
+from crm.fcrm.doctype.crm_call_log.crm_call_log import parse_call_logs
 
 
 @frappe.whitelist()
@@ -441,7 +441,7 @@ def get_linked_calls(name):
 			],
 		)
 
-	calls = [parse_call_log(call) for call in calls] if calls else []
+	calls = parse_call_logs(calls) if calls else []
 
 	return {"calls": calls, "notes": notes, "tasks": tasks}
 
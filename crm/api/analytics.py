@@ -0,0 +1,75 @@
+import frappe
+from frappe import _
+from frappe.query_builder.functions import Sum
+from frappe.utils import flt, getdate
+
+from crm.utils import is_manager
+
+ANSWERED_CALL_STATUSES = ("Completed",)
+
+
+@frappe.whitelist()
+def get_call_analytics(from_date, to_date, group_by="agent", agent=None, telephony_medium=None):
+	"""
+	Call metrics per agent or per day, served from `CRM Call Log Rollup`.
+
+	:param group_by: `agent` or `date`
+	:return: List of rows with counts by status and type, total/average duration and answer rate
+	"""
+	if group_by not in ("agent", "date"):
+		frappe.throw(_("Invalid group by {0}").format(group_by))
+
+	if not is_manager():
+		agent = frappe.session.user
+
+	Rollup = frappe.qb.DocType("CRM Call Log Rollup")
+	group_field = Rollup[group_by]
+	query = (
+		frappe.qb.from_(Rollup)
+		.select(
+			group_field.as_("key"),
+			Rollup.type,
+			Rollup.status,
+			Sum(Rollup.call_count).as_("call_count"),
+			Sum(Rollup.total_duration).as_("total_duration"),
+		)
+		.where(Rollup.date.between(getdate(from_date), getdate(to_date)))
+		.groupby(group_field, Rollup.type, Rollup.status)
+		.orderby(group_field)
+	)
+	if agent:
+		query = query.where(Rollup.agent == agent)
+	if telephony_medium:
+		query = query.where(Rollup.telephony_medium == telephony_medium)
+
+	res = {}
+	for row in query.run(as_dict=True):
+		key = str(row.key) if group_by == "date" else row.key
+		metrics = res.setdefault(
+			key,
+			frappe._dict(
+				{
+					group_by: key,
+					"calls": 0,
+					"answered": 0,
+					"by_status": {},
+					"by_type": {},
+					"total_duration": 0,
+				}
+			),
+		)
+		count = int(row.call_count or 0)
+		metrics.calls += count
+		metrics.by_status[row.status] = metrics.by_status.get(row.status, 0) + count
+		metrics.by_type[row.type] = metrics.by_type.get(row.type, 0) + count
+		metrics.total_duration += int(row.total_duration or 0)
+		if row.status in ANSWERED_CALL_STATUSES:
+			metrics.answered += count
+
+	for metrics in res.values():
+		metrics.average_duration = (
+			flt(metrics.total_duration / metrics.answered, 2) if metrics.answered else 0
+		)
+		metrics.answer_rate = flt(metrics.answered / metrics.calls, 4) if metrics.calls else 0
+
+	return list(res.values())
@@ -3,11 +3,39 @@ from collections.abc import Iterable
 import frappe
 from frappe import _
 from bs4 import BeautifulSoup
-from crm.fcrm.doctype.crm_notification.crm_notification import notify_user
+from crm.fcrm.doctype.crm_notification.crm_notification import notify_users
+
+
+REFERENCE_FIELDS = {
+    "CRM Lead": ["lead_name"],
+    "CRM Deal": ["organization", "lead_name"],
+}
 
 
 def on_update(self, method):
-    notify_mentions(self)
+    content = getattr(self, "content", None)
+    # cheap pre-check, the HTML is only parsed in the background job
+    if not content or "mention" not in content:
+        return
+    frappe.enqueue(
+        process_mentions,
+        queue="short",
+        job_id=f"crm_comment_mentions:{self.name}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        comment=self.name,
+    )
+
+
+def process_mentions(comment):
+    doc = frappe.db.get_value(
+        "Comment",
+        comment,
+        ["name", "content", "owner", "reference_doctype", "reference_name"],
+        as_dict=True,
+    )
+    if doc:
+        notify_mentions(doc)
 
 
 def notify_mentions(doc):
@@ -15,41 +43,53 @@ def notify_mentions(doc):
     Extract mentions from `content`, and notify.
     `content` must have `HTML` content.
     """
-    content = getattr(doc, "content", None)
+    content = doc.get("content")
     if not content:
         return
-    mentions = extract_mentions(content)
-    reference_doc = frappe.get_doc(doc.reference_doctype, doc.reference_name)
-    for mention in mentions:
-        owner = frappe.get_cached_value("User", doc.owner, "full_name")
-        doctype = doc.reference_doctype
-        if doctype.startswith("CRM "):
-            doctype = doctype[4:].lower()
-        name = (
-            reference_doc.lead_name
-            if doctype == "lead"
-            else reference_doc.organization or reference_doc.lead_name
-        )
-        notification_text = f"""
-            <div class="mb-2 leading-5 text-ink-gray-5">
-                <span class="font-medium text-ink-gray-9">{ owner }</span>
-                <span>{ _('mentioned you in {0}').format(doctype) }</span>
-                <span class="font-medium text-ink-gray-9">{ name }</span>
-            </div>
-        """
-        notify_user(
+    mentions = {mention.email for mention in extract_mentions(content) if mention.email}
+    if not mentions:
+        return
+
+    owner = frappe.get_cached_value("User", doc.owner, "full_name")
+    doctype = doc.reference_doctype
+    if doctype.startswith("CRM "):
+        doctype = doctype[4:].lower()
+    name = get_reference_title(doc.reference_doctype, doc.reference_name)
+    notification_text = f"""
+        <div class="mb-2 leading-5 text-ink-gray-5">
+            <span class="font-medium text-ink-gray-9">{ owner }</span>
+            <span>{ _('mentioned you in {0}').format(doctype) }</span>
+            <span class="font-medium text-ink-gray-9">{ name }</span>
+        </div>
+    """
+    notify_users(
+        [
             {
                 "owner": doc.owner,
-                "assigned_to": mention.email,
+                "assigned_to": email,
                 "notification_type": "Mention",
-                "message": doc.content,
+                "message": content,
                 "notification_text": notification_text,
                 "reference_doctype": "Comment",
                 "reference_docname": doc.name,
                 "redirect_to_doctype": doc.reference_doctype,
                 "redirect_to_docname": doc.reference_name,
             }
-        )
+            for email in mentions
+        ]
+    )
+
+
+def get_reference_title(doctype, name):
+    fields = REFERENCE_FIELDS.get(doctype)
+    if not fields:
+        return name
+    reference = frappe.db.get_value(doctype, name, fields, as_dict=True)
+    if not reference:
+        return name
+    if doctype == "CRM Lead":
+        return reference.lead_name or name
+    return reference.organization or reference.lead_name or name
 
 
 def extract_mentions(html):
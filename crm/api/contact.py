@@ -1,5 +1,12 @@
+import json
+
 import frappe
 from frappe import _
+from frappe.query_builder import Criterion
+from frappe.utils import now_datetime
+
+from crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry import get_record_filters
+from crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry import search as typeahead_search
 
 
 def validate(doc, method):
@@ -7,18 +14,102 @@ def validate(doc, method):
 
 
 def update_deals_email_mobile_no(doc):
-	linked_deals = frappe.get_all(
-		"CRM Contacts",
-		filters={"contact": doc.name, "is_primary": 1},
-		fields=["parent"],
+	if doc.is_new() or not (doc.has_value_changed("email_id") or doc.has_value_changed("mobile_no")):
+		return
+
+	frappe.enqueue(
+		propagate_contact_to_deals,
+		job_id=f"crm_contact_deals:{doc.name}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		contact=doc.name,
 	)
 
-	for linked_deal in linked_deals:
-		deal = frappe.get_cached_doc("CRM Deal", linked_deal.parent)
-		if deal.email != doc.email_id or deal.mobile_no != doc.mobile_no:
-			deal.email = doc.email_id
-			deal.mobile_no = doc.mobile_no
-			deal.save(ignore_permissions=True)
+
+def propagate_contact_to_deals(contact):
+	"""
+	Copy the contact's primary email and mobile no to every deal it is the primary contact of.
+	Deals are updated with one statement instead of being saved, a Version is still written
+	for each of them if CRM Deal tracks changes.
+	"""
+	values = frappe.db.get_value("Contact", contact, ["email_id", "mobile_no"], as_dict=True)
+	if not values:
+		return
+
+	Deal = frappe.qb.DocType("CRM Deal")
+	Contacts = frappe.qb.DocType("CRM Contacts")
+	deals = (
+		frappe.qb.from_(Deal)
+		.join(Contacts)
+		.on((Contacts.parent == Deal.name) & (Contacts.parenttype == "CRM Deal"))
+		.select(Deal.name, Deal.email, Deal.mobile_no)
+		.where(Contacts.contact == contact)
+		.where(Contacts.is_primary == 1)
+		.where(
+			Criterion.any(
+				[
+					Deal.email.isnull(),
+					Deal.email != (values.email_id or ""),
+					Deal.mobile_no.isnull(),
+					Deal.mobile_no != (values.mobile_no or ""),
+				]
+			)
+		)
+	).run(as_dict=True)
+
+	# NULL and "" are the same value, the query above can't tell them apart portably
+	deals = [
+		deal
+		for deal in deals
+		if (deal.email or "") != (values.email_id or "") or (deal.mobile_no or "") != (values.mobile_no or "")
+	]
+	if not deals:
+		return
+
+	now = now_datetime()
+	(
+		frappe.qb.update(Deal)
+		.set(Deal.email, values.email_id)
+		.set(Deal.mobile_no, values.mobile_no)
+		.set(Deal.modified, now)
+		.set(Deal.modified_by, frappe.session.user)
+		.where(Deal.name.isin([deal.name for deal in deals]))
+	).run()
+
+	if frappe.get_meta("CRM Deal").track_changes:
+		add_versions(deals, values, now)
+
+	for deal in deals:
+		frappe.clear_document_cache("CRM Deal", deal.name)
+
+
+def add_versions(deals, values, now):
+	rows = []
+	for deal in deals:
+		changed = [
+			[field, deal[field], value]
+			for field, value in (("email", values.email_id), ("mobile_no", values.mobile_no))
+			if (deal[field] or "") != (value or "")
+		]
+		data = {"added": [], "changed": changed, "removed": [], "row_changed": []}
+		rows.append(
+			(
+				frappe.generate_hash(length=10),
+				now,
+				now,
+				frappe.session.user,
+				frappe.session.user,
+				"CRM Deal",
+				deal.name,
+				json.dumps(data, default=str),
+			)
+		)
+
+	frappe.db.bulk_insert(
+		"Version",
+		["name", "creation", "modified", "owner", "modified_by", "ref_doctype", "docname", "data"],
+		rows,
+	)
 
 
 @frappe.whitelist()
@@ -49,34 +140,27 @@ def get_linked_deals(contact):
 	if not frappe.has_permission("Contact", "read", contact):
 		frappe.throw("Not permitted", frappe.PermissionError)
 
-	deal_names = frappe.get_all(
-		"CRM Contacts",
-		filters={"contact": contact, "parenttype": "CRM Deal"},
-		fields=["parent"],
-		distinct=True,
-	)
-
-	# get deals data
-	deals = []
-	for d in deal_names:
-		deal = frappe.get_cached_doc(
-			"CRM Deal",
-			d.parent,
-			fields=[
-				"name",
-				"organization",
-				"currency",
-				"annual_revenue",
-				"status",
-				"email",
-				"mobile_no",
-				"deal_owner",
-				"modified",
-			],
+	Deal = frappe.qb.DocType("CRM Deal")
+	Contacts = frappe.qb.DocType("CRM Contacts")
+	return (
+		frappe.qb.from_(Deal)
+		.join(Contacts)
+		.on((Contacts.parent == Deal.name) & (Contacts.parenttype == "CRM Deal"))
+		.select(
+			Deal.name,
+			Deal.organization,
+			Deal.currency,
+			Deal.annual_revenue,
+			Deal.status,
+			Deal.email,
+			Deal.mobile_no,
+			Deal.deal_owner,
+			Deal.modified,
 		)
-		deals.append(deal.as_dict())
-
-	return deals
+		.distinct()
+		.where(Contacts.contact == contact)
+		.orderby(Deal.modified, order=frappe.qb.desc)
+	).run(as_dict=True)
 
 
 @frappe.whitelist()
@@ -130,26 +214,21 @@ def set_as_primary(contact, field, value):
 
 @frappe.whitelist()
 def search_emails(txt: str):
-	doctype = "Contact"
-	meta = frappe.get_meta(doctype)
-	filters = [["Contact", "email_id", "is", "set"]]
-
-	if meta.get("fields", {"fieldname": "enabled", "fieldtype": "Check"}):
-		filters.append([doctype, "enabled", "=", 1])
-	if meta.get("fields", {"fieldname": "disabled", "fieldtype": "Check"}):
-		filters.append([doctype, "disabled", "!=", 1])
-
-	or_filters = []
-	search_fields = ["full_name", "email_id", "name"]
 	if txt:
-		for f in search_fields:
-			or_filters.append([doctype, f.strip(), "like", f"%{txt}%"])
+		# prefix lookup on the typeahead index instead of scanning Contact with LIKE '%txt%'
+		return [
+			[result.label, result.email, result.name]
+			for result in typeahead_search(txt, doctypes=["Contact"])
+			if result.email
+		]
+
+	doctype = "Contact"
+	filters = [["Contact", "email_id", "is", "set"], *get_record_filters(doctype)]
 
 	results = frappe.get_list(
 		doctype,
 		filters=filters,
-		fields=search_fields,
-		or_filters=or_filters,
+		fields=["full_name", "email_id", "name"],
 		limit_start=0,
 		limit_page_length=20,
 		order_by="email_id, full_name, name",
@@ -1,33 +1,68 @@
 import frappe
 from frappe.query_builder import Order
+from frappe.query_builder.functions import Count
+
+UNREAD_COUNT_KEY = "crm:unread_notifications:{0}"
+# a cached count that has drifted heals once it expires
+UNREAD_COUNT_TTL = 24 * 60 * 60
 
 
 @frappe.whitelist()
-def get_notifications():
+def get_notifications(limit=20, cursor=None):
+    """
+    Notifications of the session user, newest first, `limit` at a time.
+
+    :param cursor: `name` of the last notification of the previous page
+    """
     Notification = frappe.qb.DocType("CRM Notification")
     query = (
         frappe.qb.from_(Notification)
-        .select("*")
+        .select(
+            Notification.name,
+            Notification.creation,
+            Notification.from_user,
+            Notification.type,
+            Notification.to_user,
+            Notification.read,
+            Notification.message,
+            Notification.comment,
+            Notification.notification_text,
+            Notification.notification_type_doctype,
+            Notification.notification_type_doc,
+            Notification.reference_doctype,
+            Notification.reference_name,
+        )
         .where(Notification.to_user == frappe.session.user)
-        .orderby("creation", order=Order.desc)
+        .orderby(Notification.creation, order=Order.desc)
+        .orderby(Notification.name, order=Order.desc)
+        .limit(frappe.utils.cint(limit) or 20)
     )
+    if cursor:
+        creation = frappe.db.get_value("CRM Notification", cursor, "creation")
+        if creation:
+            query = query.where(
+                (Notification.creation < creation)
+                | ((Notification.creation == creation) & (Notification.name < cursor))
+            )
     notifications = query.run(as_dict=True)
 
+    full_names = get_full_names({n.from_user for n in notifications if n.from_user})
+
     _notifications = []
     for notification in notifications:
         _notifications.append(
             {
+                "name": notification.name,
                 "creation": notification.creation,
                 "from_user": {
                     "name": notification.from_user,
-                    "full_name": frappe.get_value(
-                        "User", notification.from_user, "full_name"
-                    ),
+                    "full_name": full_names.get(notification.from_user),
                 },
                 "type": notification.type,
                 "to_user": notification.to_user,
                 "read": notification.read,
                 "hash": get_hash(notification),
+                "comment": notification.comment,
                 "notification_text": notification.notification_text,
                 "notification_type_doctype": notification.notification_type_doctype,
                 "notification_type_doc": notification.notification_type_doc,
@@ -35,9 +70,7 @@ def get_notifications():
                     "deal" if notification.reference_doctype == "CRM Deal" else "lead"
                 ),
                 "reference_name": notification.reference_name,
-                "route_name": (
-                    "Deal" if notification.reference_doctype == "CRM Deal" else "Lead"
-                ),
+                "route_name": get_route_name(notification),
             }
         )
 
@@ -45,19 +78,92 @@ def get_notifications():
 
 
 @frappe.whitelist()
-def mark_as_read(user=None, doc=None):
-    user = user or frappe.session.user
-    filters = {"to_user": user, "read": False}
-    or_filters = []
+def get_unread_count():
+    user = frappe.session.user
+    key = get_unread_count_key(user)
+    count = frappe.cache.get(key)
+    if count is None:
+        Notification = frappe.qb.DocType("CRM Notification")
+        count = (
+            frappe.qb.from_(Notification)
+            .select(Count("*"))
+            .where(Notification.to_user == user)
+            .where(Notification.read == 0)
+        ).run()[0][0]
+        frappe.cache.set(key, count, ex=UNREAD_COUNT_TTL, nx=True)
+    return max(frappe.utils.cint(count), 0)
+
+
+def adjust_unread_count(user, delta):
+    """Move the cached unread count of `user` by `delta`, if it has been counted yet."""
+    if not user or not delta:
+        return
+    frappe.cache.eval(
+        "if redis.call('exists', KEYS[1]) == 1 then return redis.call('incrby', KEYS[1], ARGV[1]) end",
+        1,
+        get_unread_count_key(user),
+        delta,
+    )
+
+
+def get_unread_count_key(user):
+    return frappe.cache.make_key(UNREAD_COUNT_KEY.format(user))
+
+
+def get_full_names(users):
+    if not users:
+        return {}
+    return dict(
+        frappe.get_all(
+            "User",
+            filters={"name": ("in", list(users))},
+            fields=["name", "full_name"],
+            as_list=True,
+        )
+    )
+
+
+@frappe.whitelist()
+def mark_as_read(doc=None):
+    """
+    Mark all unread notifications of the session user, or only those about `doc`, as read.
+    `doc` may also be the name of a notification that is not about a single record.
+    """
+    user = frappe.session.user
+    Notification = frappe.qb.DocType("CRM Notification")
+    unread = (Notification.to_user == user) & (Notification.read == 0)
     if doc:
-        or_filters = [
-            {"comment": doc},
-            {"notification_type_doc": doc},
-        ]
-    for n in frappe.get_all("CRM Notification", filters=filters, or_filters=or_filters):
-        d = frappe.get_doc("CRM Notification", n.name)
-        d.read = True
-        d.save()
+        unread &= (
+            (Notification.comment == doc)
+            | (Notification.notification_type_doc == doc)
+            | (Notification.name == doc)
+        )
+
+    names = frappe.qb.from_(Notification).select(Notification.name).where(unread).run(pluck=True)
+    if not names:
+        return
+
+    (
+        frappe.qb.update(Notification)
+        .set(Notification.read, 1)
+        .set(Notification.modified, frappe.utils.now_datetime())
+        .set(Notification.modified_by, frappe.session.user)
+        .where(Notification.name.isin(names))
+        .where(Notification.read == 0)
+    ).run()
+
+    if doc:
+        adjust_unread_count(user, -len(names))
+    else:
+        frappe.cache.delete(get_unread_count_key(user))
+    frappe.publish_realtime("crm_notification", user=user, after_commit=True)
+
+
+def get_route_name(notification):
+    """Page of the record, or of the list for notifications about several records"""
+    route_name = "Deal" if notification.reference_doctype == "CRM Deal" else "Lead"
+    return route_name if notification.reference_name else f"{route_name}s"
+
 
 def get_hash(notification):
     _hash = ""
@@ -0,0 +1,256 @@
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import now_datetime
+
+from crm.fcrm.doctype.crm_lead_assignment_rule.crm_lead_assignment_rule import clear_agent_load
+from crm.fcrm.doctype.crm_notification.crm_notification import notify_user
+from crm.utils import is_manager
+
+OWNER_FIELDS = {"CRM Lead": "lead_owner", "CRM Deal": "deal_owner"}
+CHUNK_SIZE = 500
+
+
+@frappe.whitelist()
+def reassign(doctype, to_agent, names=None, filters=None, from_agent=None):
+	"""
+	Queue a bulk reassignment of leads or deals to `to_agent`.
+
+	:param names: Records to reassign, or
+	:param filters: Filters selecting them
+	:param from_agent: Only take over this agent's assignments and shares, by default every
+	        other assignee is replaced
+	"""
+	if not is_manager():
+		frappe.throw(_("Only Sales Managers can reassign records in bulk"), frappe.PermissionError)
+	if doctype not in OWNER_FIELDS:
+		frappe.throw(_("Bulk reassignment is not supported for {0}").format(doctype))
+	if not frappe.db.exists("User", {"name": to_agent, "enabled": 1}):
+		frappe.throw(_("User {0} does not exist or is disabled").format(to_agent))
+
+	names = frappe.parse_json(names) if names else None
+	filters = frappe.parse_json(filters) if filters else None
+	if not names and not filters:
+		frappe.throw(_("Select the records to reassign"))
+
+	job_id = f"crm_reassign:{doctype}:{to_agent}:{frappe.generate_hash(length=8)}"
+	frappe.enqueue(
+		reassign_records,
+		queue="long",
+		timeout=60 * 60,
+		job_id=job_id,
+		doctype=doctype,
+		to_agent=to_agent,
+		names=names,
+		filters=filters,
+		from_agent=from_agent,
+		user=frappe.session.user,
+	)
+	return job_id
+
+
+def reassign_records(doctype, to_agent, names=None, filters=None, from_agent=None, user=None):
+	"""
+	Rewrite owner, `_assign`, ToDo and DocShare rows of the selected records with set-based
+	statements, a chunk at a time. Document hooks do not run, the target agent gets one summary
+	notification instead of one per record.
+	"""
+	if not names:
+		names = frappe.get_all(doctype, filters=filters, pluck="name")
+	total = len(names)
+
+	for start in range(0, total, CHUNK_SIZE):
+		chunk = names[start : start + CHUNK_SIZE]
+		update_owner(doctype, chunk, to_agent, from_agent)
+		update_todos(doctype, chunk, to_agent, from_agent)
+		update_shares(doctype, chunk, to_agent, from_agent)
+		frappe.db.commit()
+
+		for name in chunk:
+			frappe.clear_document_cache(doctype, name)
+
+		if user:
+			frappe.publish_realtime(
+				"crm_reassign_progress",
+				{"doctype": doctype, "done": min(start + CHUNK_SIZE, total), "total": total},
+				user=user,
+			)
+
+	if total and doctype == "CRM Lead":
+		# owners changed without hooks, let agent loads be recounted
+		clear_agent_load()
+	if total:
+		notify_reassigned(doctype, names, to_agent, user)
+		frappe.db.commit()
+	return total
+
+
+def update_owner(doctype, names, to_agent, from_agent=None):
+	table = frappe.qb.DocType(doctype)
+	rows = frappe.qb.from_(table).select(table.name, table._assign).where(table.name.isin(names)).run()
+
+	# group records by their new `_assign` so each distinct value is one UPDATE
+	by_assign = {}
+	for name, assign in rows:
+		assignees = json.loads(assign) if assign else []
+		if from_agent:
+			assignees = [a for a in assignees if a not in (from_agent, to_agent)]
+		else:
+			assignees = []
+		by_assign.setdefault(json.dumps([*assignees, to_agent]), []).append(name)
+
+	now = now_datetime()
+	for assign, docnames in by_assign.items():
+		(
+			frappe.qb.update(table)
+			.set(table[OWNER_FIELDS[doctype]], to_agent)
+			.set(table._assign, assign)
+			.set(table.modified, now)
+			.set(table.modified_by, frappe.session.user)
+			.where(table.name.isin(docnames))
+		).run()
+
+
+def update_todos(doctype, names, to_agent, from_agent=None):
+	ToDo = frappe.qb.DocType("ToDo")
+	open_todos = (ToDo.reference_type == doctype) & ToDo.reference_name.isin(names) & (ToDo.status == "Open")
+
+	cancel = open_todos & (ToDo.allocated_to != to_agent)
+	if from_agent:
+		cancel &= ToDo.allocated_to == from_agent
+	(
+		frappe.qb.update(ToDo).set(ToDo.status, "Cancelled").set(ToDo.modified, now_datetime()).where(cancel)
+	).run()
+
+	assigned = set(
+		frappe.qb.from_(ToDo)
+		.select(ToDo.reference_name)
+		.where(open_todos & (ToDo.allocated_to == to_agent))
+		.run(pluck=True)
+	)
+
+	now = now_datetime()
+	description = _("Reassigned by {0}").format(frappe.session.user)
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			now,
+			now,
+			frappe.session.user,
+			frappe.session.user,
+			"Open",
+			"Medium",
+			to_agent,
+			description,
+			doctype,
+			name,
+			frappe.session.user,
+		)
+		for name in names
+		if name not in assigned
+	]
+	frappe.db.bulk_insert(
+		"ToDo",
+		[
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"status",
+			"priority",
+			"allocated_to",
+			"description",
+			"reference_type",
+			"reference_name",
+			"assigned_by",
+		],
+		values,
+	)
+
+
+def update_shares(doctype, names, to_agent, from_agent=None):
+	"""Same outcome as `share_with_agent`, the target agent keeps the only write share."""
+	DocShare = frappe.qb.DocType("DocShare")
+	shares = (DocShare.share_doctype == doctype) & DocShare.share_name.isin(names)
+
+	remove = shares & (DocShare.user != to_agent)
+	if from_agent:
+		remove &= DocShare.user == from_agent
+	frappe.qb.from_(DocShare).delete().where(remove).run()
+
+	shared = set(
+		frappe.qb.from_(DocShare)
+		.select(DocShare.share_name)
+		.where(shares & (DocShare.user == to_agent))
+		.run(pluck=True)
+	)
+
+	now = now_datetime()
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			now,
+			now,
+			frappe.session.user,
+			frappe.session.user,
+			to_agent,
+			doctype,
+			name,
+			1,
+			1,
+			0,
+			0,
+			1,
+		)
+		for name in names
+		if name not in shared
+	]
+	frappe.db.bulk_insert(
+		"DocShare",
+		[
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"user",
+			"share_doctype",
+			"share_name",
+			"read",
+			"write",
+			"share",
+			"everyone",
+			"notify_by_email",
+		],
+		values,
+	)
+
+
+def notify_reassigned(doctype, names, to_agent, user=None):
+	"""One notification for the whole batch, opening the record if it is one and the list otherwise"""
+	user = user or frappe.session.user
+	docname = names[0] if len(names) == 1 else ""
+	owner = frappe.get_cached_value("User", user, "full_name")
+	records = _("leads") if doctype == "CRM Lead" else _("deals")
+	message = _("{0} reassigned {1} {2} to you").format(owner, len(names), records)
+	notify_user(
+		{
+			"owner": user,
+			"assigned_to": to_agent,
+			"notification_type": "Assignment",
+			"message": message,
+			"notification_text": f"""
+				<div class="mb-2 leading-5 text-ink-gray-5">
+					<span class="font-medium text-ink-gray-9">{owner}</span>
+					<span>{_("reassigned {0} {1} to you").format(len(names), records)}</span>
+				</div>
+			""",
+			"reference_doctype": doctype,
+			"reference_docname": docname,
+			"redirect_to_doctype": doctype,
+			"redirect_to_docname": docname,
+			"dedupe_key": frappe.generate_hash(),
+		}
+	)
@@ -0,0 +1,155 @@
+import difflib
+
+import frappe
+from frappe.model.db_query import DatabaseQuery
+from frappe.query_builder.functions import Count, Length
+from frappe.utils import cint
+
+from crm.fcrm.doctype.crm_search_entry.crm_search_entry import ROUTE_DOCTYPES, SEARCH_FIELDS
+from crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry import tokenize
+
+# shorter words are not in the fulltext index (innodb_ft_min_token_size)
+MIN_WORD_LENGTH = 3
+FUZZY_MIN_WORD_LENGTH = 4
+# most used known words of about the same length and with the same first letters
+FUZZY_CANDIDATES = 500
+FUZZY_LENGTH_DIFFERENCE = 2
+
+
+@frappe.whitelist()
+def search(txt, doctypes=None, start=0, page_length=20, fuzzy=False):
+	"""
+	Search leads, deals, contacts, organizations, notes and email subjects, best matches first.
+	Every word has to match the start of a word in the record, matches in the title rank higher.
+
+	If nothing matches, words are retried together with close spellings found in the typeahead
+	index and the response has `fuzzy` set, pass it back when asking for the next page.
+
+	Only records the user can read, and notes and emails of leads and deals they can read, are
+	searched, so pages are full and `start` counts visible results only.
+
+	:param doctypes: Limit to these of `SEARCH_FIELDS`
+	:return: `results` of the page, whether there are more and whether spellings were corrected
+	"""
+	start, page_length, fuzzy = cint(start), cint(page_length) or 20, cint(fuzzy)
+	words = [word for word in tokenize(txt) if len(word) >= MIN_WORD_LENGTH]
+	doctypes = get_searchable_doctypes(doctypes)
+	if not words or not doctypes:
+		return {"results": [], "has_more": False, "fuzzy": False}
+
+	permission_condition = get_permission_condition(doctypes)
+	rows = [] if fuzzy else run_search(words, doctypes, permission_condition, start, page_length)
+	if fuzzy or (not rows and not start):
+		alternatives = {word: get_close_words(word) for word in words}
+		fuzzy = any(alternatives.values())
+		if fuzzy:
+			rows = run_search(words, doctypes, permission_condition, start, page_length, alternatives)
+
+	return {
+		"results": [get_result(row) for row in rows[:page_length]],
+		"has_more": len(rows) > page_length,
+		"fuzzy": bool(fuzzy),
+	}
+
+
+def get_searchable_doctypes(doctypes=None):
+	if isinstance(doctypes, str):
+		doctypes = frappe.parse_json(doctypes) if doctypes.startswith("[") else [doctypes]
+
+	readable_routes = [doctype for doctype in ROUTE_DOCTYPES if frappe.has_permission(doctype, "read")]
+	searchable = []
+	for doctype in doctypes or SEARCH_FIELDS:
+		if doctype not in SEARCH_FIELDS:
+			continue
+		# notes and emails are visible to whoever can read the lead or deal they belong to
+		if "route" in SEARCH_FIELDS[doctype]:
+			if readable_routes:
+				searchable.append(doctype)
+		elif frappe.has_permission(doctype, "read"):
+			searchable.append(doctype)
+	return searchable
+
+
+def get_permission_condition(doctypes):
+	"""
+	SQL condition on search entries keeping those whose record, or the lead or deal it belongs
+	to, the user can read. Uses the same match conditions as `frappe.get_list`.
+	"""
+	route_doctypes = {doctype for doctype in doctypes if "route" not in SEARCH_FIELDS[doctype]}
+	if any("route" in SEARCH_FIELDS[doctype] for doctype in doctypes):
+		route_doctypes.update(doctype for doctype in ROUTE_DOCTYPES if frappe.has_permission(doctype, "read"))
+
+	conditions = []
+	for doctype in sorted(route_doctypes):
+		condition = f"route_doctype = {frappe.db.escape(doctype)}"
+		if match_conditions := DatabaseQuery(doctype).build_match_conditions():
+			# run with query parameters, a literal % in the conditions has to be doubled
+			match_conditions = match_conditions.replace("%", "%%")
+			condition += f" and route_name in (select name from `tab{doctype}` where {match_conditions})"
+		conditions.append(f"({condition})")
+	return " or ".join(conditions) or "0"
+
+
+def run_search(words, doctypes, permission_condition, start, page_length, alternatives=None):
+	"""One page of matches plus one row, to tell whether another page follows"""
+	alternatives = alternatives or {}
+	query = " ".join("+({})".format(" ".join([f"{word}*", *alternatives.get(word, [])])) for word in words)
+	return frappe.db.sql(
+		f"""
+		select
+			reference_doctype, reference_name, route_doctype, route_name, title,
+			match(title) against (%(query)s in boolean mode) * 2
+				+ match(title, content) against (%(query)s in boolean mode) as score
+		from `tabCRM Search Entry`
+		where
+			match(title, content) against (%(query)s in boolean mode)
+			and reference_doctype in %(doctypes)s
+			and ({permission_condition})
+		order by score desc, modified desc
+		limit %(start)s, %(limit)s
+		""",
+		{
+			"query": query,
+			"doctypes": tuple(doctypes),
+			"start": start,
+			"limit": page_length + 1,
+		},
+		as_dict=True,
+	)
+
+
+def get_close_words(word):
+	"""Known words spelled like `word`, out of the most used ones of about its length in the typeahead index"""
+	if len(word) < FUZZY_MIN_WORD_LENGTH:
+		return []
+
+	Entry = frappe.qb.DocType("CRM Typeahead Entry")
+	known = (
+		frappe.qb.from_(Entry)
+		.select(Entry.token)
+		.where(Entry.token.like(f"{word[:2]}%"))
+		.where(
+			Length(Entry.token).between(
+				len(word) - FUZZY_LENGTH_DIFFERENCE, len(word) + FUZZY_LENGTH_DIFFERENCE
+			)
+		)
+		.groupby(Entry.token)
+		.orderby(Count("*"), order=frappe.qb.desc)
+		.limit(FUZZY_CANDIDATES)
+	).run(pluck=True)
+	return [
+		match
+		for match in difflib.get_close_matches(word, known, n=3, cutoff=0.75)
+		if match != word and len(match) >= MIN_WORD_LENGTH
+	]
+
+
+def get_result(row):
+	return frappe._dict(
+		doctype=row.reference_doctype,
+		name=row.reference_name,
+		route_doctype=row.route_doctype,
+		route_name=row.route_name,
+		title=row.title,
+		score=row.score,
+	)
@@ -1,6 +1,13 @@
 import frappe
 from frappe import _
-from crm.fcrm.doctype.crm_notification.crm_notification import notify_user
+from crm.fcrm.doctype.crm_notification.crm_notification import notify_users
+
+
+REFERENCE_FIELDS = {
+    "CRM Lead": ["name", "lead_name"],
+    "CRM Deal": ["name", "organization", "lead_name"],
+    "CRM Task": ["name", "title", "reference_doctype", "reference_docname"],
+}
 
 
 def after_insert(doc, method):
@@ -10,63 +17,129 @@ def after_insert(doc, method):
         and doc.allocated_to
     ):
         fieldname = "lead_owner" if doc.reference_type == "CRM Lead" else "deal_owner"
-        lead_owner = frappe.db.get_value(
-            doc.reference_type, doc.reference_name, fieldname
+        # only claims an unowned record, in one UPDATE
+        frappe.db.set_value(
+            doc.reference_type,
+            {"name": doc.reference_name, fieldname: ("is", "not set")},
+            fieldname,
+            doc.allocated_to,
         )
-        if not lead_owner:
-            frappe.db.set_value(
-                doc.reference_type, doc.reference_name, fieldname, doc.allocated_to
-            )
 
     if (
-        doc.reference_type in ["CRM Lead", "CRM Deal", "CRM Task"]
+        doc.reference_type in REFERENCE_FIELDS
         and doc.reference_name
         and doc.allocated_to
     ):
-        notify_assigned_user(doc)
+        queue_assignment_notification(doc)
 
 
 def on_update(doc, method):
     if (
         doc.has_value_changed("status")
         and doc.status == "Cancelled"
-        and doc.reference_type in ["CRM Lead", "CRM Deal", "CRM Task"]
+        and doc.reference_type in REFERENCE_FIELDS
         and doc.reference_name
         and doc.allocated_to
     ):
-        notify_assigned_user(doc, is_cancelled=True)
+        queue_assignment_notification(doc, is_cancelled=True)
+
+
+def queue_assignment_notification(doc, is_cancelled=False):
+    """
+    Notify the assignee when the transaction commits. All ToDos of one transaction are
+    handled together, so bulk assignments fetch each reference doctype once.
+    """
+    if not hasattr(frappe.local, "crm_assignment_notifications"):
+        frappe.local.crm_assignment_notifications = []
+        frappe.db.before_commit.add(send_queued_assignment_notifications)
+        frappe.db.after_rollback.add(clear_queued_assignment_notifications)
+
+    frappe.local.crm_assignment_notifications.append(get_assignment(doc, is_cancelled))
+
+
+def send_queued_assignment_notifications():
+    todos = frappe.local.crm_assignment_notifications
+    clear_queued_assignment_notifications()
+    notify_assigned_users(todos)
+
+
+def clear_queued_assignment_notifications():
+    if hasattr(frappe.local, "crm_assignment_notifications"):
+        del frappe.local.crm_assignment_notifications
+
+
+def get_assignment(doc, is_cancelled=False):
+    return frappe._dict(
+        reference_type=doc.reference_type,
+        reference_name=doc.reference_name,
+        allocated_to=doc.allocated_to,
+        is_cancelled=is_cancelled,
+    )
 
 
 def notify_assigned_user(doc, is_cancelled=False):
-    _doc = frappe.get_doc(doc.reference_type, doc.reference_name)
+    notify_assigned_users([get_assignment(doc, is_cancelled)])
+
+
+def notify_assigned_users(todos):
+    """
+    Notify the assignees of `todos` (see `get_assignment`), reading the referenced records with
+    one projected query per doctype and writing the notifications together.
+    """
+    references = get_references(todos)
     owner = frappe.get_cached_value("User", frappe.session.user, "full_name")
-    notification_text = get_notification_text(owner, doc, _doc, is_cancelled)
 
-    message = (
-        _("Your assignment on {0} {1} has been removed by {2}").format(
-            doc.reference_type, doc.reference_name, owner
+    notifications = []
+    for doc in todos:
+        reference_doc = references.get((doc.reference_type, doc.reference_name))
+        if not reference_doc:
+            continue
+
+        notification_text = get_notification_text(owner, doc, reference_doc, doc.is_cancelled)
+
+        message = (
+            _("Your assignment on {0} {1} has been removed by {2}").format(
+                doc.reference_type, doc.reference_name, owner
+            )
+            if doc.is_cancelled
+            else _("{0} assigned a {1} {2} to you").format(
+                owner, doc.reference_type, doc.reference_name
+            )
         )
-        if is_cancelled
-        else _("{0} assigned a {1} {2} to you").format(
-            owner, doc.reference_type, doc.reference_name
+
+        redirect_to_doctype, redirect_to_name = get_redirect_to_doc(doc, reference_doc)
+
+        notifications.append(
+            {
+                "owner": frappe.session.user,
+                "assigned_to": doc.allocated_to,
+                "notification_type": "Assignment",
+                "message": message,
+                "notification_text": notification_text,
+                "reference_doctype": doc.reference_type,
+                "reference_docname": doc.reference_name,
+                "redirect_to_doctype": redirect_to_doctype,
+                "redirect_to_docname": redirect_to_name,
+            }
         )
-    )
 
-    redirect_to_doctype, redirect_to_name = get_redirect_to_doc(doc)
-
-    notify_user(
-        {
-            "owner": frappe.session.user,
-            "assigned_to": doc.allocated_to,
-            "notification_type": "Assignment",
-            "message": message,
-            "notification_text": notification_text,
-            "reference_doctype": doc.reference_type,
-            "reference_docname": doc.reference_name,
-            "redirect_to_doctype": redirect_to_doctype,
-            "redirect_to_docname": redirect_to_name,
-        }
-    )
+    notify_users(notifications)
+
+
+def get_references(todos):
+    names = {}
+    for doc in todos:
+        names.setdefault(doc.reference_type, set()).add(doc.reference_name)
+
+    references = {}
+    for doctype, docnames in names.items():
+        for row in frappe.get_all(
+            doctype,
+            filters={"name": ("in", list(docnames))},
+            fields=REFERENCE_FIELDS[doctype],
+        ):
+            references[(doctype, row.name)] = row
+    return references
 
 
 def get_notification_text(owner, doc, reference_doc, is_cancelled=False):
@@ -124,9 +197,8 @@ def get_notification_text(owner, doc, reference_doc, is_cancelled=False):
         """
 
 
-def get_redirect_to_doc(doc):
+def get_redirect_to_doc(doc, reference_doc):
     if doc.reference_type == "CRM Task":
-        reference_doc = frappe.get_doc(doc.reference_type, doc.reference_name)
         return reference_doc.reference_doctype, reference_doc.reference_docname
 
     return doc.reference_type, doc.reference_name
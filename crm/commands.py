@@ -0,0 +1,45 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-call-log-rollups")
+@click.option("--from-date", help="First day to rebuild (YYYY-MM-DD), defaults to the first call log")
+@click.option("--to-date", help="Last day to rebuild (YYYY-MM-DD), defaults to the last call log")
+@pass_context
+def rebuild_call_log_rollups(context, from_date=None, to_date=None):
+	"""Recompute CRM Call Log Rollup from CRM Call Log"""
+	import frappe
+
+	from crm.fcrm.doctype.crm_call_log_rollup.crm_call_log_rollup import rebuild_rollups
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		rebuild_rollups(from_date, to_date)
+	finally:
+		frappe.destroy()
+
+
+@click.command("rebuild-typeahead-index")
+@click.option(
+	"--doctype",
+	"doctypes",
+	multiple=True,
+	help="Contact, CRM Lead or CRM Organization, can be repeated, defaults to all three",
+)
+@pass_context
+def rebuild_typeahead_index(context, doctypes=None):
+	"""Rebuild CRM Typeahead Entry from contacts, leads and organizations"""
+	import frappe
+
+	from crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry import rebuild_index
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		rebuild_index(doctypes or None)
+	finally:
+		frappe.destroy()
+
+
+commands = [rebuild_call_log_rollups, rebuild_typeahead_index]
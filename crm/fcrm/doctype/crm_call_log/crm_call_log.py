@@ -4,11 +4,18 @@
 import frappe
 from frappe.model.document import Document
 
-from crm.integrations.api import get_contact_by_phone_number
+from crm.fcrm.doctype.crm_call_log_rollup.crm_call_log_rollup import update_call_log_rollup
+from crm.integrations.api import get_contacts_by_phone_numbers
 from crm.utils import seconds_to_duration
 
 
 class CRMCallLog(Document):
+	def on_update(self):
+		update_call_log_rollup(self, self.get_doc_before_save())
+
+	def on_trash(self):
+		update_call_log_rollup(previous=self)
+
 	@staticmethod
 	def default_list_data():
 		columns = [
@@ -81,7 +88,7 @@ class CRMCallLog(Document):
 		return {"columns": columns, "rows": rows}
 
 	def parse_list_data(calls):
-		return [parse_call_log(call) for call in calls] if calls else []
+		return parse_call_logs(calls) if calls else []
 
 	def has_link(self, doctype, name):
 		for link in self.links:
@@ -96,42 +103,58 @@ class CRMCallLog(Document):
 
 
 def parse_call_log(call):
-	call["show_recording"] = False
-	call["_duration"] = seconds_to_duration(call.get("duration"))
-	if call.get("type") == "Incoming":
-		call["activity_type"] = "incoming_call"
-		contact = get_contact_by_phone_number(call.get("from"))
-		receiver = (
-			frappe.db.get_values("User", call.get("receiver"), ["full_name", "user_image"])[0]
-			if call.get("receiver")
-			else [None, None]
-		)
-		call["_caller"] = {
-			"label": contact.get("full_name", "Unknown"),
-			"image": contact.get("image"),
-		}
-		call["_receiver"] = {
-			"label": receiver[0],
-			"image": receiver[1],
-		}
-	elif call.get("type") == "Outgoing":
-		call["activity_type"] = "outgoing_call"
-		contact = get_contact_by_phone_number(call.get("to"))
-		caller = (
-			frappe.db.get_values("User", call.get("caller"), ["full_name", "user_image"])[0]
-			if call.get("caller")
-			else [None, None]
+	return parse_call_logs([call])[0]
+
+
+def parse_call_logs(calls):
+	"""
+	Add caller/receiver details to call logs.
+
+	Contacts, leads & users for the whole batch are resolved together, so the number of
+	queries does not grow with the number of call logs.
+	"""
+	contact_numbers = []
+	users = set()
+	for call in calls:
+		if call.get("type") == "Incoming":
+			contact_numbers.append(call.get("from"))
+			users.add(call.get("receiver"))
+		elif call.get("type") == "Outgoing":
+			contact_numbers.append(call.get("to"))
+			users.add(call.get("caller"))
+
+	contacts = get_contacts_by_phone_numbers(contact_numbers)
+
+	users = [u for u in users if u]
+	if users:
+		users = frappe.get_all(
+			"User",
+			filters={"name": ("in", users)},
+			fields=["name", "full_name", "user_image"],
 		)
-		call["_caller"] = {
-			"label": caller[0],
-			"image": caller[1],
-		}
-		call["_receiver"] = {
-			"label": contact.get("full_name", "Unknown"),
-			"image": contact.get("image"),
-		}
-
-	return call
+	users = {u.name: u for u in users}
+
+	def user_info(user):
+		user = users.get(user) or {}
+		return {"label": user.get("full_name"), "image": user.get("user_image")}
+
+	def contact_info(number):
+		contact = contacts.get(number) or {}
+		return {"label": contact.get("full_name", "Unknown"), "image": contact.get("image")}
+
+	for call in calls:
+		call["show_recording"] = False
+		call["_duration"] = seconds_to_duration(call.get("duration"))
+		if call.get("type") == "Incoming":
+			call["activity_type"] = "incoming_call"
+			call["_caller"] = contact_info(call.get("from"))
+			call["_receiver"] = user_info(call.get("receiver"))
+		elif call.get("type") == "Outgoing":
+			call["activity_type"] = "outgoing_call"
+			call["_caller"] = user_info(call.get("caller"))
+			call["_receiver"] = contact_info(call.get("to"))
+
+	return calls
 
 
 @frappe.whitelist()
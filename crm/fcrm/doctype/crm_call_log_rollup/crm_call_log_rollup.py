@@ -0,0 +1,138 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, getdate, now_datetime
+
+
+class CRMCallLogRollup(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("CRM Call Log Rollup", ["date", "agent"])
+
+
+def update_call_log_rollup(call_log=None, previous=None):
+	"""
+	Move a call log's contribution from the rollup row of its previous state to the row of its
+	current state. Pass only `previous` to remove a deleted call log.
+	"""
+	old_key = get_rollup_key(previous) if previous else None
+	new_key = get_rollup_key(call_log) if call_log else None
+	old_duration = cint(previous.duration) if previous else 0
+	new_duration = cint(call_log.duration) if call_log else 0
+
+	if old_key == new_key:
+		if new_key and old_duration != new_duration:
+			increment_rollup(new_key, 0, new_duration - old_duration)
+		return
+
+	if old_key:
+		increment_rollup(old_key, -1, -old_duration)
+	if new_key:
+		increment_rollup(new_key, 1, new_duration)
+
+
+def get_rollup_key(call_log):
+	agent = call_log.get("caller") if call_log.get("type") == "Outgoing" else call_log.get("receiver")
+	return (
+		agent or "",
+		str(getdate(call_log.get("creation") or now_datetime())),
+		call_log.get("telephony_medium") or "",
+		call_log.get("type") or "",
+		call_log.get("status") or "",
+	)
+
+
+def get_rollup_name(key):
+	return hashlib.md5("|".join(key).encode()).hexdigest()
+
+
+def increment_rollup(key, count, duration):
+	agent, date, telephony_medium, call_type, status = key
+	now = now_datetime()
+	frappe.db.sql(
+		"""
+		insert into `tabCRM Call Log Rollup`
+			(name, creation, modified, owner, modified_by,
+			agent, date, telephony_medium, type, status, call_count, total_duration)
+		values
+			(%(name)s, %(now)s, %(now)s, %(user)s, %(user)s,
+			%(agent)s, %(date)s, %(telephony_medium)s, %(type)s, %(status)s, %(count)s, %(duration)s)
+		on duplicate key update
+			call_count = call_count + values(call_count),
+			total_duration = total_duration + values(total_duration),
+			modified = values(modified)
+		""",
+		{
+			"name": get_rollup_name(key),
+			"now": now,
+			"user": frappe.session.user,
+			"agent": agent,
+			"date": date,
+			"telephony_medium": telephony_medium,
+			"type": call_type,
+			"status": status,
+			"count": count,
+			"duration": duration,
+		},
+	)
+
+
+def rebuild_rollups(from_date=None, to_date=None, chunk_days=31):
+	"""
+	Recompute rollups from `tabCRM Call Log`, one chunk of days at a time so no single
+	statement has to group the whole table.
+	"""
+	first_day, last_day = frappe.db.sql(
+		"select min(date(creation)), max(date(creation)) from `tabCRM Call Log`"
+	)[0]
+	if not (from_date or first_day) or not (to_date or last_day):
+		return
+
+	from_date = getdate(from_date or first_day)
+	to_date = getdate(to_date or last_day)
+
+	start = from_date
+	while start <= to_date:
+		end = min(add_days(start, chunk_days - 1), to_date)
+		rebuild_rollups_between(start, end)
+		frappe.db.commit()
+		start = add_days(end, 1)
+
+
+def rebuild_rollups_between(from_date, to_date):
+	frappe.db.delete("CRM Call Log Rollup", {"date": ("between", [from_date, to_date])})
+	frappe.db.sql(
+		"""
+		insert into `tabCRM Call Log Rollup`
+			(name, creation, modified, owner, modified_by,
+			agent, date, telephony_medium, type, status, call_count, total_duration)
+		select
+			md5(concat_ws('|', agent, date, telephony_medium, type, status)),
+			%(now)s, %(now)s, %(user)s, %(user)s,
+			agent, date, telephony_medium, type, status, count(*), sum(duration)
+		from (
+			select
+				if(`type` = 'Outgoing', ifnull(caller, ''), ifnull(receiver, '')) as agent,
+				date(creation) as date,
+				ifnull(telephony_medium, '') as telephony_medium,
+				ifnull(`type`, '') as type,
+				ifnull(status, '') as status,
+				floor(ifnull(duration, 0)) as duration
+			from `tabCRM Call Log`
+			where creation >= %(from_date)s and creation < %(to_date)s
+		) call_log
+		group by agent, date, telephony_medium, type, status
+		""",
+		{
+			"now": now_datetime(),
+			"user": frappe.session.user,
+			"from_date": from_date,
+			"to_date": add_days(to_date, 1),
+		},
+	)
@@ -0,0 +1,106 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from crm.fcrm.doctype.crm_call_log_rollup.crm_call_log_rollup import rebuild_rollups
+
+# a day no real call log is on, so the rollup rows only hold the test's calls
+TEST_DAY = "2001-02-03"
+
+
+class TestCRMCallLogRollup(UnitTestCase):
+	pass
+
+
+class IntegrationTestCRMCallLogRollup(IntegrationTestCase):
+	def test_update_moves_call_between_rows(self):
+		call_log = make_call_log(TEST_DAY, "Incoming", "Ringing")
+		self.assertEqual(get_rollups(TEST_DAY), {("Incoming", "Ringing"): (1, 0)})
+
+		call_log.status = "Completed"
+		call_log.duration = 120
+		call_log.save(ignore_permissions=True)
+		self.assertEqual(
+			get_rollups(TEST_DAY),
+			{("Incoming", "Ringing"): (0, 0), ("Incoming", "Completed"): (1, 120)},
+		)
+
+		call_log.duration = 150
+		call_log.save(ignore_permissions=True)
+		self.assertEqual(get_rollups(TEST_DAY)["Incoming", "Completed"], (1, 150))
+
+		call_log.delete(ignore_permissions=True)
+		self.assertEqual(get_rollups(TEST_DAY)["Incoming", "Completed"], (0, 0))
+
+	def test_rebuild_matches_incremental_rollups(self):
+		make_call_log(TEST_DAY, "Incoming", "Completed", 60)
+		make_call_log(TEST_DAY, "Incoming", "Completed", 45)
+		make_call_log(TEST_DAY, "Outgoing", "No Answer")
+		changed = make_call_log(TEST_DAY, "Outgoing", "Ringing")
+		changed.status = "Completed"
+		changed.duration = 30
+		changed.save(ignore_permissions=True)
+		deleted = make_call_log(TEST_DAY, "Incoming", "Busy")
+		deleted.delete(ignore_permissions=True)
+
+		incremental = get_rollup_rows(TEST_DAY)
+		# rebuilding commits each chunk of days, keep the test data uncommitted
+		with patch.object(frappe.db, "commit"):
+			rebuild_rollups(TEST_DAY, TEST_DAY)
+
+		self.assertEqual(get_rollup_rows(TEST_DAY), incremental)
+		self.assertEqual(len(incremental), 3)
+
+
+def make_call_log(day, call_type, status, duration=0):
+	return frappe.get_doc(
+		{
+			"doctype": "CRM Call Log",
+			"id": frappe.generate_hash(length=12),
+			"from": "+911234567890",
+			"to": "+919876543210",
+			"type": call_type,
+			"status": status,
+			"duration": duration,
+			"telephony_medium": "Manual",
+			"receiver": "Administrator" if call_type == "Incoming" else None,
+			"caller": "Administrator" if call_type == "Outgoing" else None,
+			"creation": f"{day} 10:00:00",
+		}
+	).insert(ignore_permissions=True)
+
+
+def get_rollups(day):
+	return {
+		(row.type, row.status): (row.call_count, row.total_duration)
+		for row in frappe.get_all(
+			"CRM Call Log Rollup",
+			filters={"date": day},
+			fields=["type", "status", "call_count", "total_duration"],
+		)
+	}
+
+
+def get_rollup_rows(day):
+	"""Rows with calls in them, incremental updates leave emptied rows behind and a rebuild does not"""
+	return sorted(
+		frappe.get_all(
+			"CRM Call Log Rollup",
+			filters={"date": day, "call_count": (">", 0)},
+			fields=[
+				"name",
+				"agent",
+				"date",
+				"telephony_medium",
+				"type",
+				"status",
+				"call_count",
+				"total_duration",
+			],
+			as_list=True,
+		)
+	)
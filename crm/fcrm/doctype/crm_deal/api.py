@@ -19,39 +19,66 @@ def get_deal(name):
 
 @frappe.whitelist()
 def get_deal_contacts(name):
-	contacts = frappe.get_all(
-		"CRM Contacts",
-		filters={"parenttype": "CRM Deal", "parent": name},
-		fields=["contact", "is_primary"],
-		distinct=True,
-	)
-	deal_contacts = []
-	for contact in contacts:
-		if not contact.contact:
-			continue
-
-		is_primary = contact.is_primary
-		contact = frappe.get_doc("Contact", contact.contact).as_dict()
-
-		def get_primary_email(contact):
-			for email in contact.email_ids:
-				if email.is_primary:
-					return email.email_id
-			return contact.email_ids[0].email_id if contact.email_ids else ""
-
-		def get_primary_mobile_no(contact):
-			for phone in contact.phone_nos:
-				if phone.is_primary:
-					return phone.phone
-			return contact.phone_nos[0].phone if contact.phone_nos else ""
-
-		_contact = {
-			"name": contact.name,
-			"image": contact.image,
-			"full_name": contact.full_name,
-			"email": get_primary_email(contact),
-			"mobile_no": get_primary_mobile_no(contact),
-			"is_primary": is_primary,
-		}
-		deal_contacts.append(_contact)
-	return deal_contacts
+	"""
+	Contacts of deal `name` with their primary email and phone, read with one joined query.
+	Every email/phone combination of a contact comes back as a row, the primary ones are
+	picked here.
+	"""
+	Contacts = frappe.qb.DocType("CRM Contacts")
+	Contact = frappe.qb.DocType("Contact")
+	Email = frappe.qb.DocType("Contact Email")
+	Phone = frappe.qb.DocType("Contact Phone")
+	rows = (
+		frappe.qb.from_(Contacts)
+		.join(Contact)
+		.on(Contact.name == Contacts.contact)
+		.left_join(Email)
+		.on((Email.parent == Contact.name) & (Email.parenttype == "Contact"))
+		.left_join(Phone)
+		.on((Phone.parent == Contact.name) & (Phone.parenttype == "Contact"))
+		.select(
+			Contact.name,
+			Contact.image,
+			Contact.full_name,
+			Contacts.is_primary,
+			Email.email_id,
+			Email.is_primary.as_("is_primary_email"),
+			Phone.phone,
+			Phone.is_primary_mobile_no,
+			Phone.is_primary_phone,
+		)
+		.where(Contacts.parenttype == "CRM Deal")
+		.where(Contacts.parent == name)
+		.orderby(Contacts.idx)
+		.orderby(Email.idx)
+		.orderby(Phone.idx)
+	).run(as_dict=True)
+
+	deal_contacts = {}
+	for row in rows:
+		contact = deal_contacts.get(row.name)
+		if not contact:
+			contact = deal_contacts[row.name] = frappe._dict(
+				name=row.name,
+				image=row.image,
+				full_name=row.full_name,
+				email="",
+				mobile_no="",
+				is_primary=row.is_primary,
+				email_rank=0,
+				phone_rank=0,
+			)
+		contact.is_primary = contact.is_primary or row.is_primary
+
+		# first of the contact's rows wins at equal rank, rows come in idx order
+		email_rank = 2 if row.is_primary_email else 1
+		if row.email_id and email_rank > contact.email_rank:
+			contact.email, contact.email_rank = row.email_id, email_rank
+
+		phone_rank = 3 if row.is_primary_mobile_no else 2 if row.is_primary_phone else 1
+		if row.phone and phone_rank > contact.phone_rank:
+			contact.mobile_no, contact.phone_rank = row.phone, phone_rank
+
+	for contact in deal_contacts.values():
+		del contact["email_rank"], contact["phone_rank"]
+	return list(deal_contacts.values())
@@ -0,0 +1,108 @@
+"""
+Deal contact benchmark.
+
+Times `crm.api.contact.get_linked_deals` for a contact linked to many deals and
+`get_deal_contacts` for a deal with many contacts, and counts the queries each call runs.
+Everything is created inside a transaction that is rolled back, so it can be pointed at a
+development site with data in it.
+
+Usage:
+	bench --site crm.localhost execute crm.fcrm.doctype.crm_deal.benchmark.run \
+		--kwargs "{'deals': 300, 'contacts': 20, 'repeat': 20}"
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+from crm.api.contact import get_linked_deals
+from crm.fcrm.doctype.crm_deal.api import get_deal_contacts
+from crm.utils.benchmark import count_queries, percentile, to_ms
+
+
+def run(deals=300, contacts=20, emails=3, phones=3, repeat=20):
+	"""
+	:param deals: Deals the benchmark contact is linked to
+	:param contacts: Contacts on the benchmark deal
+	:param emails: Email addresses and phone numbers on every generated contact
+	:param repeat: Times each endpoint is called
+	"""
+	deals, contacts, repeat = cint(deals), cint(contacts), cint(repeat) or 1
+	frappe.db.commit()
+	count_queries(frappe.db)
+
+	try:
+		contact_names = [make_contact(i, cint(emails), cint(phones)) for i in range(max(contacts, 1))]
+		status = frappe.get_all("CRM Deal Status", pluck="name", order_by="position asc", limit=1)[0]
+		deal_names = [make_deal(contact_names[:1], status) for _ in range(max(deals, 1))]
+		# the last deal carries every contact
+		link_contacts(deal_names[-1], contact_names[1:])
+
+		results = {
+			"get_linked_deals": measure(get_linked_deals, repeat, contact=contact_names[0]),
+			"get_deal_contacts": measure(get_deal_contacts, repeat, name=deal_names[-1]),
+		}
+	finally:
+		frappe.db.rollback()
+		del frappe.db.sql
+
+	report = {
+		"created": str(now_datetime()),
+		"parameters": {"deals": deals, "contacts": contacts, "emails": emails, "phones": phones},
+		"results": results,
+	}
+	return report
+
+
+def make_contact(index, emails, phones):
+	tag = frappe.generate_hash(length=6)
+	contact = frappe.get_doc(
+		{
+			"doctype": "Contact",
+			"first_name": f"Benchmark {index} {tag}",
+			"email_ids": [
+				{"email_id": f"benchmark.{index}.{i}.{tag}@example.com", "is_primary": i == 0}
+				for i in range(emails)
+			],
+			"phone_nos": [
+				{"phone": f"+1555{index:04d}{i:03d}", "is_primary_mobile_no": i == 0} for i in range(phones)
+			],
+		}
+	)
+	return contact.insert(ignore_permissions=True).name
+
+
+def make_deal(contact_names, status):
+	deal = frappe.get_doc(
+		{
+			"doctype": "CRM Deal",
+			"status": status,
+			"contacts": [{"contact": name, "is_primary": i == 0} for i, name in enumerate(contact_names)],
+		}
+	)
+	return deal.insert(ignore_permissions=True).name
+
+
+def link_contacts(deal_name, contact_names):
+	deal = frappe.get_doc("CRM Deal", deal_name)
+	for name in contact_names:
+		deal.append("contacts", {"contact": name})
+	deal.save(ignore_permissions=True)
+
+
+def measure(fn, repeat, **kwargs):
+	timings, queries, rows = [], [], 0
+	for _ in range(repeat):
+		frappe.db.query_count = 0
+		started = time.perf_counter()
+		rows = len(fn(**kwargs))
+		timings.append(time.perf_counter() - started)
+		queries.append(frappe.db.query_count)
+	return {
+		"rows": rows,
+		"queries": max(queries),
+		"p50": to_ms(percentile(timings, 50)),
+		"p95": to_ms(percentile(timings, 95)),
+		"max": to_ms(max(timings)),
+	}
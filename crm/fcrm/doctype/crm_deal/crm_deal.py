@@ -129,9 +129,8 @@ class CRMDeal(Document):
 		"""
 		if not self.sla:
 			return
-		sla = frappe.get_last_doc("CRM Service Level Agreement", {"name": self.sla})
-		if sla:
-			sla.apply(self)
+		sla = frappe.get_cached_doc("CRM Service Level Agreement", self.sla)
+		sla.apply(self)
 
 	@staticmethod
 	def default_list_data():
@@ -208,6 +207,10 @@ class CRMDeal(Document):
 		}
 
 
+def on_doctype_update():
+	frappe.db.add_index("CRM Deal", ["sla_status", "response_by"])
+
+
 @frappe.whitelist()
 def add_contact(deal, contact):
 	if not frappe.has_permission("CRM Deal", "write", deal):
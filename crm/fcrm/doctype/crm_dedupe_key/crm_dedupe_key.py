@@ -0,0 +1,363 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import cint, now_datetime
+
+from crm.fcrm.doctype.crm_dedupe_key.match_keys import (
+	STRONG_KEY_TYPES,
+	get_key_type,
+	get_match_keys,
+)
+from crm.utils import is_manager
+
+DEDUPE_DOCTYPES = ("CRM Lead", "Contact")
+KEY_FIELDS = [
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"match_key",
+	"key_type",
+	"reference_doctype",
+	"reference_name",
+]
+# strong key rows read per duplicate lookup
+CANDIDATE_LIMIT = 200
+# keys shared by more records than this (a switchboard number, a generic inbox) are too
+# common to say anything and are left out of clusters
+MAX_BLOCK_SIZE = 50
+REBUILD_CHUNK_SIZE = 2000
+
+
+class CRMDedupeKey(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("CRM Dedupe Key", ["match_key"])
+	frappe.db.add_index("CRM Dedupe Key", ["reference_doctype", "reference_name"])
+	frappe.db.add_index("CRM Dedupe Key", ["cluster"])
+
+
+def get_record_keys(doc) -> set[str]:
+	"""Match keys of a lead or contact, converted leads have none as their contact stands for them"""
+	if doc.doctype == "CRM Lead":
+		if doc.get("converted"):
+			return set()
+		first_name, last_name = doc.get("first_name"), doc.get("last_name")
+		if not first_name and not last_name:
+			first_name = doc.get("lead_name")
+		return get_match_keys(
+			emails=[doc.get("email")],
+			phones=[doc.get("mobile_no"), doc.get("phone")],
+			first_name=first_name,
+			last_name=last_name,
+			organization=doc.get("organization"),
+		)
+
+	return get_match_keys(
+		emails=[doc.get("email_id"), *(row.get("email_id") for row in doc.get("email_ids") or [])],
+		phones=[
+			doc.get("mobile_no"),
+			doc.get("phone"),
+			*(row.get("phone") for row in doc.get("phone_nos") or []),
+		],
+		first_name=doc.get("first_name"),
+		last_name=doc.get("last_name"),
+		organization=doc.get("company_name"),
+	)
+
+
+def update_keys(doc, method=None):
+	"""Replace the match keys of a saved lead or contact, if they changed"""
+	keys = get_record_keys(doc)
+	before = doc.get_doc_before_save()
+	if before and get_record_keys(before) == keys:
+		return
+	remove_keys(doc)
+	insert_keys(doc.doctype, doc.name, keys)
+
+
+def remove_keys(doc, method=None):
+	frappe.db.delete("CRM Dedupe Key", {"reference_doctype": doc.doctype, "reference_name": doc.name})
+
+
+def insert_keys(doctype, name, keys):
+	rows = get_rows(doctype, name, keys)
+	if rows:
+		frappe.db.bulk_insert("CRM Dedupe Key", KEY_FIELDS, rows)
+
+
+def get_rows(doctype, name, keys):
+	now = now_datetime()
+	user = frappe.session.user
+	return [
+		(frappe.generate_hash(length=12), now, now, user, user, key, get_key_type(key), doctype, name)
+		for key in sorted(keys)
+	]
+
+
+def find_duplicates(keys, exclude=None, doctypes=DEDUPE_DOCTYPES) -> list[frappe._dict]:
+	"""
+	Records sharing a strong key with `keys`, with every key type they share. Records are found
+	by their strong keys, the weak keys are only read for those records.
+
+	:param exclude: `(doctype, name)` of the record itself
+	"""
+	strong_keys = [key for key in keys if get_key_type(key) in STRONG_KEY_TYPES]
+	if not strong_keys:
+		return []
+
+	Key = frappe.qb.DocType("CRM Dedupe Key")
+	rows = (
+		frappe.qb.from_(Key)
+		.select(Key.reference_doctype, Key.reference_name, Key.key_type)
+		.where(Key.match_key.isin(strong_keys))
+		.where(Key.key_type.isin(STRONG_KEY_TYPES))
+		.where(Key.reference_doctype.isin(list(doctypes)))
+		.limit(CANDIDATE_LIMIT)
+	).run(as_dict=True)
+
+	candidates = {}
+	for row in rows:
+		record = (row.reference_doctype, row.reference_name)
+		if record != exclude:
+			candidates.setdefault(record, set()).add(row.key_type)
+	if not candidates:
+		return []
+
+	weak_keys = [key for key in keys if key not in strong_keys]
+	if weak_keys:
+		weak_rows = (
+			frappe.qb.from_(Key)
+			.select(Key.reference_doctype, Key.reference_name, Key.key_type)
+			.where(Key.match_key.isin(weak_keys))
+			.where(Key.reference_name.isin([name for _doctype, name in candidates]))
+		).run(as_dict=True)
+		for row in weak_rows:
+			record = (row.reference_doctype, row.reference_name)
+			if record in candidates:
+				candidates[record].add(row.key_type)
+
+	duplicates = [
+		frappe._dict(doctype=doctype, name=name, matches=sorted(matches))
+		for (doctype, name), matches in candidates.items()
+	]
+	duplicates.sort(key=lambda d: -len(set(d.matches) & set(STRONG_KEY_TYPES)))
+	return duplicates
+
+
+@frappe.whitelist()
+def get_duplicates(doctype, name=None, values=None):
+	"""
+	Possible duplicates of a saved lead or contact, or of the `values` of one being created.
+	Only records the user can read are returned.
+	"""
+	if doctype not in DEDUPE_DOCTYPES:
+		frappe.throw(_("Duplicate detection is not supported for {0}").format(doctype))
+
+	if name:
+		doc = frappe.get_doc(doctype, name)
+		doc.check_permission("read")
+	else:
+		doc = frappe._dict(frappe.parse_json(values) or {})
+		doc.doctype = doctype
+
+	duplicates = find_duplicates(get_record_keys(doc), exclude=(doctype, name))
+	return filter_permitted(duplicates)
+
+
+def filter_permitted(duplicates):
+	names = {}
+	for duplicate in duplicates:
+		names.setdefault(duplicate.doctype, []).append(duplicate.name)
+
+	permitted = set()
+	for doctype, docnames in names.items():
+		if frappe.has_permission(doctype, "read"):
+			for name in frappe.get_list(doctype, filters={"name": ("in", docnames)}, pluck="name"):
+				permitted.add((doctype, name))
+	return [d for d in duplicates if (d.doctype, d.name) in permitted]
+
+
+def get_contacts_by_key(keys) -> dict[str, str]:
+	"""Contact holding each of `keys`, one indexed lookup"""
+	keys = [key for key in keys if key]
+	if not keys:
+		return {}
+	return dict(
+		frappe.get_all(
+			"CRM Dedupe Key",
+			filters={"reference_doctype": "Contact", "match_key": ("in", keys)},
+			fields=["match_key", "reference_name"],
+			order_by="creation asc",
+			as_list=True,
+		)
+	)
+
+
+def cluster_duplicates():
+	"""
+	Group leads and contacts linked by shared strong keys, directly or through each other, and
+	write each group's id to the `cluster` of their keys.
+	"""
+	rows = frappe.db.sql(
+		"""
+		select k.name, k.reference_doctype, k.reference_name, k.match_key
+		from `tabCRM Dedupe Key` k
+		join (
+			select match_key
+			from `tabCRM Dedupe Key`
+			where key_type in %(key_types)s
+			group by match_key
+			having count(*) between 2 and %(max_block_size)s
+		) shared on shared.match_key = k.match_key
+		""",
+		{"key_types": STRONG_KEY_TYPES, "max_block_size": MAX_BLOCK_SIZE},
+		as_dict=True,
+	)
+
+	# union-find over records, every shared key joins its records into one set
+	parent = {}
+
+	def find(record):
+		parent.setdefault(record, record)
+		while parent[record] != record:
+			parent[record] = parent[parent[record]]
+			record = parent[record]
+		return record
+
+	first_by_key = {}
+	for row in rows:
+		record = (row.reference_doctype, row.reference_name)
+		first = first_by_key.setdefault(row.match_key, record)
+		parent[find(record)] = find(first)
+
+	members = {}
+	for record in parent:
+		members.setdefault(find(record), []).append(record)
+	cluster_ids = {
+		root: hashlib.md5("|".join(min(records)).encode()).hexdigest()[:16]
+		for root, records in members.items()
+	}
+
+	Key = frappe.qb.DocType("CRM Dedupe Key")
+	frappe.qb.update(Key).set(Key.cluster, None).where(Key.cluster.isnotnull()).run()
+	updates = {
+		row.name: {"cluster": cluster_ids[find((row.reference_doctype, row.reference_name))]} for row in rows
+	}
+	if updates:
+		frappe.db.bulk_update("CRM Dedupe Key", updates, chunk_size=1000, update_modified=False)
+
+
+@frappe.whitelist()
+def get_duplicate_clusters(start=0, page_length=20):
+	"""Groups of likely duplicate leads and contacts found by `cluster_duplicates`"""
+	if not is_manager():
+		frappe.throw(_("Only Sales Managers can review duplicates"), frappe.PermissionError)
+
+	Key = frappe.qb.DocType("CRM Dedupe Key")
+	clusters = (
+		frappe.qb.from_(Key)
+		.select(Key.cluster)
+		.distinct()
+		.where(Key.cluster.isnotnull())
+		.orderby(Key.cluster)
+		.offset(cint(start))
+		.limit(cint(page_length) or 20)
+	).run(pluck=True)
+	if not clusters:
+		return []
+
+	rows = (
+		frappe.qb.from_(Key)
+		.select(Key.cluster, Key.reference_doctype, Key.reference_name, Key.key_type)
+		.where(Key.cluster.isin(clusters))
+	).run(as_dict=True)
+
+	grouped = {cluster: {} for cluster in clusters}
+	for row in rows:
+		record = grouped[row.cluster].setdefault(
+			(row.reference_doctype, row.reference_name),
+			frappe._dict(doctype=row.reference_doctype, name=row.reference_name, matches=set()),
+		)
+		record.matches.add(row.key_type)
+
+	return [
+		{"cluster": cluster, "records": [{**r, "matches": sorted(r.matches)} for r in records.values()]}
+		for cluster, records in grouped.items()
+	]
+
+
+def rebuild_keys(doctypes=None, chunk_size=REBUILD_CHUNK_SIZE):
+	"""Drop and rebuild the match keys of `doctypes`, a chunk of records at a time"""
+	for doctype in doctypes or DEDUPE_DOCTYPES:
+		frappe.db.delete("CRM Dedupe Key", {"reference_doctype": doctype})
+		frappe.db.commit()
+
+		for records in iter_records(doctype, chunk_size):
+			rows = []
+			for record in records:
+				rows.extend(get_rows(doctype, record.name, get_record_keys(record)))
+			if rows:
+				frappe.db.bulk_insert("CRM Dedupe Key", KEY_FIELDS, rows)
+			frappe.db.commit()
+
+
+def iter_records(doctype, chunk_size):
+	"""Records as `get_record_keys` reads them, a chunk at a time ordered by name"""
+	fields = {
+		"CRM Lead": [
+			"name",
+			"converted",
+			"first_name",
+			"last_name",
+			"lead_name",
+			"organization",
+			"email",
+			"mobile_no",
+			"phone",
+		],
+		"Contact": ["name", "first_name", "last_name", "company_name", "email_id", "mobile_no", "phone"],
+	}[doctype]
+	filters = {"converted": 0} if doctype == "CRM Lead" else {}
+
+	last_name = ""
+	while True:
+		records = frappe.get_all(
+			doctype,
+			filters={**filters, "name": (">", last_name)},
+			fields=fields,
+			order_by="name asc",
+			limit=chunk_size,
+		)
+		if not records:
+			return
+
+		for record in records:
+			record.doctype = doctype
+		if doctype == "Contact":
+			names = [record.name for record in records]
+			children = {}
+			for child_doctype, field, table in (
+				("Contact Email", "email_id", "email_ids"),
+				("Contact Phone", "phone", "phone_nos"),
+			):
+				for row in frappe.get_all(
+					child_doctype,
+					filters={"parenttype": "Contact", "parent": ("in", names)},
+					fields=["parent", field],
+				):
+					children.setdefault((row.parent, table), []).append(row)
+			for record in records:
+				record.email_ids = children.get((record.name, "email_ids"), [])
+				record.phone_nos = children.get((record.name, "phone_nos"), [])
+
+		yield records
+		last_name = records[-1].name
@@ -0,0 +1,142 @@
+"""
+Normalized match keys for duplicate detection.
+
+Two records sharing a key are candidate duplicates. Keys are prefixed with their type, so one
+indexed column can hold them all.
+"""
+
+import re
+import unicodedata
+
+import phonenumbers
+
+EMAIL = "email"
+PHONE = "phone"
+NAME = "name"
+NAME_ORGANIZATION = "name_org"
+# a shared weak key alone is not enough to call two records duplicates
+STRONG_KEY_TYPES = (EMAIL, PHONE, NAME_ORGANIZATION)
+
+# legal forms dropped from organization names, so `Acme Pvt. Ltd.` matches `ACME`
+ORGANIZATION_SUFFIXES = {
+	"ag",
+	"bv",
+	"co",
+	"company",
+	"corp",
+	"corporation",
+	"gmbh",
+	"inc",
+	"incorporated",
+	"limited",
+	"llc",
+	"llp",
+	"ltd",
+	"plc",
+	"private",
+	"pte",
+	"pvt",
+	"sa",
+	"sarl",
+	"srl",
+	"the",
+}
+
+SOUNDEX_CODES = {
+	**dict.fromkeys("bfpv", "1"),
+	**dict.fromkeys("cgjkqsxz", "2"),
+	**dict.fromkeys("dt", "3"),
+	"l": "4",
+	**dict.fromkeys("mn", "5"),
+	"r": "6",
+}
+
+
+def get_match_keys(
+	emails=(), phones=(), first_name=None, last_name=None, organization=None, default_region="IN"
+) -> set[str]:
+	keys = {email_key(email) for email in emails} | {phone_key(phone, default_region) for phone in phones}
+	keys.discard(None)
+
+	name = get_name_key(first_name, last_name)
+	if name:
+		keys.add(f"{NAME}:{name}")
+		if organization := normalize_organization(organization):
+			keys.add(f"{NAME_ORGANIZATION}:{name}|{organization}")
+	return keys
+
+
+def email_key(email: str | None) -> str | None:
+	email = normalize_email(email)
+	return f"{EMAIL}:{email}" if email else None
+
+
+def phone_key(phone: str | None, default_region="IN") -> str | None:
+	phone = normalize_phone(phone, default_region)
+	return f"{PHONE}:{phone}" if phone else None
+
+
+def get_key_type(key: str) -> str:
+	return key.split(":", 1)[0]
+
+
+def normalize_email(email: str | None) -> str | None:
+	email = (email or "").strip().lower()
+	return email if "@" in email else None
+
+
+def normalize_phone(phone: str | None, default_region="IN") -> str | None:
+	"""E.164 form of `phone`, so `+91 98765 43210` and `098765 43210` match"""
+	if not phone or not phone.strip():
+		return None
+	try:
+		parsed = phonenumbers.parse(phone, default_region)
+		if phonenumbers.is_possible_number(parsed):
+			return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+	except phonenumbers.NumberParseException:
+		pass
+
+	digits = re.sub(r"\D", "", phone)
+	return digits if len(digits) >= 6 else None
+
+
+def normalize_organization(organization: str | None) -> str | None:
+	words = [word for word in fold(organization).split() if word not in ORGANIZATION_SUFFIXES]
+	return "".join(words) or None
+
+
+def get_name_key(first_name: str | None, last_name: str | None) -> str | None:
+	"""Soundex of the first and last name, `Jon Smyth` and `John Smith` share it"""
+	words = fold(f"{first_name or ''} {last_name or ''}").split()
+	if not words:
+		return None
+	codes = [soundex(words[0])]
+	if len(words) > 1:
+		codes.append(soundex(words[-1]))
+	return " ".join(codes)
+
+
+def fold(text: str | None) -> str:
+	"""Lowercase `text` without accents, punctuation or repeated spaces"""
+	text = unicodedata.normalize("NFKD", text or "")
+	text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+	# `S.A.` and `O'Brien` are one word, other punctuation separates words
+	text = re.sub(r"[.'’]", "", text)
+	return " ".join(re.sub(r"[^\w\s]|_", " ", text).split())
+
+
+def soundex(word: str) -> str:
+	letters = [c for c in word if "a" <= c <= "z"]
+	if not letters:
+		return word[:4]
+
+	code = letters[0].upper()
+	previous = SOUNDEX_CODES.get(letters[0])
+	for letter in letters[1:]:
+		digit = SOUNDEX_CODES.get(letter)
+		if digit and digit != previous:
+			code += digit
+		# h and w don't separate letters with the same code, vowels do
+		if letter not in "hw":
+			previous = digit
+	return (code + "000")[:4]
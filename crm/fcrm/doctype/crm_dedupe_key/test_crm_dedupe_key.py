@@ -0,0 +1,152 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key import (
+	cluster_duplicates,
+	find_duplicates,
+	get_contacts_by_key,
+	get_record_keys,
+)
+from crm.fcrm.doctype.crm_dedupe_key.match_keys import (
+	email_key,
+	get_match_keys,
+	get_name_key,
+	normalize_organization,
+	normalize_phone,
+	phone_key,
+	soundex,
+)
+
+
+class TestCRMDedupeKey(UnitTestCase):
+	def test_phone(self):
+		self.assertEqual(normalize_phone("+91 98765 43210"), "+919876543210")
+		self.assertEqual(normalize_phone("098765-43210"), "+919876543210")
+		self.assertEqual(normalize_phone("(415) 555-0132", "US"), "+14155550132")
+		self.assertIsNone(normalize_phone("  "))
+
+	def test_organization(self):
+		self.assertEqual(normalize_organization("Acme Pvt. Ltd."), "acme")
+		self.assertEqual(normalize_organization("ACME"), "acme")
+		self.assertEqual(normalize_organization("Société Générale S.A."), "societegenerale")
+		self.assertIsNone(normalize_organization("Ltd."))
+
+	def test_name(self):
+		self.assertEqual(soundex("robert"), "R163")
+		self.assertEqual(soundex("ashcraft"), "A261")
+		self.assertEqual(soundex("tymczak"), "T522")
+		self.assertEqual(get_name_key("Jon", "Smyth"), get_name_key("John", "Smith"))
+		self.assertNotEqual(get_name_key("John", "Smith"), get_name_key("John", "Miller"))
+
+	def test_match_keys(self):
+		keys = get_match_keys(
+			emails=[" John@Example.com ", None],
+			phones=["+91 98765 43210", "098765 43210"],
+			first_name="John",
+			last_name="Smith",
+			organization="Acme Inc",
+		)
+		self.assertEqual(
+			keys,
+			{
+				"email:john@example.com",
+				"phone:+919876543210",
+				"name:J500 S530",
+				"name_org:J500 S530|acme",
+			},
+		)
+
+
+class IntegrationTestCRMDedupeKey(IntegrationTestCase):
+	def test_find_duplicates(self):
+		email = make_email()
+		contact = make_contact("John", "Smith", email=email)
+		lead = make_lead("Jon", "Smyth", email=email.upper())
+		namesake = make_lead("John", "Smith")
+
+		duplicates = find_duplicates(get_record_keys(lead), exclude=("CRM Lead", lead.name))
+		matches = {(d.doctype, d.name): d.matches for d in duplicates}
+
+		self.assertEqual(matches.get(("Contact", contact.name)), ["email", "name"])
+		# a shared name alone does not make a duplicate
+		self.assertNotIn(("CRM Lead", namesake.name), matches)
+		self.assertNotIn(("CRM Lead", lead.name), matches)
+
+	def test_get_contacts_by_key(self):
+		phone = make_phone()
+		contact = make_contact("Jane", "Doe", phone=f"0{phone}")
+
+		key = phone_key(f"+91 {phone}")
+		missing = email_key(make_email())
+		self.assertEqual(get_contacts_by_key([key, missing, None]), {key: contact.name})
+
+	def test_cluster_duplicates(self):
+		email, phone = make_email(), make_phone()
+		contact = make_contact("Alice", "Brown", email=email)
+		lead = make_lead("Alice", "Brown", email=email, mobile_no=phone)
+		other_contact = make_contact("Al", "Browne", phone=phone)
+		unrelated = make_contact("Bob", "Green", email=make_email())
+
+		cluster_duplicates()
+
+		clusters = {
+			record: get_cluster(*record)
+			for record in (
+				("Contact", contact.name),
+				("CRM Lead", lead.name),
+				("Contact", other_contact.name),
+				("Contact", unrelated.name),
+			)
+		}
+		self.assertTrue(clusters["Contact", contact.name])
+		# the lead links both contacts into one cluster, through its email and its phone
+		self.assertEqual(clusters["Contact", contact.name], clusters["CRM Lead", lead.name])
+		self.assertEqual(clusters["Contact", contact.name], clusters["Contact", other_contact.name])
+		self.assertIsNone(clusters["Contact", unrelated.name])
+
+
+def make_email():
+	return f"dedupe.{frappe.generate_hash(length=10)}@example.com"
+
+
+def make_phone():
+	return f"98{frappe.generate_hash(length=8)}".translate(str.maketrans("abcdef", "123456"))
+
+
+def make_contact(first_name, last_name, email=None, phone=None):
+	contact = frappe.new_doc("Contact")
+	contact.first_name = first_name
+	contact.last_name = last_name
+	if email:
+		contact.append("email_ids", {"email_id": email, "is_primary": 1})
+	if phone:
+		contact.append("phone_nos", {"phone": phone, "is_primary_mobile_no": 1})
+	return contact.insert(ignore_permissions=True)
+
+
+def make_lead(first_name, last_name, email=None, mobile_no=None):
+	status = frappe.get_all("CRM Lead Status", pluck="name", order_by="position asc", limit=1)[0]
+	lead = frappe.new_doc("CRM Lead")
+	lead.update(
+		{
+			"first_name": first_name,
+			"last_name": last_name,
+			"email": email,
+			"mobile_no": mobile_no,
+			"status": status,
+		}
+	)
+	return lead.insert(ignore_permissions=True)
+
+
+def get_cluster(doctype, name):
+	clusters = frappe.get_all(
+		"CRM Dedupe Key",
+		filters={"reference_doctype": doctype, "reference_name": name, "cluster": ("is", "set")},
+		pluck="cluster",
+		distinct=True,
+	)
+	return clusters[0] if clusters else None
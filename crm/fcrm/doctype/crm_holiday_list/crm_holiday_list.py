@@ -1,9 +1,23 @@
 # Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from crm.fcrm.doctype.crm_service_level_agreement.crm_service_level_agreement import (
+	clear_calendar_cache,
+)
+
 
 class CRMHolidayList(Document):
-	pass
+	def on_update(self):
+		self.clear_sla_calendars()
+
+	def on_trash(self):
+		self.clear_sla_calendars()
+
+	def clear_sla_calendars(self):
+		for sla in frappe.get_all(
+			"CRM Service Level Agreement", filters={"holiday_list": self.name}, pluck="name"
+		):
+			clear_calendar_cache(sla)
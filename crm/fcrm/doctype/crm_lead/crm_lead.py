@@ -7,6 +7,14 @@ from frappe.desk.form.assign_to import add as assign
 from frappe.model.document import Document
 from frappe.utils import has_gravatar, validate_email_address
 
+from crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key import get_contacts_by_key, remove_keys
+from crm.fcrm.doctype.crm_dedupe_key.match_keys import email_key, phone_key
+from crm.fcrm.doctype.crm_lead_assignment_rule.crm_lead_assignment_rule import (
+	adjust_agent_load,
+	get_agent_for_lead,
+	is_open_lead,
+	update_agent_load,
+)
 from crm.fcrm.doctype.crm_service_level_agreement.utils import get_sla
 from crm.fcrm.doctype.crm_status_change_log.crm_status_change_log import (
 	add_status_change_log,
@@ -28,10 +36,21 @@ class CRMLead(Document):
 		if self.has_value_changed("status"):
 			add_status_change_log(self)
 
+	def before_insert(self):
+		if not self.lead_owner:
+			self.lead_owner = get_agent_for_lead(self)
+
 	def after_insert(self):
 		if self.lead_owner:
 			self.assign_agent(self.lead_owner)
 
+	def on_update(self):
+		update_agent_load(self)
+
+	def on_trash(self):
+		if is_open_lead(self):
+			adjust_agent_load(self.lead_owner, -1)
+
 	def before_save(self):
 		self.apply_sla()
 
@@ -191,24 +210,25 @@ class CRMLead(Document):
 		)
 
 	def contact_exists(self, throw=True):
-		email_exist = frappe.db.exists("Contact Email", {"email_id": self.email})
-		phone_exist = frappe.db.exists("Contact Phone", {"phone": self.phone})
-		mobile_exist = frappe.db.exists("Contact Phone", {"phone": self.mobile_no})
-
-		doctype = "Contact Email" if email_exist else "Contact Phone"
-		name = email_exist or phone_exist or mobile_exist
-
-		if name:
-			text = "Email" if email_exist else "Phone" if phone_exist else "Mobile No"
-			data = self.email if email_exist else self.phone if phone_exist else self.mobile_no
-
-			value = "{0}: {1}".format(text, data)
-
-			contact = frappe.db.get_value(doctype, name, "parent")
+		checks = [
+			(_("Email"), self.email, "Contact Email", "email_id", email_key(self.email)),
+			(_("Phone"), self.phone, "Contact Phone", "phone", phone_key(self.phone)),
+			(_("Mobile No"), self.mobile_no, "Contact Phone", "phone", phone_key(self.mobile_no)),
+		]
+		# the exact value finds contacts that have no match keys, saved without document hooks
+		# or before the keys were built, the normalized key finds "+91 98765 43210" saved as
+		# "098765 43210"
+		contacts_by_key = get_contacts_by_key([key for *_check, key in checks])
 
+		for label, value, doctype, fieldname, key in checks:
+			if not value:
+				continue
+			contact = frappe.db.get_value(doctype, {fieldname: value}, "parent") or contacts_by_key.get(key)
+			if not contact:
+				continue
 			if throw:
 				frappe.throw(
-					_("Contact already exists with {0}").format(value),
+					_("Contact already exists with {0}").format(f"{label}: {value}"),
 					title=_("Contact Already Exists"),
 				)
 			return contact
@@ -314,9 +334,8 @@ class CRMLead(Document):
 		"""
 		if not self.sla:
 			return
-		sla = frappe.get_last_doc("CRM Service Level Agreement", {"name": self.sla})
-		if sla:
-			sla.apply(self)
+		sla = frappe.get_cached_doc("CRM Service Level Agreement", self.sla)
+		sla.apply(self)
 
 	def convert_to_deal(self, deal=None):
 		return convert_to_deal(lead=self.name, doc=self, deal=deal)
@@ -400,6 +419,10 @@ class CRMLead(Document):
 		}
 
 
+def on_doctype_update():
+	frappe.db.add_index("CRM Lead", ["sla_status", "response_by"])
+
+
 @frappe.whitelist()
 def convert_to_deal(lead, doc=None, deal=None, existing_contact=None, existing_organization=None):
 	if not (doc and doc.flags.get("ignore_permissions")) and not frappe.has_permission(
@@ -408,9 +431,14 @@ def convert_to_deal(lead, doc=None, deal=None, existing_contact=None, existing_o
 		frappe.throw(_("Not allowed to convert Lead to Deal"), frappe.PermissionError)
 
 	lead = frappe.get_cached_doc("CRM Lead", lead)
+	was_open = is_open_lead(lead)
 	if frappe.db.exists("CRM Lead Status", "Qualified"):
 		lead.db_set("status", "Qualified")
 	lead.db_set("converted", 1)
+	if was_open:
+		adjust_agent_load(lead.lead_owner, -1)
+	# the contact created below stands for the lead in duplicate detection
+	remove_keys(lead)
 	if lead.sla and frappe.db.exists("CRM Communication Status", "Replied"):
 		lead.db_set("communication_status", "Replied")
 	contact = lead.create_contact(existing_contact, False)
@@ -1,9 +1,56 @@
 # Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
 # See license.txt
 
-# import frappe
-from frappe.tests import UnitTestCase
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
 
 
 class TestCRMLead(UnitTestCase):
 	pass
+
+
+class IntegrationTestCRMLead(IntegrationTestCase):
+	def test_contact_exists_without_match_keys(self):
+		email = f"lead.{frappe.generate_hash(length=10)}@example.com"
+		contact = frappe.new_doc("Contact")
+		contact.first_name = "Keyless"
+		contact.append("email_ids", {"email_id": email, "is_primary": 1})
+		contact.insert(ignore_permissions=True)
+		# as if the contact was written without document hooks
+		frappe.db.delete("CRM Dedupe Key", {"reference_doctype": "Contact", "reference_name": contact.name})
+
+		lead = make_lead(email)
+		self.assertEqual(lead.contact_exists(throw=False), contact.name)
+
+		contacts = frappe.db.count("Contact")
+		lead.flags.ignore_permissions = True
+		deal = frappe.get_doc("CRM Deal", lead.convert_to_deal())
+		self.assertEqual(frappe.db.count("Contact"), contacts)
+		self.assertEqual(deal.contacts[0].contact, contact.name)
+
+	def test_contact_exists_by_normalized_phone(self):
+		phone = f"98{frappe.generate_hash(length=8)}".translate(str.maketrans("abcdef", "123456"))
+		contact = frappe.new_doc("Contact")
+		contact.first_name = "Normalized"
+		contact.append("phone_nos", {"phone": f"0{phone}", "is_primary_mobile_no": 1})
+		contact.insert(ignore_permissions=True)
+
+		lead = make_lead(mobile_no=f"+91 {phone}")
+		self.assertEqual(lead.contact_exists(throw=False), contact.name)
+		self.assertRaises(frappe.ValidationError, lead.contact_exists)
+
+
+def make_lead(email=None, mobile_no=None):
+	status = frappe.get_all("CRM Lead Status", pluck="name", order_by="position asc", limit=1)[0]
+	lead = frappe.new_doc("CRM Lead")
+	lead.update(
+		{
+			"first_name": "Convert",
+			"last_name": frappe.generate_hash(length=6),
+			"email": email,
+			"mobile_no": mobile_no,
+			"status": status,
+			"lead_owner": frappe.session.user,
+		}
+	)
+	return lead.insert(ignore_permissions=True)
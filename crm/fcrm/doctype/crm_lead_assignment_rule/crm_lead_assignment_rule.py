@@ -0,0 +1,245 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+from functools import reduce
+from math import gcd
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+RULES_CACHE_KEY = "crm:lead_assignment_rules"
+COUNTER_KEY = "crm:lead_assignment_counter:{0}"
+LOAD_KEY = "crm:lead_assignment_load:{0}"
+CLOSED_STATUSES_CACHE_KEY = "crm:closed_lead_statuses"
+
+# adds to an agent's load only if the rule's load set has been built, a missing set is
+# rebuilt from the database the next time it is read
+ADJUST_LOAD_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 1 and redis.call('zscore', KEYS[1], ARGV[2]) then
+	return redis.call('zincrby', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+
+class CRMLeadAssignmentRule(Document):
+	def validate(self):
+		self.validate_territory()
+		self.validate_agents()
+
+	def on_update(self):
+		clear_assignment_cache(self.name)
+
+	def on_trash(self):
+		clear_assignment_cache(self.name)
+
+	def validate_territory(self):
+		"""One enabled rule per territory, and one for leads without a territory"""
+		if not self.enabled:
+			return
+		other = frappe.db.get_value(
+			"CRM Lead Assignment Rule",
+			{
+				"enabled": 1,
+				"name": ("!=", self.name),
+				"territory": self.territory or ("is", "not set"),
+			},
+		)
+		if not other:
+			return
+		if self.territory:
+			frappe.throw(_("Rule {0} already assigns leads of {1}").format(other, self.territory))
+		frappe.throw(_("Rule {0} already assigns leads without a territory").format(other))
+
+	def validate_agents(self):
+		seen = set()
+		for row in self.agents:
+			if row.agent in seen:
+				frappe.throw(_("Agent {0} is listed more than once").format(row.agent))
+			seen.add(row.agent)
+
+		if self.strategy == "Weighted" and not any(row.weight for row in self.agents):
+			frappe.throw(_("At least one agent needs a weight above zero"))
+
+
+def get_agent_for_lead(lead: Document) -> str | None:
+	"""
+	Pick the owner of a new lead from the assignment rule of its territory, the closest parent
+	territory with a rule, or the rule without a territory.
+	"""
+	rule = get_rule(lead.territory)
+	if not rule:
+		return None
+
+	if rule.strategy == "Least Loaded":
+		return get_least_loaded_agent(rule)
+
+	index = frappe.cache.incr(frappe.cache.make_key(COUNTER_KEY.format(rule.name))) - 1
+	return rule.sequence[index % len(rule.sequence)]
+
+
+def get_rule(territory: str | None) -> frappe._dict | None:
+	rules = get_assignment_rules()
+	visited = set()
+	while territory and territory not in visited:
+		if territory in rules.by_territory:
+			return rules.by_territory[territory]
+		visited.add(territory)
+		territory = rules.parents.get(territory)
+	return rules.by_territory.get("")
+
+
+def get_assignment_rules() -> frappe._dict:
+	"""Enabled rules by territory with the territory tree, cached until either is changed"""
+	return frappe.cache.get_value(RULES_CACHE_KEY, load_assignment_rules)
+
+
+def load_assignment_rules() -> frappe._dict:
+	rules = frappe.get_all(
+		"CRM Lead Assignment Rule",
+		filters={"enabled": 1},
+		fields=["name", "territory", "strategy"],
+	)
+	agents = frappe.get_all(
+		"CRM Lead Assignment Agent",
+		filters={
+			"parenttype": "CRM Lead Assignment Rule",
+			"parent": ("in", [rule.name for rule in rules] or [""]),
+		},
+		fields=["parent", "agent", "weight"],
+		order_by="idx asc",
+	)
+
+	by_territory = {}
+	for rule in rules:
+		rule.agents = [(row.agent, row.weight) for row in agents if row.parent == rule.name]
+		if not rule.agents:
+			continue
+		rule.sequence = get_sequence(rule.agents, rule.strategy == "Weighted")
+		if rule.sequence:
+			by_territory[rule.territory or ""] = rule
+
+	parents = dict(
+		frappe.get_all(
+			"CRM Territory",
+			filters={"parent_crm_territory": ("is", "set")},
+			fields=["name", "parent_crm_territory"],
+			as_list=True,
+		)
+	)
+	return frappe._dict(by_territory=by_territory, parents=parents)
+
+
+def get_sequence(agents: list[tuple[str, int]], weighted: bool) -> list[str]:
+	"""
+	One cycle of agent picks. Weighted cycles use smooth weighted round robin, so an agent with
+	weight 3 next to one with weight 1 gets `a a b a` rather than `a a a b`.
+	"""
+	if not weighted:
+		return [agent for agent, _weight in agents]
+
+	agents = [(agent, weight) for agent, weight in agents if weight and weight > 0]
+	if not agents:
+		return []
+	divisor = reduce(gcd, [weight for _agent, weight in agents])
+	weights = [weight // divisor for _agent, weight in agents]
+	total = sum(weights)
+
+	current = [0] * len(agents)
+	sequence = []
+	for _i in range(total):
+		for i, weight in enumerate(weights):
+			current[i] += weight
+		best = max(range(len(agents)), key=lambda i: current[i])
+		current[best] -= total
+		sequence.append(agents[best][0])
+	return sequence
+
+
+def get_least_loaded_agent(rule: frappe._dict) -> str:
+	"""
+	Agent of `rule` with the fewest open leads. Loads live in a sorted set per rule, built from
+	one grouped count the first time it is needed and kept current by the lead's own hooks.
+	"""
+	key = frappe.cache.make_key(LOAD_KEY.format(rule.name))
+	if not frappe.cache.zcard(key):
+		build_load(rule, key)
+
+	agent = frappe.cache.zrange(key, 0, 0)
+	return frappe.safe_decode(agent[0]) if agent else rule.sequence[0]
+
+
+def build_load(rule: frappe._dict, key: str):
+	agents = [agent for agent, _weight in rule.agents]
+	counts = dict(
+		frappe.get_all(
+			"CRM Lead",
+			filters={
+				"lead_owner": ("in", agents),
+				"converted": 0,
+				"status": ("not in", get_closed_lead_statuses() or [""]),
+			},
+			fields=["lead_owner", "count(name) as count"],
+			group_by="lead_owner",
+			as_list=True,
+		)
+	)
+	frappe.cache.zadd(key, {agent: counts.get(agent, 0) for agent in agents})
+
+
+def is_open_lead(lead) -> bool:
+	return bool(lead) and not lead.get("converted") and lead.get("status") not in get_closed_lead_statuses()
+
+
+def get_closed_lead_statuses() -> list[str]:
+	"""Lead statuses marked closed, cached until one of them is changed"""
+	return frappe.cache.get_value(
+		CLOSED_STATUSES_CACHE_KEY,
+		lambda: frappe.get_all("CRM Lead Status", filters={"is_closed": 1}, pluck="name"),
+	)
+
+
+def clear_closed_lead_statuses():
+	"""Forget the closed statuses and the agent loads counted with them"""
+	frappe.cache.delete_value(CLOSED_STATUSES_CACHE_KEY)
+	clear_agent_load()
+
+
+def adjust_agent_load(agent: str | None, delta: int):
+	"""Move `agent`'s open lead count by `delta` in every rule it belongs to"""
+	if not agent or not delta:
+		return
+	for rule in get_assignment_rules().by_territory.values():
+		if rule.strategy != "Least Loaded" or agent not in rule.sequence:
+			continue
+		frappe.cache.eval(
+			ADJUST_LOAD_SCRIPT, 1, frappe.cache.make_key(LOAD_KEY.format(rule.name)), delta, agent
+		)
+
+
+def update_agent_load(lead: Document):
+	"""Keep agent loads in step with a saved lead's owner and open state"""
+	before = lead.get_doc_before_save()
+	was_counted = is_open_lead(before) and before.lead_owner
+	is_counted = is_open_lead(lead) and lead.lead_owner
+	if was_counted and is_counted and before.lead_owner == lead.lead_owner:
+		return
+	if was_counted:
+		adjust_agent_load(before.lead_owner, -1)
+	if is_counted:
+		adjust_agent_load(lead.lead_owner, 1)
+
+
+def clear_agent_load():
+	"""
+	Drop every load set so the next pick recounts it, heals drift from rolled back inserts and
+	from writes that skip document hooks
+	"""
+	for rule in frappe.get_all("CRM Lead Assignment Rule", pluck="name"):
+		frappe.cache.delete(frappe.cache.make_key(LOAD_KEY.format(rule)))
+
+
+def clear_assignment_cache(rule_name=None):
+	frappe.cache.delete_value(RULES_CACHE_KEY)
+	if rule_name:
+		frappe.cache.delete(frappe.cache.make_key(LOAD_KEY.format(rule_name)))
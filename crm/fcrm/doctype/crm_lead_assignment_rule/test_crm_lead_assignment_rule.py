@@ -0,0 +1,50 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from crm.fcrm.doctype.crm_lead_assignment_rule.crm_lead_assignment_rule import get_sequence
+
+
+class TestCRMLeadAssignmentRule(UnitTestCase):
+	def test_weighted_sequence(self):
+		self.assertEqual(get_sequence([("a", 3), ("b", 1)], weighted=True), ["a", "a", "b", "a"])
+		self.assertEqual(get_sequence([("a", 2), ("b", 0)], weighted=True), ["a"])
+		self.assertEqual(get_sequence([("a", 0), ("b", 5)], weighted=False), ["a", "b"])
+
+
+class IntegrationTestCRMLeadAssignmentRule(IntegrationTestCase):
+	def setUp(self):
+		frappe.db.set_value("CRM Lead Assignment Rule", {"enabled": 1}, "enabled", 0)
+
+	def test_one_enabled_rule_per_territory(self):
+		territory = frappe.get_doc(
+			{"doctype": "CRM Territory", "territory_name": f"Rule Test {frappe.generate_hash(length=6)}"}
+		).insert(ignore_permissions=True)
+
+		make_rule(territory.name)
+		self.assertRaises(frappe.ValidationError, make_rule, territory.name)
+		# a disabled rule does not compete, and other territories are unaffected
+		make_rule(territory.name, enabled=0)
+		make_rule(None)
+
+	def test_one_enabled_rule_without_territory(self):
+		make_rule(None)
+		self.assertRaises(frappe.ValidationError, make_rule, None)
+		disabled = make_rule(None, enabled=0)
+
+		disabled.enabled = 1
+		self.assertRaises(frappe.ValidationError, disabled.save)
+
+
+def make_rule(territory, enabled=1):
+	return frappe.get_doc(
+		{
+			"doctype": "CRM Lead Assignment Rule",
+			"rule_name": f"Rule Test {frappe.generate_hash(length=8)}",
+			"enabled": enabled,
+			"territory": territory,
+			"agents": [{"agent": "Administrator", "weight": 1}],
+		}
+	).insert(ignore_permissions=True)
@@ -4,6 +4,18 @@
 # import frappe
 from frappe.model.document import Document
 
+from crm.fcrm.doctype.crm_lead_assignment_rule.crm_lead_assignment_rule import (
+	clear_closed_lead_statuses,
+)
+
 
 class CRMLeadStatus(Document):
-	pass
+	def on_update(self):
+		if self.has_value_changed("is_closed"):
+			clear_closed_lead_statuses()
+
+	def on_trash(self):
+		clear_closed_lead_statuses()
+
+	def after_rename(self, old, new, merge=False):
+		clear_closed_lead_statuses()
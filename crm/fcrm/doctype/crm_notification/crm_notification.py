@@ -1,24 +1,106 @@
 # Copyright (c) 2024, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
+import hashlib
+import json
+from collections import defaultdict
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+from crm.api.notifications import adjust_unread_count, get_unread_count_key
+
+NOTIFICATION_BUFFER = "crm:notification_buffer"
+DIGEST_USERS = "crm:notification_digest_users"
+DIGEST_KEY = "crm:notification_digest:{0}"
+FLUSH_BATCH_SIZE = 1000
+# buffered notifications of one kind for one user are collapsed from this many on
+COALESCE_THRESHOLD = 3
+
+DEDUPE_FIELDS = (
+	"from_user",
+	"to_user",
+	"type",
+	"message",
+	"notification_text",
+	"notification_type_doctype",
+	"notification_type_doc",
+	"reference_doctype",
+	"reference_name",
+)
 
 
 class CRMNotification(Document):
+	def before_insert(self):
+		self.dedupe_key = self.dedupe_key or get_dedupe_key(self)
+
+	def after_insert(self):
+		if not self.read:
+			adjust_unread_count(self.to_user, 1)
+
 	def on_update(self):
-		if self.to_user:
-			frappe.publish_realtime("crm_notification", user= self.to_user)
+		if not self.flags.in_insert and self.has_value_changed("read"):
+			adjust_unread_count(self.to_user, -1 if self.read else 1)
+		if self.to_user and not self.flags.skip_realtime:
+			frappe.publish_realtime("crm_notification", user=self.to_user)
+
+	def on_trash(self):
+		if not self.read:
+			adjust_unread_count(self.to_user, -1)
+
+
+def on_doctype_update():
+	frappe.db.add_index("CRM Notification", ["to_user", "creation"])
+
 
 def notify_user(args):
 	"""
 	Notify the assigned user
 	"""
-	args = frappe._dict(args)
-	if args.owner == args.assigned_to:
+	values = get_notification_values(frappe._dict(args))
+	if not values:
+		return
+
+	if get_delivered_keys([values.dedupe_key]):
+		return
+
+	if frappe.get_cached_doc("FCRM Settings").coalesce_notifications:
+		buffer_notification(values)
+		return
+
+	insert_notification(values)
+
+
+def notify_users(notifications):
+	"""
+	Notify several users at once, takes a list of `notify_user` arguments. Existing
+	notifications are looked up with one query and the new ones written with one INSERT.
+	"""
+	pending = {}
+	for args in notifications:
+		values = get_notification_values(frappe._dict(args))
+		if values:
+			pending.setdefault(values.dedupe_key, values)
+	if not pending:
 		return
 
+	for key in get_delivered_keys(list(pending)):
+		pending.pop(key, None)
+
+	if frappe.get_cached_doc("FCRM Settings").coalesce_notifications:
+		for values in pending.values():
+			buffer_notification(values)
+		return
+
+	bulk_insert_notifications(list(pending.values()))
+
+
+def get_notification_values(args):
+	if args.owner == args.assigned_to:
+		return None
+
 	values = frappe._dict(
 		doctype="CRM Notification",
 		from_user=args.owner,
@@ -31,7 +113,202 @@ def notify_user(args):
 		reference_doctype=args.redirect_to_doctype,
 		reference_name=args.redirect_to_docname,
 	)
+	# a summary of a one-off job passes its own key, its text alone may repeat
+	values.dedupe_key = args.dedupe_key or get_dedupe_key(values)
+	return values
+
+
+def buffer_notification(values):
+	payload = json.dumps(values, default=str)
+	frappe.db.after_commit.add(lambda: frappe.cache.rpush(NOTIFICATION_BUFFER, payload))
+
+
+def bulk_insert_notifications(notifications):
+	"""
+	Write `notifications` without running document hooks. Rows whose `dedupe_key` was inserted
+	concurrently are skipped, so the recipients' unread counts are recounted instead of adjusted.
+	"""
+	if not notifications:
+		return
+
+	now = now_datetime()
+	frappe.db.bulk_insert(
+		"CRM Notification",
+		["name", "creation", "modified", "owner", "modified_by", *DEDUPE_FIELDS, "dedupe_key"],
+		[
+			(
+				frappe.generate_hash(length=10),
+				now,
+				now,
+				frappe.session.user,
+				frappe.session.user,
+				*(values.get(field) for field in DEDUPE_FIELDS),
+				values.dedupe_key,
+			)
+			for values in notifications
+		],
+		ignore_duplicates=True,
+	)
+
+	for user in {values.to_user for values in notifications}:
+		frappe.db.after_commit.add(lambda user=user: frappe.cache.delete(get_unread_count_key(user)))
+		frappe.publish_realtime("crm_notification", user=user, after_commit=True)
+
+
+def insert_notification(values, publish=True):
+	"""Insert a CRM Notification, returns False if the same one already exists"""
+	frappe.db.savepoint("notify_user")
+	try:
+		doc = frappe.get_doc(values)
+		doc.flags.skip_realtime = not publish
+		doc.insert(ignore_permissions=True)
+	except frappe.UniqueValidationError:
+		# inserted by a concurrent request since the check above
+		frappe.db.rollback(save_point="notify_user")
+		frappe.clear_last_message()
+		return False
+	return True
+
+
+def flush_notification_buffer():
+	"""Deliver buffered notifications, grouping bursts per recipient and type."""
+	while True:
+		entries = frappe.cache.lrange(NOTIFICATION_BUFFER, 0, FLUSH_BATCH_SIZE - 1)
+		if not entries:
+			return
+
+		deliver([frappe._dict(json.loads(frappe.safe_decode(entry))) for entry in entries])
+		frappe.db.commit()
+		frappe.cache.ltrim(NOTIFICATION_BUFFER, len(entries), -1)
+
+		if len(entries) < FLUSH_BATCH_SIZE:
+			return
+
+
+def deliver(notifications):
+	delivered_keys = get_delivered_keys(list({n.dedupe_key for n in notifications}))
+	groups = defaultdict(list)
+	for notification in notifications:
+		# already delivered, or buffered twice before this flush
+		if notification.dedupe_key in delivered_keys:
+			continue
+		delivered_keys.add(notification.dedupe_key)
+		groups[(notification.to_user, notification.type)].append(notification)
+
+	digest = frappe.get_cached_doc("FCRM Settings").notification_digest
+	recipients = set()
+	for (user, notification_type), group in groups.items():
+		if len(group) < COALESCE_THRESHOLD:
+			delivered = [values for values in group if insert_notification(values, publish=False)]
+		else:
+			grouped = get_grouped_notification(user, notification_type, group)
+			delivered = [grouped] if insert_notification(grouped, publish=False) else []
+
+		if delivered:
+			recipients.add(user)
+			if digest:
+				add_to_digest(user, delivered)
+
+	for user in recipients:
+		frappe.publish_realtime("crm_notification", user=user, after_commit=True)
+
+
+def get_grouped_notification(user, notification_type, group):
+	"""One notification standing for `group`, pointing at its latest record"""
+	latest = group[-1]
+	references = {(n.reference_doctype, n.reference_name) for n in group}
+	senders = {n.from_user for n in group}
+	return frappe._dict(
+		doctype="CRM Notification",
+		from_user=latest.from_user if len(senders) == 1 else None,
+		to_user=user,
+		type=notification_type,
+		message="".join(n.notification_text or n.message or "" for n in group),
+		notification_text=get_grouped_text(notification_type, len(group), references),
+		notification_type_doctype=latest.notification_type_doctype,
+		notification_type_doc=latest.notification_type_doc,
+		reference_doctype=latest.reference_doctype,
+		reference_name=latest.reference_name,
+		# a replay of any one of them is a duplicate of this notification
+		grouped_keys=[{"dedupe_key": n.dedupe_key} for n in group],
+	)
+
+
+def get_grouped_text(notification_type, count, references):
+	doctypes = {doctype for doctype, name in references}
+	if doctypes == {"CRM Lead"}:
+		records = _("leads")
+	elif doctypes == {"CRM Deal"}:
+		records = _("deals")
+	else:
+		records = _("records")
+
+	texts = {
+		"WhatsApp": _("{0} new WhatsApp messages on {1} {2}"),
+		"Mention": _("{0} new mentions on {1} {2}"),
+		"Assignment": _("{0} assignment updates on {1} {2}"),
+	}
+	text = texts.get(notification_type, _("{0} new notifications on {1} {2}"))
+	count = f'<span class="font-medium text-ink-gray-9">{count}</span>'
+	return f"""
+		<div class="mb-2 leading-5 text-ink-gray-5">
+			<span>{text.format(count, len(references), records)}</span>
+		</div>
+	"""
+
+
+def add_to_digest(user, notifications):
+	for notification in notifications:
+		frappe.cache.rpush(
+			DIGEST_KEY.format(user),
+			json.dumps(
+				{
+					"notification_text": notification.notification_text,
+					"reference_doctype": notification.reference_doctype,
+					"reference_name": notification.reference_name,
+				}
+			),
+		)
+	frappe.cache.sadd(DIGEST_USERS, user)
+
 
-	if frappe.db.exists("CRM Notification", values):
+def send_notification_digests():
+	"""Email every user a summary of the notifications delivered to them since the last digest."""
+	if not frappe.db.get_single_value("FCRM Settings", "notification_digest"):
 		return
-	frappe.get_doc(values).insert(ignore_permissions=True)
+
+	for user in frappe.cache.smembers(DIGEST_USERS):
+		user = frappe.safe_decode(user)
+		frappe.cache.srem(DIGEST_USERS, user)
+		key = DIGEST_KEY.format(user)
+		entries = [json.loads(frappe.safe_decode(e)) for e in frappe.cache.lrange(key, 0, -1)]
+		frappe.cache.delete_value(key)
+		if not entries:
+			continue
+
+		items = "".join(
+			f"<li>{entry['notification_text']}</li>" for entry in entries if entry.get("notification_text")
+		)
+		frappe.sendmail(
+			recipients=[user],
+			subject=_("You have {0} new CRM notifications").format(len(entries)),
+			message=f"<ul>{items}</ul>",
+		)
+
+
+def get_delivered_keys(keys):
+	"""The `keys` of notifications delivered on their own or collapsed into a group"""
+	if not keys:
+		return set()
+
+	filters = {"dedupe_key": ("in", keys)}
+	return set(frappe.get_all("CRM Notification", filters=filters, pluck="dedupe_key")) | set(
+		frappe.get_all("CRM Notification Key", filters=filters, pluck="dedupe_key")
+	)
+
+
+def get_dedupe_key(values):
+	"""Hash of the fields that make two notifications the same"""
+	return hashlib.sha256(
+		json.dumps([values.get(field) or "" for field in DEDUPE_FIELDS], default=str).encode()
+	).hexdigest()
@@ -1,9 +1,69 @@
 # Copyright (c) 2024, Frappe Technologies Pvt. Ltd. and Contributors
 # See license.txt
 
-# import frappe
-from frappe.tests import UnitTestCase
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from crm.fcrm.doctype.crm_notification.crm_notification import (
+	COALESCE_THRESHOLD,
+	deliver,
+	get_notification_values,
+	notify_user,
+)
 
 
 class TestCRMNotification(UnitTestCase):
 	pass
+
+
+class IntegrationTestCRMNotification(IntegrationTestCase):
+	def setUp(self):
+		# notify without buffering, the test reads the notifications right away
+		frappe.db.set_single_value("FCRM Settings", {"coalesce_notifications": 0, "notification_digest": 0})
+		frappe.clear_document_cache("FCRM Settings", "FCRM Settings")
+		self.addCleanup(frappe.clear_document_cache, "FCRM Settings", "FCRM Settings")
+
+	def test_replay_of_grouped_notification_is_a_duplicate(self):
+		user = make_user()
+		events = [make_event(user, f"Mention {i}") for i in range(COALESCE_THRESHOLD)]
+		deliver([get_notification_values(frappe._dict(event)) for event in events])
+		self.assertEqual(frappe.db.count("CRM Notification", {"to_user": user}), 1)
+
+		# the same events delivered again, on their own and as a group
+		deliver([get_notification_values(frappe._dict(events[0]))])
+		deliver([get_notification_values(frappe._dict(event)) for event in events])
+		notify_user(events[1])
+		self.assertEqual(frappe.db.count("CRM Notification", {"to_user": user}), 1)
+
+		# a new event still goes through
+		notify_user(make_event(user, "Another mention"))
+		self.assertEqual(frappe.db.count("CRM Notification", {"to_user": user}), 2)
+
+
+def make_event(user, text):
+	return {
+		"owner": "Administrator",
+		"assigned_to": user,
+		"notification_type": "Mention",
+		"message": text,
+		"notification_text": f"<p>{text}</p>",
+		"reference_doctype": "User",
+		"reference_docname": user,
+		"redirect_to_doctype": "User",
+		"redirect_to_docname": user,
+	}
+
+
+def make_user():
+	return (
+		frappe.get_doc(
+			{
+				"doctype": "User",
+				"email": f"notify.{frappe.generate_hash(length=8)}@example.com",
+				"first_name": "Notify",
+				"send_welcome_email": 0,
+			}
+		)
+		.insert(ignore_permissions=True)
+		.name
+	)
@@ -0,0 +1,171 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime, strip_html
+
+# title and content fields of every searchable doctype, the first set title field is used
+SEARCH_FIELDS = {
+	"CRM Lead": {
+		"title": ["lead_name", "organization"],
+		"content": ["organization", "email", "mobile_no", "phone", "website", "job_title"],
+	},
+	"CRM Deal": {
+		"title": ["organization", "lead_name"],
+		"content": ["lead_name", "first_name", "last_name", "email", "mobile_no", "phone"],
+	},
+	"Contact": {
+		"title": ["full_name"],
+		"content": ["email_id", "mobile_no", "phone", "company_name", "designation"],
+	},
+	"CRM Organization": {
+		"title": ["organization_name"],
+		"content": ["website", "industry", "territory"],
+	},
+	"FCRM Note": {
+		"title": ["title"],
+		"content": ["content"],
+		"route": ["reference_doctype", "reference_docname"],
+	},
+	"Communication": {
+		"title": ["subject"],
+		"content": ["sender", "sender_full_name"],
+		"route": ["reference_doctype", "reference_name"],
+	},
+}
+# notes and emails are searchable when they belong to one of these
+ROUTE_DOCTYPES = ("CRM Lead", "CRM Deal")
+REBUILD_CHUNK_SIZE = 2000
+
+
+class CRMSearchEntry(Document):
+	pass
+
+
+def on_doctype_update():
+	if frappe.db.db_type != "mariadb":
+		return
+	frappe.db.add_index("CRM Search Entry", ["reference_doctype", "reference_name"])
+	for index, columns in (("title_fulltext", "title"), ("title_content_fulltext", "title, content")):
+		if not frappe.db.has_index("tabCRM Search Entry", index):
+			frappe.db.sql_ddl(f"alter table `tabCRM Search Entry` add fulltext index `{index}` ({columns})")
+
+
+def update_index(doc, method=None):
+	"""Upsert the search entry of a saved record, drop it if the record is no longer searchable"""
+	entry = get_entry(doc.doctype, doc)
+	before = doc.get_doc_before_save()
+	if entry == (get_entry(doc.doctype, before) if before else None):
+		# unchanged, or a note or email of anything but a lead or deal
+		return
+	if entry:
+		upsert_entries([entry])
+	else:
+		delete_entry(doc)
+
+
+def remove_from_index(doc, method=None):
+	if "route" in SEARCH_FIELDS[doc.doctype] and get_route(doc.doctype, doc)[0] not in ROUTE_DOCTYPES:
+		return
+	delete_entry(doc)
+
+
+def delete_entry(doc):
+	frappe.db.delete("CRM Search Entry", {"reference_doctype": doc.doctype, "reference_name": doc.name})
+
+
+def get_route(doctype, doc) -> tuple[str | None, str | None]:
+	"""Lead or deal a note or email belongs to"""
+	return tuple(doc.get(field) for field in SEARCH_FIELDS[doctype]["route"])
+
+
+def get_entry(doctype, doc) -> frappe._dict | None:
+	fields = SEARCH_FIELDS[doctype]
+	if "route" in fields:
+		route_doctype, route_name = get_route(doctype, doc)
+		if route_doctype not in ROUTE_DOCTYPES or not route_name:
+			return None
+	else:
+		route_doctype, route_name = doctype, doc.name
+
+	title = next((doc.get(field) for field in fields["title"] if doc.get(field)), doc.name)
+	content = " ".join(strip_html(str(doc.get(field))) for field in fields["content"] if doc.get(field))
+	return frappe._dict(
+		reference_doctype=doctype,
+		reference_name=doc.name,
+		route_doctype=route_doctype,
+		route_name=route_name,
+		title=strip_html(str(title))[:140],
+		content=content,
+	)
+
+
+def upsert_entries(entries):
+	now = now_datetime()
+	values = [
+		(
+			get_entry_name(entry),
+			now,
+			now,
+			frappe.session.user,
+			frappe.session.user,
+			entry.reference_doctype,
+			entry.reference_name,
+			entry.route_doctype,
+			entry.route_name,
+			entry.title,
+			entry.content,
+		)
+		for entry in entries
+	]
+	if not values:
+		return
+
+	frappe.db.sql(
+		"""
+		insert into `tabCRM Search Entry`
+			(name, creation, modified, owner, modified_by,
+			reference_doctype, reference_name, route_doctype, route_name, title, content)
+		values {}
+		on duplicate key update
+			route_doctype = values(route_doctype),
+			route_name = values(route_name),
+			title = values(title),
+			content = values(content),
+			modified = values(modified),
+			modified_by = values(modified_by)
+		""".format(", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(values))),
+		[value for row in values for value in row],
+	)
+
+
+def get_entry_name(entry):
+	return hashlib.md5(f"{entry.reference_doctype}|{entry.reference_name}".encode()).hexdigest()
+
+
+def rebuild_index(doctypes=None, chunk_size=REBUILD_CHUNK_SIZE):
+	"""Drop and rebuild the search entries of `doctypes`, a chunk of records at a time"""
+	for doctype in doctypes or SEARCH_FIELDS:
+		frappe.db.delete("CRM Search Entry", {"reference_doctype": doctype})
+		frappe.db.commit()
+
+		fields = SEARCH_FIELDS[doctype]
+		columns = list(
+			dict.fromkeys(["name", *fields["title"], *fields["content"], *fields.get("route", [])])
+		)
+		filters = {"name": (">", "")}
+		if "route" in fields:
+			filters[fields["route"][0]] = ("in", ROUTE_DOCTYPES)
+
+		while True:
+			records = frappe.get_all(
+				doctype, filters=filters, fields=columns, order_by="name asc", limit=chunk_size
+			)
+			if not records:
+				break
+			upsert_entries([entry for entry in (get_entry(doctype, r) for r in records) if entry])
+			frappe.db.commit()
+			filters["name"] = (">", records[-1].name)
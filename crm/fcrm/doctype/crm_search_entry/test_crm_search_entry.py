@@ -0,0 +1,157 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.permissions import add_user_permission
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from crm.api.search import search
+from crm.fcrm.doctype.crm_search_entry import crm_search_entry
+from crm.fcrm.doctype.crm_search_entry.crm_search_entry import get_entry_name, update_index
+
+
+class TestCRMSearchEntry(UnitTestCase):
+	pass
+
+
+class IntegrationTestCRMSearchEntry(IntegrationTestCase):
+	def test_non_crm_communication_is_not_indexed(self):
+		communication = frappe.get_doc(
+			{
+				"doctype": "Communication",
+				"name": "search-test-communication",
+				"subject": "Invoice overdue",
+				"reference_doctype": "ToDo",
+				"reference_name": "search-test-todo",
+			}
+		)
+		with (
+			patch.object(crm_search_entry, "upsert_entries") as upsert,
+			patch.object(crm_search_entry, "delete_entry") as delete,
+		):
+			update_index(communication)
+			crm_search_entry.remove_from_index(communication)
+
+		upsert.assert_not_called()
+		delete.assert_not_called()
+
+	def test_unchanged_record_is_not_rewritten(self):
+		lead = make_lead(f"srch{frappe.generate_hash(length=8)}")
+		self.assertTrue(frappe.db.exists("CRM Search Entry", get_entry_name(search_entry(lead))))
+
+		lead = frappe.get_doc("CRM Lead", lead.name)
+		lead.load_doc_before_save()
+		with patch.object(crm_search_entry, "upsert_entries") as upsert:
+			update_index(lead)
+			upsert.assert_not_called()
+
+			lead.website = "https://example.com"
+			update_index(lead)
+			upsert.assert_called_once()
+
+	def test_search(self):
+		word = f"srch{frappe.generate_hash(length=8)}"
+		lead = make_lead(word)
+		deal = make_deal(word)
+		note = make_note(lead, f"Call {word} back")
+		commit_for_fulltext(self, [lead, deal, note])
+
+		results = search(word[:-2])["results"]
+		self.assertEqual(
+			{(result.doctype, result.name) for result in results},
+			{("CRM Lead", lead.name), ("CRM Deal", deal.name), ("FCRM Note", note.name)},
+		)
+		note_result = next(result for result in results if result.doctype == "FCRM Note")
+		self.assertEqual((note_result.route_doctype, note_result.route_name), ("CRM Lead", lead.name))
+		# every word has to match
+		self.assertEqual(search(f"{word} missingword")["results"], [])
+
+	def test_unreadable_records_are_excluded(self):
+		word = f"srch{frappe.generate_hash(length=8)}"
+		visible, hidden = make_lead(word), make_lead(word)
+		records = [visible, hidden, make_note(visible, word), make_note(hidden, word)]
+		commit_for_fulltext(self, records)
+
+		user = make_user()
+		# the user may only read the visible lead, and so only its note
+		add_user_permission("CRM Lead", visible.name, user)
+		with self.set_user(user):
+			response = search(word, doctypes=["CRM Lead", "FCRM Note"], page_length=1)
+			self.assertEqual([result.route_name for result in response["results"]], [visible.name])
+			self.assertTrue(response["has_more"])
+
+			results = search(word, doctypes=["CRM Lead", "FCRM Note"])["results"]
+		self.assertEqual({result.route_name for result in results}, {visible.name})
+		self.assertEqual(len(results), 2)
+
+
+def search_entry(doc):
+	return frappe._dict(reference_doctype=doc.doctype, reference_name=doc.name)
+
+
+def commit_for_fulltext(test, docs):
+	"""InnoDB fulltext indexes only see committed rows, remove the records after the test"""
+	frappe.db.commit()
+
+	def cleanup():
+		# whatever the test created after the commit is rolled back, not committed with this
+		frappe.db.rollback()
+		for doc in reversed(docs):
+			frappe.delete_doc(doc.doctype, doc.name, force=True, ignore_permissions=True)
+		frappe.db.commit()
+
+	test.addCleanup(cleanup)
+
+
+def get_status(doctype):
+	return frappe.get_all(doctype, pluck="name", order_by="position asc", limit=1)[0]
+
+
+def make_lead(word):
+	lead = frappe.new_doc("CRM Lead")
+	lead.update(
+		{
+			"first_name": word,
+			"organization": "Search Test",
+			"status": get_status("CRM Lead Status"),
+			"lead_owner": frappe.session.user,
+		}
+	)
+	return lead.insert(ignore_permissions=True)
+
+
+def make_deal(word):
+	deal = frappe.new_doc("CRM Deal")
+	deal.update({"first_name": word, "status": get_status("CRM Deal Status")})
+	return deal.insert(ignore_permissions=True)
+
+
+def make_note(lead, content):
+	note = frappe.new_doc("FCRM Note")
+	note.update(
+		{
+			"title": "Search test",
+			"content": f"<p>{content}</p>",
+			"reference_doctype": "CRM Lead",
+			"reference_docname": lead.name,
+		}
+	)
+	return note.insert(ignore_permissions=True)
+
+
+def make_user():
+	return (
+		frappe.get_doc(
+			{
+				"doctype": "User",
+				"email": f"search.{frappe.generate_hash(length=8)}@example.com",
+				"first_name": "Search",
+				"send_welcome_email": 0,
+				"roles": [{"role": "Sales User"}],
+			}
+		)
+		.insert(ignore_permissions=True)
+		.name
+	)
@@ -0,0 +1,268 @@
+"""
+SLA benchmark suite.
+
+Times `get_sla`, `calc_time` and `calc_elapsed_time` on their own and the SLA part of the lead
+save path end to end, on generated SLAs with realistic working hours and multi-year holiday
+lists. Everything is created inside a transaction that is rolled back. Benchmark leads are owned
+by the session user, so no assignment rule or notification is involved, and the Redis counters a
+lead save can still move (agent loads, the user's unread count) are dropped afterwards to be
+recounted from the database. It can be pointed at a development site with data in it, but not
+at one under load.
+
+Usage:
+	bench --site crm.localhost execute crm.fcrm.doctype.crm_service_level_agreement.benchmark.run \
+		--kwargs "{'slas': 10, 'leads': 200, 'seed': 1}"
+	bench --site crm.localhost execute crm.fcrm.doctype.crm_service_level_agreement.benchmark.compare \
+		--kwargs "{'baseline': 'sla-benchmark-1a2b3c4.json', 'current': 'sla-benchmark-5d6e7f8.json'}"
+"""
+
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import date, timedelta
+
+import frappe
+from frappe.utils import add_to_date, cint, get_datetime, now_datetime
+
+from crm.api.notifications import get_unread_count_key
+from crm.fcrm.doctype.crm_lead_assignment_rule.crm_lead_assignment_rule import clear_agent_load
+from crm.fcrm.doctype.crm_service_level_agreement.crm_service_level_agreement import (
+	clear_calendar_cache,
+)
+from crm.fcrm.doctype.crm_service_level_agreement.utils import clear_sla_rules_cache, get_sla
+from crm.utils.benchmark import percentile, to_ms
+
+WORKING_HOURS = {
+	"office": {
+		day: ("09:00:00", "17:00:00") for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+	},
+	"extended": {
+		day: ("08:00:00", "20:00:00")
+		for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+	},
+	"round_the_clock": {
+		day: ("00:00:00", "23:59:59")
+		for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+	},
+}
+
+# first response targets in seconds, from an hour to three days
+RESPONSE_TIMES = [60 * 60, 4 * 60 * 60, 8 * 60 * 60, 24 * 60 * 60, 3 * 24 * 60 * 60]
+
+
+def run(slas=10, leads=200, holiday_years=5, holidays_per_year=12, repeat=5, seed=None, output=None):
+	"""
+	Run the suite and write the results as JSON.
+
+	:param slas: Number of generated SLAs, `get_sla` checks each one's condition
+	:param leads: Number of leads saved end to end, and of creation/response pairs timed in isolation
+	:param holiday_years: Years covered by each generated holiday list
+	:param repeat: Times each isolated measurement is repeated
+	:param output: Result file, defaults to `sla-benchmark-<commit>.json` in the site's private folder
+	"""
+	slas, leads, repeat = cint(slas), cint(leads), cint(repeat) or 1
+	seed = seed if seed is not None else random.randrange(1 << 32)
+	rng = random.Random(seed)
+	frappe.db.commit()
+
+	try:
+		sla_docs = [make_sla(i, rng, cint(holiday_years), cint(holidays_per_year)) for i in range(slas)]
+		samples = make_samples(rng, leads, slas)
+
+		results = {
+			"get_sla": time_get_sla(samples, repeat),
+			"calc_time": time_calc_time(sla_docs, samples, repeat),
+			"calc_elapsed_time": time_calc_elapsed_time(sla_docs, samples, repeat),
+			**time_lead_save(samples),
+		}
+	finally:
+		frappe.db.rollback()
+		clear_sla_rules_cache()
+		clear_calendar_cache()
+		clear_agent_load()
+		frappe.cache.delete(get_unread_count_key(frappe.session.user))
+
+	commit = get_commit()
+	report = {
+		"commit": commit,
+		"created": str(now_datetime()),
+		"seed": seed,
+		"parameters": {
+			"slas": slas,
+			"leads": leads,
+			"holiday_years": cint(holiday_years),
+			"holidays_per_year": cint(holidays_per_year),
+			"repeat": repeat,
+		},
+		"results": results,
+	}
+
+	output = output or frappe.get_site_path("private", f"sla-benchmark-{commit or 'local'}.json")
+	with open(output, "w") as f:
+		json.dump(report, f, indent=2)
+
+	print(f"Results written to {os.path.abspath(output)}")
+	return report
+
+
+def compare(baseline, current, threshold=0.1):
+	"""
+	Compare two result files and list measurements whose p50 or p95 got slower by more than
+	`threshold` (a fraction).
+	"""
+	with open(baseline) as f:
+		before = json.load(f)["results"]
+	with open(current) as f:
+		after = json.load(f)["results"]
+
+	regressions = []
+	for name in sorted(set(before) & set(after)):
+		for stat in ("p50", "p95"):
+			old, new = before[name][stat], after[name][stat]
+			change = (new - old) / old if old else 0
+			print(f"{name:<24} {stat}  {old:>10.3f} ms -> {new:>10.3f} ms  {change:+.1%}")
+			if change > float(threshold):
+				regressions.append({"measurement": name, "stat": stat, "before": old, "after": new})
+	return regressions
+
+
+def make_sla(index, rng, holiday_years, holidays_per_year):
+	profile = rng.choice(list(WORKING_HOURS))
+	sla = frappe.get_doc(
+		{
+			"doctype": "CRM Service Level Agreement",
+			"sla_name": f"SLA Benchmark {index} {frappe.generate_hash(length=6)}",
+			"apply_on": "CRM Lead",
+			"enabled": 1,
+			"condition": f"doc.job_title == 'SLA Benchmark {index}'",
+			"holiday_list": make_holiday_list(rng, holiday_years, holidays_per_year),
+			"priorities": [
+				{
+					"priority": "Open",
+					"default_priority": 1,
+					"first_response_time": rng.choice(RESPONSE_TIMES),
+				},
+				{"priority": "Replied", "first_response_time": rng.choice(RESPONSE_TIMES)},
+			],
+			"working_hours": [
+				{"workday": day, "start_time": start, "end_time": end}
+				for day, (start, end) in WORKING_HOURS[profile].items()
+			],
+		}
+	)
+	return sla.insert(ignore_permissions=True)
+
+
+def make_holiday_list(rng, years, per_year):
+	first_year = date.today().year - years // 2
+	holidays = set()
+	for year in range(first_year, first_year + years):
+		while len(holidays) < (year - first_year + 1) * per_year:
+			holidays.add(date(year, 1, 1) + timedelta(days=rng.randrange(365)))
+
+	holiday_list = frappe.get_doc(
+		{
+			"doctype": "CRM Holiday List",
+			"holiday_list_name": f"SLA Benchmark {frappe.generate_hash(length=8)}",
+			"from_date": date(first_year, 1, 1),
+			"to_date": date(first_year + years - 1, 12, 31),
+			"holidays": [{"date": day, "description": "Benchmark"} for day in sorted(holidays)],
+		}
+	)
+	return holiday_list.insert(ignore_permissions=True).name
+
+
+def make_samples(rng, count, slas):
+	"""Lead creation and first response times, spread over the past year."""
+	now = now_datetime()
+	samples = []
+	for _ in range(count):
+		created = add_to_date(now, seconds=-rng.randrange(365 * 24 * 60 * 60))
+		responded = add_to_date(created, seconds=rng.randrange(7 * 24 * 60 * 60))
+		samples.append(frappe._dict(sla=rng.randrange(slas), created=created, responded=responded))
+	return samples
+
+
+def time_get_sla(samples, repeat):
+	timings = []
+	for sample in samples:
+		lead = frappe.new_doc("CRM Lead")
+		lead.update(
+			{
+				"first_name": "SLA Benchmark",
+				"job_title": f"SLA Benchmark {sample.sla}",
+				"communication_status": "Open",
+			}
+		)
+		timings.extend(timed(get_sla, lead) for _ in range(repeat))
+	return summarize(timings)
+
+
+def time_calc_time(sla_docs, samples, repeat):
+	timings = []
+	for sample in samples:
+		sla = sla_docs[sample.sla]
+		duration = sla.get_priorities()["Open"].first_response_time
+		timings.extend(timed(sla.calc_time, sample.created, duration) for _ in range(repeat))
+	return summarize(timings)
+
+
+def time_calc_elapsed_time(sla_docs, samples, repeat):
+	timings = []
+	for sample in samples:
+		sla = sla_docs[sample.sla]
+		timings.extend(timed(sla.calc_elapsed_time, sample.created, sample.responded) for _ in range(repeat))
+	return summarize(timings)
+
+
+def time_lead_save(samples):
+	"""Lead insert with SLA assignment, then the save that records the first response."""
+	inserts, responses = [], []
+	for sample in samples:
+		lead = frappe.get_doc(
+			{
+				"doctype": "CRM Lead",
+				"first_name": "SLA Benchmark",
+				"job_title": f"SLA Benchmark {sample.sla}",
+				"sla_creation": sample.created,
+				"lead_owner": frappe.session.user,
+			}
+		)
+		inserts.append(timed(lead.insert, ignore_permissions=True))
+
+		lead.communication_status = "Replied"
+		lead.first_responded_on = get_datetime(sample.responded)
+		responses.append(timed(lead.save, ignore_permissions=True))
+	return {"lead_insert": summarize(inserts), "lead_first_response": summarize(responses)}
+
+
+def timed(fn, *args, **kwargs):
+	started = time.perf_counter()
+	fn(*args, **kwargs)
+	return time.perf_counter() - started
+
+
+def summarize(timings):
+	return {
+		"count": len(timings),
+		"mean": to_ms(sum(timings) / len(timings)) if timings else 0,
+		"p50": to_ms(percentile(timings, 50)),
+		"p95": to_ms(percentile(timings, 95)),
+		"p99": to_ms(percentile(timings, 99)),
+		"max": to_ms(max(timings, default=0)),
+	}
+
+
+def get_commit():
+	try:
+		return subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"],
+			cwd=frappe.get_app_path("crm"),
+			capture_output=True,
+			text=True,
+			check=True,
+		).stdout.strip()
+	except Exception:
+		return None
@@ -0,0 +1,143 @@
+"""
+Working time arithmetic for Service Level Agreements.
+
+Time is measured per working-day interval instead of by walking the clock, so the cost of a
+calculation does not grow with the length of the period.
+"""
+
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SECONDS_IN_DAY = 24 * 60 * 60
+
+
+class BusinessCalendar:
+	"""
+	Working hours per weekday plus holidays.
+
+	:param working_hours: `{"Monday": (start_time, end_time), ...}`, times as `timedelta`,
+	        `datetime.time` or `HH:MM:SS` strings
+	:param holidays: Dates on which nobody works
+	"""
+
+	def __init__(self, working_hours: dict, holidays=None):
+		self.hours = [None] * 7
+		for weekday, (start, end) in working_hours.items():
+			start, end = to_seconds(start), to_seconds(end)
+			if end > start:
+				self.hours[WEEKDAYS.index(weekday)] = (start, end)
+
+		self.day_seconds = [end - start for start, end in (hours or (0, 0) for hours in self.hours)]
+		self.week_seconds = sum(self.day_seconds)
+
+		# only holidays falling on working days take time away
+		self.holidays = sorted(
+			{d for d in map(to_date, holidays or []) if d and self.day_seconds[d.weekday()]}
+		)
+		self.holiday_set = set(self.holidays)
+		self.holiday_seconds = [0]
+		for d in self.holidays:
+			self.holiday_seconds.append(self.holiday_seconds[-1] + self.day_seconds[d.weekday()])
+
+	def is_working_day(self, day: date) -> bool:
+		return bool(self.day_seconds[day.weekday()]) and day not in self.holiday_set
+
+	def working_seconds_between(self, start: datetime, end: datetime) -> float:
+		"""Working seconds in `[start, end)`."""
+		if end <= start:
+			return 0
+
+		start_day, end_day = start.date(), end.date()
+		if start_day == end_day:
+			return self.day_overlap(start_day, seconds_of_day(start), seconds_of_day(end))
+
+		return (
+			self.day_overlap(start_day, seconds_of_day(start), SECONDS_IN_DAY)
+			+ self.full_days_seconds(start_day + timedelta(days=1), end_day)
+			+ self.day_overlap(end_day, 0, seconds_of_day(end))
+		)
+
+	def add_working_seconds(self, start: datetime, seconds: float) -> datetime | None:
+		"""
+		Earliest moment at which `seconds` of working time have passed since `start`.
+
+		Days are located with a binary search over cumulative working seconds.
+		"""
+		if seconds <= 0:
+			return start
+		if not self.week_seconds:
+			return None
+
+		start_day = start.date()
+		from_seconds = seconds_of_day(start)
+		available = self.day_overlap(start_day, from_seconds, SECONDS_IN_DAY)
+		if available >= seconds:
+			return self.point_in_day(start_day, from_seconds, seconds)
+
+		remaining = seconds - available
+		first_day = start_day + timedelta(days=1)
+
+		# smallest `n` such that the `n` days after `start_day` hold enough working time
+		high = 1
+		while self.full_days_seconds(first_day, first_day + timedelta(days=high)) < remaining:
+			high *= 2
+		low = high // 2 + 1 if high > 1 else 1
+		while low < high:
+			mid = (low + high) // 2
+			if self.full_days_seconds(first_day, first_day + timedelta(days=mid)) >= remaining:
+				high = mid
+			else:
+				low = mid + 1
+
+		day = first_day + timedelta(days=high - 1)
+		remaining -= self.full_days_seconds(first_day, day)
+		return self.point_in_day(day, 0, remaining)
+
+	def full_days_seconds(self, from_day: date, to_day: date) -> float:
+		"""Working seconds in the whole days `[from_day, to_day)`."""
+		days = (to_day - from_day).days
+		if days <= 0:
+			return 0
+
+		weeks, rest = divmod(days, 7)
+		weekday = from_day.weekday()
+		total = weeks * self.week_seconds + sum(self.day_seconds[(weekday + i) % 7] for i in range(rest))
+
+		first, last = bisect_left(self.holidays, from_day), bisect_left(self.holidays, to_day)
+		return total - (self.holiday_seconds[last] - self.holiday_seconds[first])
+
+	def day_overlap(self, day: date, from_seconds: float, to_seconds: float) -> float:
+		if not self.is_working_day(day):
+			return 0
+		start, end = self.hours[day.weekday()]
+		return max(0, min(end, to_seconds) - max(start, from_seconds))
+
+	def point_in_day(self, day: date, from_seconds: float, seconds: float) -> datetime:
+		start, _ = self.hours[day.weekday()]
+		return datetime.combine(day, time()) + timedelta(seconds=max(start, from_seconds) + seconds)
+
+
+def seconds_of_day(value: datetime) -> float:
+	return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1_000_000
+
+
+def to_seconds(value) -> float:
+	if not value:
+		return 0
+	if isinstance(value, timedelta):
+		return value.total_seconds()
+	if isinstance(value, time):
+		return value.hour * 3600 + value.minute * 60 + value.second
+	hours, minutes, seconds = [*str(value).split(":"), "0", "0"][:3]
+	return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def to_date(value) -> date | None:
+	if not value:
+		return None
+	if isinstance(value, datetime):
+		return value.date()
+	if isinstance(value, date):
+		return value
+	return date.fromisoformat(str(value)[:10])
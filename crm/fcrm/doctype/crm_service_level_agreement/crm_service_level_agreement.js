@@ -2,6 +2,35 @@
 // For license information, please see license.txt
 
 frappe.ui.form.on("CRM Service Level Agreement", {
+	refresh(frm) {
+		if (frm.is_new()) return;
+		const recompute = (dry_run) =>
+			frappe.call({
+				method: "crm.fcrm.doctype.crm_service_level_agreement.recompute.recompute_sla",
+				args: { name: frm.doc.name, dry_run },
+				callback: () => frappe.show_alert(__("SLA recompute queued")),
+			});
+		frm.add_custom_button(__("What If"), () => recompute(1), __("Recompute"));
+		frm.add_custom_button(__("Apply to Records"), () => recompute(0), __("Recompute"));
+	},
+	onload(frm) {
+		frappe.realtime.off("crm_sla_recompute");
+		frappe.realtime.on("crm_sla_recompute", (summary) => {
+			if (summary.sla !== frm.doc.name) return;
+			const transitions = Object.entries(summary.transitions)
+				.map(([transition, count]) => `<li>${transition}: ${count}</li>`)
+				.join("");
+			frappe.msgprint({
+				title: summary.dry_run ? __("What If") : __("SLA Recomputed"),
+				message:
+					__("{0} of {1} records {2}", [
+						summary.changed,
+						summary.total,
+						summary.dry_run ? __("would change") : __("changed"),
+					]) + (transitions ? `<ul>${transitions}</ul>` : ""),
+			});
+		});
+	},
 	validate(frm) {
 		let default_priority_count = 0;
 		frm.doc.priorities.forEach(function (row) {
@@ -6,14 +6,20 @@ from frappe import _
 from datetime import timedelta
 from frappe.model.document import Document
 from frappe.utils import (
-	add_to_date,
 	get_datetime,
 	get_weekdays,
-	getdate,
 	now_datetime,
-	time_diff_in_seconds,
 )
-from crm.fcrm.doctype.crm_service_level_agreement.utils import get_context
+from crm.fcrm.doctype.crm_service_level_agreement.business_time import BusinessCalendar
+from crm.fcrm.doctype.crm_service_level_agreement.utils import (
+	clear_sla_rules_cache,
+	get_compiled_condition,
+)
+
+CALENDAR_CACHE_KEY = "crm:sla_calendar"
+
+# (sla name, modified) -> lookups built from the SLA's own child tables
+sla_lookups = {}
 
 
 class CRMServiceLevelAgreement(Document):
@@ -21,6 +27,14 @@ class CRMServiceLevelAgreement(Document):
 		self.validate_default()
 		self.validate_condition()
 
+	def on_update(self):
+		clear_calendar_cache(self.name)
+		clear_sla_rules_cache()
+
+	def on_trash(self):
+		clear_calendar_cache(self.name)
+		clear_sla_rules_cache()
+
 	def validate_default(self):
 		if self.default:
 			other_slas = frappe.get_all(
@@ -40,7 +54,7 @@ class CRMServiceLevelAgreement(Document):
 			return
 		try:
 			temp_doc = frappe.new_doc(self.apply_on)
-			frappe.safe_eval(self.condition, None, get_context(temp_doc))
+			get_compiled_condition(self.condition).evaluate(temp_doc)
 		except Exception as e:
 			frappe.throw(
 				_("The Condition '{0}' is invalid: {1}").format(self.condition, str(e))
@@ -112,90 +126,80 @@ class CRMServiceLevelAgreement(Document):
 		start_at: str,
 		duration_seconds: int,
 	):
-		res = get_datetime(start_at)
-		time_needed = duration_seconds
-		holidays = self.get_holidays()
-		weekdays = get_weekdays()
-		workdays = self.get_workdays()
-		while time_needed:
-			today = res
-			today_day = getdate(today)
-			today_weekday = weekdays[today.weekday()]
-			is_workday = today_weekday in workdays
-			is_holiday = today_day in holidays
-			if is_holiday or not is_workday:
-				res = add_to_date(res, days=1, as_datetime=True)
-				continue
-			today_workday = workdays[today_weekday]
-			now_in_seconds = time_diff_in_seconds(today, today_day)
-			start_time = max(today_workday.start_time.total_seconds(), now_in_seconds)
-			till_start_time = max(start_time - now_in_seconds, 0)
-			end_time = max(today_workday.end_time.total_seconds(), now_in_seconds)
-			time_left = max(end_time - start_time, 0)
-			if not time_left:
-				res = getdate(add_to_date(res, days=1, as_datetime=True))
-				continue
-			time_taken = min(time_needed, time_left)
-			time_needed -= time_taken
-			time_required = till_start_time + time_taken
-			res = add_to_date(res, seconds=time_required, as_datetime=True)
-		return res
+		return self.get_calendar().add_working_seconds(get_datetime(start_at), duration_seconds)
 
 	def calc_elapsed_time(self, start_time, end_time) -> float:
 		"""
-		Get took from start to end, excluding non-working hours
+		Get took from start to end, excluding non-working hours and holidays
 
 		:param start_at: Date at which calculation starts
 		:param end_at: Date at which calculation ends
 		:return: Number of seconds
 		"""
-		start_time = get_datetime(start_time)
-		end_time = get_datetime(end_time)
-		holiday_list = []
-		working_day_list = self.get_working_days()
-		working_hours = self.get_working_hours()
-
-		total_seconds = 0
-		current_time = start_time
-
-		while current_time < end_time:
-			in_holiday_list = current_time.date() in holiday_list
-			not_in_working_day_list = get_weekdays()[current_time.weekday()] not in working_day_list
-			if in_holiday_list or not_in_working_day_list or not self.is_working_time(current_time, working_hours):
-				current_time += timedelta(seconds=1)
-				continue
-			total_seconds += 1
-			current_time += timedelta(seconds=1)
-
-		return total_seconds
+		return self.get_calendar().working_seconds_between(get_datetime(start_time), get_datetime(end_time))
+
+	def get_calendar(self) -> BusinessCalendar:
+		"""
+		Return working hours and holidays compiled into a `BusinessCalendar`, cached per SLA
+		"""
+		if self.is_new():
+			return self.build_calendar()
+
+		cached = frappe.cache.hget(CALENDAR_CACHE_KEY, self.name)
+		if cached and cached[0] == str(self.modified):
+			return cached[1]
+
+		calendar = self.build_calendar()
+		frappe.cache.hset(CALENDAR_CACHE_KEY, self.name, (str(self.modified), calendar))
+		return calendar
+
+	def build_calendar(self) -> BusinessCalendar:
+		return BusinessCalendar(self.get_working_hours(), self.get_holidays())
 
 	def get_priorities(self):
 		"""
 		Return priorities related info as a dict. With `priority` as key
 		"""
-		res = {}
-		for row in self.priorities:
-			res[row.priority] = row
-		return res
+		return self.get_lookups().priorities
 
 	def get_default_priority(self):
 		"""
 		Return default priority
 		"""
-		for row in self.priorities:
-			if row.default_priority:
-				return row.priority
-
-		return self.priorities[0].priority
+		return self.get_lookups().default_priority
 
 	def get_workdays(self) -> dict[str, dict]:
 		"""
 		Return workdays related info as a dict. With `workday` as key
 		"""
-		res = {}
-		for row in self.working_hours:
-			res[row.workday] = row
-		return res
+		return self.get_lookups().workdays
+
+	def get_lookups(self) -> frappe._dict:
+		"""
+		Return priorities and workdays lookups, built once per SLA version in each process
+		"""
+		if self.is_new():
+			return self.build_lookups()
+
+		key = (self.name, str(self.modified))
+		lookups = sla_lookups.get(key)
+		if not lookups:
+			for stale_key in [k for k in sla_lookups if k[0] == self.name]:
+				del sla_lookups[stale_key]
+			lookups = sla_lookups[key] = self.build_lookups()
+		return lookups
+
+	def build_lookups(self) -> frappe._dict:
+		priorities = {row.priority: row for row in self.priorities}
+		default_priority = next(
+			(row.priority for row in self.priorities if row.default_priority),
+			self.priorities[0].priority if self.priorities else None,
+		)
+		return frappe._dict(
+			priorities=priorities,
+			default_priority=default_priority,
+			workdays={row.workday: row for row in self.working_hours},
+		)
 
 	def get_working_days(self) -> dict[str, dict]:
 		workdays = []
@@ -223,3 +227,10 @@ class CRMServiceLevelAgreement(Document):
 		for row in holiday_list.holidays:
 			res.append(row.date)
 		return res
+
+
+def clear_calendar_cache(sla_name=None):
+	if sla_name:
+		frappe.cache.hdel(CALENDAR_CACHE_KEY, sla_name)
+	else:
+		frappe.cache.delete_value(CALENDAR_CACHE_KEY)
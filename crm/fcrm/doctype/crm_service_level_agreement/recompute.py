@@ -0,0 +1,130 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+from collections import Counter
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, get_datetime, now_datetime
+
+SLA_FIELDS = ["response_by", "first_response_time", "sla_status"]
+
+
+@frappe.whitelist()
+def recompute_sla(name, dry_run=True):
+	"""
+	Queue a recompute of `response_by`, `first_response_time` and `sla_status` on every lead and
+	deal using SLA `name`. With `dry_run` nothing is written, the summary only reports what
+	would change. The summary is sent to the user as a `crm_sla_recompute` realtime event.
+	"""
+	frappe.has_permission("CRM Service Level Agreement", "write", name, throw=True)
+	dry_run = cint(dry_run)
+	frappe.enqueue(
+		recompute_records,
+		queue="long",
+		timeout=60 * 60,
+		job_id=f"crm_sla_recompute:{name}:{dry_run}",
+		deduplicate=True,
+		sla_name=name,
+		dry_run=dry_run,
+		user=frappe.session.user,
+	)
+
+
+def recompute_records(sla_name, dry_run=True, chunk_size=500, user=None):
+	sla = frappe.get_doc("CRM Service Level Agreement", sla_name)
+	calendar = sla.get_calendar()
+	priorities = sla.get_priorities()
+	default_priority = priorities.get(sla.get_default_priority())
+	now = now_datetime()
+
+	total = frappe.db.count(sla.apply_on, {"sla": sla_name})
+	summary = frappe._dict(sla=sla_name, dry_run=dry_run, total=total, changed=0, transitions=Counter())
+	done = 0
+
+	for rows in iter_records(sla.apply_on, sla_name, chunk_size):
+		updates = {}
+		for row in rows:
+			priority = (
+				default_priority if row.first_responded_on else priorities.get(row.communication_status)
+			)
+			values = get_sla_values(calendar, priority, row, now)
+			if has_changed(values, row):
+				updates[row.name] = values
+				if values.sla_status != row.sla_status:
+					summary.transitions[f"{row.sla_status} -> {values.sla_status}"] += 1
+
+		summary.changed += len(updates)
+		if updates and not dry_run:
+			frappe.db.bulk_update(sla.apply_on, updates, chunk_size=chunk_size, update_modified=False)
+			frappe.db.commit()
+
+		done += len(rows)
+		frappe.publish_progress(
+			done * 100 / (total or 1),
+			title=_("Recomputing SLA {0}").format(sla_name),
+			doctype="CRM Service Level Agreement",
+			docname=sla_name,
+			description=f"{done}/{total}",
+		)
+
+	summary.transitions = dict(summary.transitions)
+	if user:
+		frappe.publish_realtime("crm_sla_recompute", summary, user=user)
+	return summary
+
+
+def iter_records(doctype, sla_name, chunk_size):
+	"""Records using `sla_name`, a chunk at a time ordered by name."""
+	fields = ["name", "sla_creation", "communication_status", "first_responded_on", *SLA_FIELDS]
+	last_name = ""
+	while True:
+		rows = frappe.get_all(
+			doctype,
+			filters={"sla": sla_name, "name": (">", last_name)},
+			fields=fields,
+			order_by="name asc",
+			limit=chunk_size,
+		)
+		if not rows:
+			return
+		yield rows
+		last_name = rows[-1].name
+
+
+def has_changed(values, row):
+	return (
+		values.sla_status != row.sla_status
+		or to_datetime(values.response_by) != to_datetime(row.response_by)
+		or flt(values.first_response_time, 3) != flt(row.first_response_time, 3)
+	)
+
+
+def get_sla_values(calendar, priority, row, now):
+	"""The SLA fields `CRMServiceLevelAgreement.apply` would set on a fresh record."""
+	start = to_datetime(row.sla_creation)
+	responded_on = to_datetime(row.first_responded_on)
+
+	response_by = row.response_by
+	if start and priority:
+		response_by = calendar.add_working_seconds(start, priority.first_response_time or 0)
+
+	first_response_time = row.first_response_time
+	if start and responded_on:
+		first_response_time = calendar.working_seconds_between(start, responded_on)
+
+	if response_by and to_datetime(response_by) < (responded_on or now):
+		sla_status = "Failed"
+	elif not responded_on:
+		sla_status = "First Response Due"
+	else:
+		sla_status = "Fulfilled"
+
+	return frappe._dict(
+		response_by=response_by, first_response_time=first_response_time, sla_status=sla_status
+	)
+
+
+def to_datetime(value):
+	# get_datetime(None) is now
+	return get_datetime(value) if value else None
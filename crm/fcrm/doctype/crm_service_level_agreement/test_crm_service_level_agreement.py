@@ -1,9 +1,123 @@
 # Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
 # See license.txt
 
+import ast
+import random
+from datetime import date, datetime, timedelta
+
 # import frappe
 from frappe.tests import UnitTestCase
 
+from crm.fcrm.doctype.crm_service_level_agreement.business_time import WEEKDAYS, BusinessCalendar
+from crm.fcrm.doctype.crm_service_level_agreement.utils import get_referenced_fields
+
 
 class TestCRMServiceLevelAgreement(UnitTestCase):
-	pass
+	def test_elapsed_time_matches_per_second_walk(self):
+		rng = random.Random(20240601)
+		for _ in range(25):
+			working_hours = random_working_hours(rng)
+			start = random_datetime(rng)
+			end = start + timedelta(seconds=rng.randint(0, 48 * 60 * 60))
+
+			calendar = BusinessCalendar(working_hours)
+			self.assertEqual(
+				calendar.working_seconds_between(start, end),
+				elapsed_time_per_second(start, end, working_hours),
+				msg=f"{working_hours} {start} {end}",
+			)
+
+	def test_elapsed_time_skips_holidays(self):
+		rng = random.Random(20240602)
+		for _ in range(25):
+			working_hours = random_working_hours(rng)
+			start = random_datetime(rng)
+			end = start + timedelta(seconds=rng.randint(0, 48 * 60 * 60))
+			holidays = [start.date() + timedelta(days=rng.randint(0, 3)) for _ in range(rng.randint(0, 2))]
+
+			calendar = BusinessCalendar(working_hours, holidays)
+			self.assertEqual(
+				calendar.working_seconds_between(start, end),
+				elapsed_time_per_second(start, end, working_hours, holidays),
+				msg=f"{working_hours} {holidays} {start} {end}",
+			)
+
+	def test_elapsed_time_over_long_periods(self):
+		working_hours = {day: (timedelta(hours=9), timedelta(hours=17)) for day in WEEKDAYS[:5]}
+		calendar = BusinessCalendar(working_hours, [date(2024, 1, 1)])
+
+		# 52 weeks of 5 * 8 hours, minus new year's day
+		start, end = datetime(2024, 1, 1), datetime(2024, 12, 30)
+		self.assertEqual(calendar.working_seconds_between(start, end), (52 * 40 - 8) * 60 * 60)
+
+	def test_response_by_is_earliest_moment_with_enough_working_time(self):
+		rng = random.Random(20240603)
+		for _ in range(200):
+			working_hours = random_working_hours(rng)
+			start = random_datetime(rng)
+			seconds = rng.randint(1, 5 * 24 * 60 * 60)
+			holidays = [start.date() + timedelta(days=rng.randint(0, 30)) for _ in range(rng.randint(0, 5))]
+
+			calendar = BusinessCalendar(working_hours, holidays)
+			if not calendar.week_seconds:
+				continue
+
+			response_by = calendar.add_working_seconds(start, seconds)
+			msg = f"{working_hours} {holidays} {start} {seconds}"
+			self.assertEqual(calendar.working_seconds_between(start, response_by), seconds, msg=msg)
+			self.assertLess(
+				calendar.working_seconds_between(start, response_by - timedelta(seconds=1)), seconds, msg=msg
+			)
+
+	def test_response_by_skips_weekend_and_holidays(self):
+		working_hours = {day: (timedelta(hours=9), timedelta(hours=17)) for day in WEEKDAYS[:5]}
+		calendar = BusinessCalendar(working_hours, [date(2024, 6, 10)])
+
+		# Friday 16:00 + 2 working hours, Monday is a holiday
+		response_by = calendar.add_working_seconds(datetime(2024, 6, 7, 16), 2 * 60 * 60)
+		self.assertEqual(response_by, datetime(2024, 6, 11, 10))
+
+		self.assertIsNone(BusinessCalendar({}).add_working_seconds(datetime(2024, 6, 7), 60))
+
+	def test_condition_fields(self):
+		def fields(condition):
+			return get_referenced_fields(ast.parse(condition, mode="eval"), "doc")
+
+		self.assertEqual(fields("doc.source == 'Website'"), {"source"})
+		self.assertEqual(
+			fields("doc['territory'] == 'India' and doc.get('annual_revenue', 0) > 100"),
+			{"territory", "annual_revenue"},
+		)
+		self.assertEqual(fields("frappe.utils.getdate() > '2024-01-01'"), set())
+		self.assertIsNone(fields("len(doc) > 2"))
+		self.assertIsNone(fields("doc[field] == 1"))
+
+
+def elapsed_time_per_second(start, end, working_hours, holidays=None):
+	"""Reference implementation, walks the clock one second at a time."""
+	holidays = holidays or []
+	total_seconds = 0
+	current_time = start
+	while current_time < end:
+		weekday = WEEKDAYS[current_time.weekday()]
+		start_time, end_time = working_hours.get(weekday, (timedelta(0), timedelta(0)))
+		time_of_day = timedelta(
+			hours=current_time.hour, minutes=current_time.minute, seconds=current_time.second
+		)
+		if current_time.date() not in holidays and start_time <= time_of_day < end_time:
+			total_seconds += 1
+		current_time += timedelta(seconds=1)
+	return total_seconds
+
+
+def random_working_hours(rng):
+	working_hours = {}
+	for weekday in rng.sample(WEEKDAYS, rng.randint(1, 7)):
+		start = rng.randint(0, 20 * 60 * 60)
+		end = start + rng.randint(-60 * 60, 10 * 60 * 60)
+		working_hours[weekday] = (timedelta(seconds=start), timedelta(seconds=min(end, 24 * 60 * 60 - 1)))
+	return working_hours
+
+
+def random_datetime(rng):
+	return datetime(2024, 1, 1) + timedelta(seconds=rng.randint(0, 365 * 24 * 60 * 60))
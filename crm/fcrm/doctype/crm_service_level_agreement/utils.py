@@ -1,9 +1,23 @@
+import ast
+import json
+import unicodedata
+
 import frappe
 from frappe.model.document import Document
-from frappe.query_builder import JoinType
-from frappe.utils.safe_exec import get_safe_globals
-from frappe.utils import now_datetime
-from pypika import Criterion
+from frappe.utils import get_datetime, now_datetime
+from frappe.utils.safe_exec import (
+	WHITELISTED_SAFE_EVAL_GLOBALS,
+	_validate_safe_eval_syntax,
+	get_safe_globals,
+)
+
+SLA_RULES_CACHE_KEY = "crm:sla_rules"
+SLA_OWNER_FIELDS = {"CRM Lead": "lead_owner", "CRM Deal": "deal_owner"}
+SWEEP_CHUNK_SIZE = 1000
+
+# condition -> CompiledCondition, code objects can't be pickled to redis so they stay in process
+compiled_conditions = {}
+
 
 def get_sla(doc: Document) -> Document:
 	"""
@@ -12,50 +26,179 @@ def get_sla(doc: Document) -> Document:
 	:param doc: Lead/Deal to use
 	:return: Applicable SLA
 	"""
-	SLA = frappe.qb.DocType("CRM Service Level Agreement")
-	Priority = frappe.qb.DocType("CRM Service Level Priority")
 	now = now_datetime()
 	priority = doc.communication_status
-	q = (
-		frappe.qb.from_(SLA)
-		.select(SLA.name, SLA.condition)
-		.where(SLA.apply_on == doc.doctype)
-		.where(SLA.enabled == True)
-		.where(Criterion.any([SLA.start_date.isnull(), SLA.start_date <= now]))
-		.where(Criterion.any([SLA.end_date.isnull(), SLA.end_date >= now]))
-	)
-	if priority:
-		q = (
-			q.join(Priority, JoinType.inner)
-			.on(Priority.parent == SLA.name)
-			.where(Priority.priority == priority)
-		)
-	sla_list = q.run(as_dict=True)
-	res = None
+	sla_list = [
+		sla
+		for sla in get_sla_rules(doc.doctype)
+		if (not sla.start_date or get_datetime(sla.start_date) <= now)
+		and (not sla.end_date or get_datetime(sla.end_date) >= now)
+		and (not priority or priority in sla.priorities)
+	]
 
 	# move default sla to the end of the list
-	for sla in sla_list:
-		if sla.get("default") == True:
-			sla_list.remove(sla)
-			sla_list.append(sla)
-			break
+	sla_list.sort(key=lambda sla: bool(sla.default))
 
 	for sla in sla_list:
 		cond = sla.get("condition")
-		if not cond or frappe.safe_eval(cond, None, get_context(doc)):
-			res = sla
-			break
-	return res
+		if not cond or get_compiled_condition(cond).evaluate(doc):
+			return sla
+	return None
+
+
+def get_sla_rules(apply_on: str) -> list[dict]:
+	"""
+	Enabled SLAs for `apply_on` with the priorities they cover, cached until an SLA is saved
+	"""
+	return frappe.cache.hget(SLA_RULES_CACHE_KEY, apply_on, lambda: load_sla_rules(apply_on))
+
+
+def load_sla_rules(apply_on: str) -> list[dict]:
+	sla_list = frappe.get_all(
+		"CRM Service Level Agreement",
+		filters={"apply_on": apply_on, "enabled": 1},
+		fields=["name", "condition", "default", "start_date", "end_date"],
+		order_by="creation asc",
+	)
+	priorities = frappe.get_all(
+		"CRM Service Level Priority",
+		filters={
+			"parenttype": "CRM Service Level Agreement",
+			"parent": ("in", [sla.name for sla in sla_list] or [""]),
+		},
+		fields=["parent", "priority"],
+	)
+	for sla in sla_list:
+		sla.priorities = [p.priority for p in priorities if p.parent == sla.name]
+	return sla_list
+
+
+def clear_sla_rules_cache():
+	frappe.cache.delete_value(SLA_RULES_CACHE_KEY)
+
+
+def get_compiled_condition(condition: str) -> "CompiledCondition":
+	compiled = compiled_conditions.get(condition)
+	if not compiled:
+		compiled = compiled_conditions[condition] = CompiledCondition(condition)
+	return compiled
+
+
+class CompiledCondition:
+	"""
+	An SLA condition, syntax-checked and compiled once.
 
-def get_context(d: Document) -> dict:
+	The `doc` it sees only holds the fields the condition reads, unless it uses `doc` in a way
+	that can't be traced back to field names, then it gets the whole `doc.as_dict()`.
 	"""
-	Get safe context for `safe_eval`
 
-	:param doc: `Document` to add in context
-	:return: Context with `doc` and safe variables
+	def __init__(self, condition: str):
+		condition = unicodedata.normalize("NFKC", condition)
+		_validate_safe_eval_syntax(condition)
+		tree = ast.parse(condition, mode="eval")
+		self.code = compile(tree, "<sla_condition>", "eval")
+		self.fields = get_referenced_fields(tree, "doc")
+		self.uses_frappe = any(
+			isinstance(node, ast.Name) and node.id == "frappe" for node in ast.walk(tree)
+		)
+
+	def evaluate(self, doc: Document):
+		eval_globals = {"__builtins__": {}, **WHITELISTED_SAFE_EVAL_GLOBALS}
+		return eval(self.code, eval_globals, self.get_context(doc))
+
+	def get_context(self, doc: Document) -> dict:
+		if self.fields is None:
+			doc_context = doc.as_dict()
+		else:
+			doc_context = frappe._dict({field: get_field_value(doc, field) for field in self.fields})
+
+		context = {"doc": doc_context}
+		if self.uses_frappe:
+			context["frappe"] = frappe._dict(utils=get_safe_globals().get("frappe").get("utils"))
+		return context
+
+
+def get_referenced_fields(tree: ast.AST, name: str) -> set[str] | None:
 	"""
-	utils = get_safe_globals().get("frappe").get("utils")
-	return {
-		"doc": d.as_dict(),
-		"frappe": frappe._dict(utils=utils),
-	}
\ No newline at end of file
+	Field names read from `name` as `name.field`, `name["field"]` or `name.get("field")`.
+	Returns `None` if `name` is used any other way.
+	"""
+	parents = {}
+	for node in ast.walk(tree):
+		for child in ast.iter_child_nodes(node):
+			parents[child] = node
+
+	fields = set()
+	for node in ast.walk(tree):
+		if not (isinstance(node, ast.Name) and node.id == name):
+			continue
+
+		parent = parents.get(node)
+		if isinstance(parent, ast.Attribute) and parent.attr != "get":
+			fields.add(parent.attr)
+		elif isinstance(parent, ast.Subscript) and is_string(parent.slice):
+			fields.add(parent.slice.value)
+		elif (
+			isinstance(parent, ast.Attribute)
+			and isinstance(parents.get(parent), ast.Call)
+			and parents[parent].func is parent
+			and parents[parent].args
+			and is_string(parents[parent].args[0])
+		):
+			fields.add(parents[parent].args[0].value)
+		else:
+			return None
+	return fields
+
+
+def is_string(node: ast.AST) -> bool:
+	return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+
+def get_field_value(doc: Document, field: str):
+	value = doc.get(field)
+	if isinstance(value, list):
+		return [row.as_dict() if isinstance(row, Document) else row for row in value]
+	return value
+
+
+def mark_overdue_slas():
+	"""
+	Set `sla_status` to Failed on leads and deals whose first response is past `response_by`.
+
+	`handle_sla_status` only runs on save, this catches records nobody has touched since they
+	went overdue. Rows are updated in chunks without loading documents, then every owner or
+	assignee of an affected record gets one realtime update.
+	"""
+	now = now_datetime()
+	failed = {}
+
+	for doctype, owner_field in SLA_OWNER_FIELDS.items():
+		table = frappe.qb.DocType(doctype)
+		while True:
+			rows = (
+				frappe.qb.from_(table)
+				.select(table.name, table[owner_field], table._assign)
+				.where(table.sla_status == "First Response Due")
+				.where(table.response_by < now)
+				.where(table.first_responded_on.isnull())
+				.limit(SWEEP_CHUNK_SIZE)
+			).run(as_dict=True)
+			if not rows:
+				break
+
+			(
+				frappe.qb.update(table)
+				.set(table.sla_status, "Failed")
+				.where(table.name.isin([row.name for row in rows]))
+				.where(table.sla_status == "First Response Due")
+			).run()
+			frappe.db.commit()
+
+			for row in rows:
+				for user in {row.get(owner_field), *json.loads(row._assign or "[]")}:
+					if user:
+						failed.setdefault(user, {}).setdefault(doctype, []).append(row.name)
+
+	for user, records in failed.items():
+		frappe.publish_realtime("crm_sla_failed", records, user=user)
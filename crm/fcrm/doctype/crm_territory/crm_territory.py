@@ -1,9 +1,17 @@
 # Copyright (c) 2024, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
-# import frappe
 from frappe.model.document import Document
 
+from crm.fcrm.doctype.crm_lead_assignment_rule.crm_lead_assignment_rule import (
+	clear_assignment_cache,
+)
+
 
 class CRMTerritory(Document):
-	pass
+	def on_update(self):
+		# lead assignment rules are looked up through the territory tree
+		clear_assignment_cache()
+
+	def on_trash(self):
+		clear_assignment_cache()
@@ -0,0 +1,270 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import re
+import unicodedata
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+INDEXED_DOCTYPES = ("Contact", "CRM Lead", "CRM Organization")
+ENTRY_FIELDS = [
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"token",
+	"reference_doctype",
+	"reference_name",
+	"label",
+	"email",
+]
+# rows read from the index at a time, ranked in Python down to the requested limit
+CANDIDATE_LIMIT = 200
+# batches of candidates read at most when the user cannot see enough of them
+MAX_CANDIDATE_BATCHES = 5
+REBUILD_CHUNK_SIZE = 2000
+MAX_TOKEN_LENGTH = 140
+
+
+class CRMTypeaheadEntry(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("CRM Typeahead Entry", ["token", "reference_doctype"])
+	frappe.db.add_index("CRM Typeahead Entry", ["reference_doctype", "reference_name"])
+
+
+@frappe.whitelist()
+def search(txt: str, doctypes: list[str] | str | None = None, limit: int = 20) -> list[dict]:
+	"""
+	Records whose label or email has a word starting with each word of `txt`, best matches
+	first. The longest word is looked up in the index by prefix, the others are checked on the
+	candidates it returns that the user can read.
+
+	:param doctypes: Limit to these of `INDEXED_DOCTYPES`, defaults to all readable ones
+	"""
+	words = tokenize(txt)
+	if not words:
+		return []
+
+	if isinstance(doctypes, str):
+		doctypes = frappe.parse_json(doctypes) if doctypes.startswith("[") else [doctypes]
+	doctypes = [
+		doctype
+		for doctype in (doctypes or INDEXED_DOCTYPES)
+		if doctype in INDEXED_DOCTYPES and frappe.has_permission(doctype, "read")
+	]
+	if not doctypes:
+		return []
+
+	longest = max(words, key=len)
+	results = {}
+	for start in range(0, CANDIDATE_LIMIT * MAX_CANDIDATE_BATCHES, CANDIDATE_LIMIT):
+		rows = get_candidates(longest, doctypes, start)
+		for row in filter_permitted(rows):
+			score = get_score(words, row)
+			key = (row.reference_doctype, row.reference_name, row.email)
+			if score and score > results.get(key, (0,))[0]:
+				results[key] = (score, row)
+		if len(rows) < CANDIDATE_LIMIT or len(results) >= int(limit):
+			break
+
+	ranked = sorted(
+		results.values(),
+		key=lambda result: (-result[0], len(result[1].label or ""), result[1].label or ""),
+	)
+	return [
+		frappe._dict(doctype=row.reference_doctype, name=row.reference_name, label=row.label, email=row.email)
+		for _score, row in ranked[: int(limit)]
+	]
+
+
+def get_candidates(token: str, doctypes: list[str], start: int) -> list[frappe._dict]:
+	"""
+	Index rows with a token starting with `token`, in index order so the database stops at the
+	limit instead of sorting every match. The exact token sorts first, `search` ranks the rest.
+	"""
+	Entry = frappe.qb.DocType("CRM Typeahead Entry")
+	return (
+		frappe.qb.from_(Entry)
+		.select(Entry.token, Entry.reference_doctype, Entry.reference_name, Entry.label, Entry.email)
+		.where(Entry.token.like(f"{token}%"))
+		.where(Entry.reference_doctype.isin(doctypes))
+		.orderby(Entry.token)
+		.orderby(Entry.reference_doctype)
+		.orderby(Entry.name)
+		.offset(start)
+		.limit(CANDIDATE_LIMIT)
+	).run(as_dict=True)
+
+
+def filter_permitted(rows: list[frappe._dict]) -> list[frappe._dict]:
+	"""Rows of records the user can read, disabled contacts left out"""
+	names = {}
+	for row in rows:
+		names.setdefault(row.reference_doctype, set()).add(row.reference_name)
+
+	permitted = set()
+	for doctype, docnames in names.items():
+		filters = [[doctype, "name", "in", list(docnames)], *get_record_filters(doctype)]
+		permitted.update((doctype, name) for name in frappe.get_list(doctype, filters=filters, pluck="name"))
+	return [row for row in rows if (row.reference_doctype, row.reference_name) in permitted]
+
+
+def get_record_filters(doctype: str) -> list[list]:
+	"""Filters leaving out records that should not be suggested, such as disabled contacts"""
+	meta = frappe.get_meta(doctype)
+	filters = []
+	if meta.get("fields", {"fieldname": "enabled", "fieldtype": "Check"}):
+		filters.append([doctype, "enabled", "=", 1])
+	if meta.get("fields", {"fieldname": "disabled", "fieldtype": "Check"}):
+		filters.append([doctype, "disabled", "!=", 1])
+	return filters
+
+
+def get_score(words: list[str], row) -> int:
+	"""
+	0 if a word of the query starts no word of the entry, otherwise higher for exact words and
+	for queries matching the start of the label or email
+	"""
+	label = normalize(row.label)
+	email = normalize(row.email)
+	tokens = tokenize(f"{row.label or ''} {row.email or ''}")
+
+	score = 1
+	for word in words:
+		if word in tokens:
+			score += 2
+		elif any(token.startswith(word) for token in tokens):
+			score += 1
+		else:
+			return 0
+
+	query = " ".join(words)
+	if label.startswith(query) or email.startswith(query):
+		score += 3
+	return score
+
+
+def normalize(text: str | None) -> str:
+	"""Lowercase `text` with accents stripped, so `Zoë` is found by `zoe`"""
+	if not text:
+		return ""
+	text = unicodedata.normalize("NFKD", text)
+	return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: str | None) -> list[str]:
+	"""Words of `text` after `normalize`, letters and digits only, in order and without repeats"""
+	tokens = re.findall(r"[^\W_]+", normalize(text))
+	return list(dict.fromkeys(token[:MAX_TOKEN_LENGTH] for token in tokens))
+
+
+def update_index(doc, method=None):
+	"""Reindex a saved Contact, CRM Lead or CRM Organization, if its searchable values changed"""
+	before = doc.get_doc_before_save()
+	entries = get_entries(doc)
+	if before and get_entries(before) == entries:
+		return
+	remove_from_index(doc)
+	insert_entries(doc.doctype, doc.name, entries)
+
+
+def remove_from_index(doc, method=None):
+	frappe.db.delete("CRM Typeahead Entry", {"reference_doctype": doc.doctype, "reference_name": doc.name})
+
+
+def remove_contact_email(doc, method=None):
+	"""A Contact Email deleted on its own leaves its contact unsaved"""
+	if doc.parenttype == "Contact":
+		frappe.db.delete(
+			"CRM Typeahead Entry",
+			{"reference_doctype": "Contact", "reference_name": doc.parent, "email": doc.email_id},
+		)
+
+
+def get_entries(doc) -> list[tuple[str, str]]:
+	"""(label, email) pairs the record is found by"""
+	if doc.doctype == "Contact":
+		label = doc.get("full_name") or doc.name
+		emails = [row.email_id for row in doc.get("email_ids") or [] if row.email_id]
+		return [(label, email) for email in emails] or [(label, "")]
+	if doc.doctype == "CRM Lead":
+		return [(doc.get("lead_name") or doc.get("organization") or doc.name, doc.get("email") or "")]
+	return [(doc.get("organization_name") or doc.name, "")]
+
+
+def insert_entries(doctype: str, name: str, entries: list[tuple[str, str]]):
+	insert_rows(get_rows(doctype, name, entries))
+
+
+def get_rows(doctype: str, name: str, entries: list[tuple[str, str]]) -> list[tuple]:
+	now = now_datetime()
+	user = frappe.session.user
+	return [
+		(frappe.generate_hash(length=12), now, now, user, user, token, doctype, name, label, email)
+		for label, email in entries
+		for token in tokenize(f"{label} {email}")
+	]
+
+
+def insert_rows(rows: list[tuple]):
+	if rows:
+		frappe.db.bulk_insert("CRM Typeahead Entry", ENTRY_FIELDS, rows)
+
+
+def rebuild_index(doctypes=None, chunk_size=REBUILD_CHUNK_SIZE):
+	"""Drop and rebuild the index for `doctypes`, a chunk of records at a time"""
+	for doctype in doctypes or INDEXED_DOCTYPES:
+		frappe.db.delete("CRM Typeahead Entry", {"reference_doctype": doctype})
+		frappe.db.commit()
+
+		for records in iter_records(doctype, chunk_size):
+			rows = []
+			for record in records:
+				rows.extend(get_rows(doctype, record.name, get_entries(record)))
+			insert_rows(rows)
+			frappe.db.commit()
+
+
+def iter_records(doctype: str, chunk_size: int):
+	"""Records as `get_entries` reads them, a chunk at a time ordered by name"""
+	fields = {
+		"Contact": ["name", "full_name"],
+		"CRM Lead": ["name", "lead_name", "organization", "email"],
+		"CRM Organization": ["name", "organization_name"],
+	}[doctype]
+
+	last_name = ""
+	while True:
+		records = frappe.get_all(
+			doctype,
+			filters={"name": (">", last_name)},
+			fields=fields,
+			order_by="name asc",
+			limit=chunk_size,
+		)
+		if not records:
+			return
+
+		for record in records:
+			record.doctype = doctype
+		if doctype == "Contact":
+			emails = frappe.get_all(
+				"Contact Email",
+				filters={"parenttype": "Contact", "parent": ("in", [r.name for r in records])},
+				fields=["parent", "email_id"],
+				order_by="idx asc",
+			)
+			by_contact = {}
+			for email in emails:
+				by_contact.setdefault(email.parent, []).append(email)
+			for record in records:
+				record.email_ids = by_contact.get(record.name, [])
+
+		yield records
+		last_name = records[-1].name
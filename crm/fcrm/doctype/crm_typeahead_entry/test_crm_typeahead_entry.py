@@ -0,0 +1,78 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.permissions import add_user_permission
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry import (
+	filter_permitted,
+	get_candidates,
+	get_score,
+	search,
+	tokenize,
+)
+
+
+class TestCRMTypeaheadEntry(UnitTestCase):
+	def test_tokenize(self):
+		self.assertEqual(tokenize("Zoë O'Brien"), ["zoe", "o", "brien"])
+		self.assertEqual(tokenize("john.smith_2@Example.com"), ["john", "smith", "2", "example", "com"])
+		self.assertEqual(tokenize("Anna anna"), ["anna"])
+		self.assertEqual(tokenize(None), [])
+
+	def test_score(self):
+		row = frappe._dict(label="John Smith", email="jsmith@example.com")
+		self.assertFalse(get_score(["john", "doe"], row))
+		self.assertGreater(get_score(["john"], row), get_score(["smith"], row))
+		self.assertGreater(get_score(["smith"], row), get_score(["smi"], row))
+		self.assertTrue(get_score(["exam", "js"], row))
+
+
+class IntegrationTestCRMTypeaheadEntry(IntegrationTestCase):
+	def test_candidates_in_token_order(self):
+		prefix = f"tq{frappe.generate_hash(length=8)}"
+		for label in (f"{prefix}b Beta", f"{prefix} Alpha", f"{prefix}a Gamma"):
+			make_contact(label)
+
+		rows = get_candidates(prefix, ["Contact"], 0)
+		self.assertEqual([row.token for row in rows], [prefix, f"{prefix}a", f"{prefix}b"])
+		self.assertEqual(get_candidates(prefix, ["Contact"], 3), [])
+
+	def test_unreadable_records_are_left_out(self):
+		prefix = f"tq{frappe.generate_hash(length=8)}"
+		visible = make_contact(f"{prefix} Visible")
+		hidden = make_contact(f"{prefix} Hidden")
+		user = make_user()
+		# the user may only read the visible contact
+		add_user_permission("Contact", visible.name, user)
+
+		rows = get_candidates(prefix, ["Contact"], 0)
+		self.assertEqual({row.reference_name for row in rows}, {visible.name, hidden.name})
+		with self.set_user(user):
+			self.assertEqual([row.reference_name for row in filter_permitted(rows)], [visible.name])
+			self.assertEqual([result.name for result in search(prefix)], [visible.name])
+
+
+def make_contact(full_name):
+	first_name, last_name = full_name.split(" ", 1)
+	contact = frappe.new_doc("Contact")
+	contact.first_name = first_name
+	contact.last_name = last_name
+	return contact.insert(ignore_permissions=True)
+
+
+def make_user():
+	return (
+		frappe.get_doc(
+			{
+				"doctype": "User",
+				"email": f"typeahead.{frappe.generate_hash(length=8)}@example.com",
+				"first_name": "Typeahead",
+				"send_welcome_email": 0,
+				"roles": [{"role": "Sales User"}],
+			}
+		)
+		.insert(ignore_permissions=True)
+		.name
+	)
@@ -141,6 +141,41 @@ override_doctype_class = {
 doc_events = {
 	"Contact": {
 		"validate": ["crm.api.contact.validate"],
+		"on_update": [
+			"crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry.update_index",
+			"crm.fcrm.doctype.crm_search_entry.crm_search_entry.update_index",
+			"crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key.update_keys",
+		],
+		"on_trash": [
+			"crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry.remove_from_index",
+			"crm.fcrm.doctype.crm_search_entry.crm_search_entry.remove_from_index",
+			"crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key.remove_keys",
+		],
+	},
+	"Contact Email": {
+		"on_trash": ["crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry.remove_contact_email"],
+	},
+	"CRM Lead": {
+		"on_update": [
+			"crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry.update_index",
+			"crm.fcrm.doctype.crm_search_entry.crm_search_entry.update_index",
+			"crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key.update_keys",
+		],
+		"on_trash": [
+			"crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry.remove_from_index",
+			"crm.fcrm.doctype.crm_search_entry.crm_search_entry.remove_from_index",
+			"crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key.remove_keys",
+		],
+	},
+	"CRM Organization": {
+		"on_update": [
+			"crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry.update_index",
+			"crm.fcrm.doctype.crm_search_entry.crm_search_entry.update_index",
+		],
+		"on_trash": [
+			"crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry.remove_from_index",
+			"crm.fcrm.doctype.crm_search_entry.crm_search_entry.remove_from_index",
+		],
 	},
 	"ToDo": {
 		"after_insert": ["crm.api.todo.after_insert"],
@@ -155,8 +190,18 @@ doc_events = {
 	},
 	"CRM Deal": {
 		"on_update": [
-			"crm.fcrm.doctype.erpnext_crm_settings.erpnext_crm_settings.create_customer_in_erpnext"
+			"crm.fcrm.doctype.erpnext_crm_settings.erpnext_crm_settings.create_customer_in_erpnext",
+			"crm.fcrm.doctype.crm_search_entry.crm_search_entry.update_index",
 		],
+		"on_trash": ["crm.fcrm.doctype.crm_search_entry.crm_search_entry.remove_from_index"],
+	},
+	"FCRM Note": {
+		"on_update": ["crm.fcrm.doctype.crm_search_entry.crm_search_entry.update_index"],
+		"on_trash": ["crm.fcrm.doctype.crm_search_entry.crm_search_entry.remove_from_index"],
+	},
+	"Communication": {
+		"on_update": ["crm.fcrm.doctype.crm_search_entry.crm_search_entry.update_index"],
+		"on_trash": ["crm.fcrm.doctype.crm_search_entry.crm_search_entry.remove_from_index"],
 	},
 	"User": {
 		"before_validate": ["crm.api.demo.validate_user"],
@@ -167,23 +212,21 @@ doc_events = {
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# "all": [
-# "crm.tasks.all"
-# ],
-# "daily": [
-# "crm.tasks.daily"
-# ],
-# "hourly": [
-# "crm.tasks.hourly"
-# ],
-# "weekly": [
-# "crm.tasks.weekly"
-# ],
-# "monthly": [
-# "crm.tasks.monthly"
-# ],
-# }
+scheduler_events = {
+	"cron": {
+		"* * * * *": [
+			"crm.integrations.webhook_log.flush_webhook_logs",
+			"crm.fcrm.doctype.crm_notification.crm_notification.flush_notification_buffer",
+		],
+		"*/5 * * * *": ["crm.fcrm.doctype.crm_service_level_agreement.utils.mark_overdue_slas"],
+	},
+	"hourly": ["crm.fcrm.doctype.crm_lead_assignment_rule.crm_lead_assignment_rule.clear_agent_load"],
+	"daily": ["crm.fcrm.doctype.crm_notification.crm_notification.send_notification_digests"],
+	"daily_long": [
+		"crm.integrations.webhook_log.delete_old_webhook_logs",
+		"crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key.cluster_duplicates",
+	],
+}
 
 # Testing
 # -------
@@ -43,10 +43,12 @@ def add_default_lead_statuses():
 		"Unqualified": {
 			"color": "red",
 			"position": 5,
+			"is_closed": 1,
 		},
 		"Junk": {
 			"color": "purple",
 			"position": 6,
+			"is_closed": 1,
 		},
 	}
 
@@ -58,6 +60,7 @@ def add_default_lead_statuses():
 		doc.lead_status = status
 		doc.color = statuses[status]["color"]
 		doc.position = statuses[status]["position"]
+		doc.is_closed = statuses[status].get("is_closed", 0)
 		doc.insert()
 
 
@@ -1,5 +1,7 @@
 import frappe
+import phonenumbers
 from frappe.query_builder import Order
+from pypika import Criterion
 from pypika.functions import Replace
 
 from crm.utils import are_same_phone_number, parse_phone_number
@@ -119,14 +121,7 @@ def get_contact(phone_number, exact_match=False):
 	if not phone_number:
 		return {"mobile_no": phone_number}
 
-	cleaned_number = (
-		phone_number.strip()
-		.replace(" ", "")
-		.replace("-", "")
-		.replace("(", "")
-		.replace(")", "")
-		.replace("+", "")
-	)
+	cleaned_number = clean_phone_number(phone_number)
 
 	# Check if the number is associated with a contact
 	Contact = frappe.qb.DocType("Contact")
@@ -179,3 +174,146 @@ def get_contact(phone_number, exact_match=False):
 				return lead
 
 	return {"mobile_no": phone_number}
+
+
+def get_contacts_by_phone_numbers(phone_numbers):
+	"""Resolve many phone numbers to contacts/leads at once.
+
+	Batched counterpart of `get_contact_by_phone_number`, used while rendering call log lists.
+	Every distinct number is parsed once and all candidates are fetched with a single query per
+	doctype instead of one round trip per row.
+
+	:param phone_numbers: Iterable of raw phone numbers
+	:return: Dict of phone number -> contact, same shape as `get_contact_by_phone_number`
+	"""
+	lookups = {}
+	for phone_number in set(phone_numbers):
+		if not phone_number:
+			continue
+		number = parse_phone_number(phone_number)
+		if number.get("is_valid"):
+			lookups[phone_number] = frappe._dict(search=number.get("national_number"), exact_match=False)
+		else:
+			lookups[phone_number] = frappe._dict(search=phone_number, exact_match=True)
+
+	for phone_number, lookup in list(lookups.items()):
+		lookup.cleaned = clean_phone_number(lookup.search)
+		if not lookup.cleaned:
+			del lookups[phone_number]
+
+	res = {phone_number: {"mobile_no": phone_number} for phone_number in phone_numbers}
+	if not lookups:
+		return res
+
+	matcher = PhoneNumberMatcher()
+
+	contacts = get_matching_records("Contact", ["full_name"], lookups)
+	primary_deals = {}
+	if contacts:
+		primary_deals = dict(
+			frappe.get_all(
+				"CRM Contacts",
+				filters={"contact": ("in", list({c.name for c in contacts})), "is_primary": 1},
+				fields=["contact", "parent"],
+				as_list=True,
+			)
+		)
+
+	unresolved = {}
+	for phone_number, lookup in lookups.items():
+		candidates = [c for c in contacts if lookup.cleaned in c._normalized]
+		contact = None
+		for candidate in candidates:
+			if candidate.name in primary_deals and matcher.same(
+				candidate.mobile_no, phone_number, validate=not lookup.exact_match
+			):
+				contact = {**candidate, "deal": primary_deals[candidate.name]}
+				break
+		if not contact and candidates:
+			if matcher.same(candidates[0].mobile_no, phone_number, validate=not lookup.exact_match):
+				contact = {**candidates[0]}
+
+		if contact:
+			contact.pop("_normalized", None)
+			res[phone_number] = contact
+		else:
+			unresolved[phone_number] = lookup
+
+	if not unresolved:
+		return res
+
+	leads = get_matching_records("CRM Lead", ["lead_name"], unresolved, {"converted": 0})
+	for phone_number, lookup in unresolved.items():
+		for lead in leads:
+			if lookup.cleaned not in lead._normalized:
+				continue
+			if matcher.same(lead.mobile_no, phone_number, validate=not lookup.exact_match):
+				lead = {**lead, "lead": lead.name, "full_name": lead.lead_name}
+				lead.pop("_normalized", None)
+				res[phone_number] = lead
+				break
+
+	return res
+
+
+def get_matching_records(doctype, fields, lookups, filters=None):
+	"""Fetch records of `doctype` whose mobile no contains any of the cleaned lookup numbers."""
+	Table = frappe.qb.DocType(doctype)
+	normalized_phone = Replace(
+		Replace(Replace(Replace(Replace(Table.mobile_no, " ", ""), "-", ""), "(", ""), ")", ""), "+", ""
+	)
+
+	query = (
+		frappe.qb.from_(Table)
+		.select(Table.name, Table.image, Table.mobile_no, *[Table[f] for f in fields])
+		.where(Criterion.any([normalized_phone.like(f"%{d.cleaned}%") for d in lookups.values()]))
+		.orderby("modified", order=Order.desc)
+	)
+	for fieldname, value in (filters or {}).items():
+		query = query.where(Table[fieldname] == value)
+
+	records = query.run(as_dict=True)
+	for record in records:
+		record._normalized = clean_phone_number(record.mobile_no or "")
+	return records
+
+
+def clean_phone_number(phone_number):
+	return (
+		phone_number.strip()
+		.replace(" ", "")
+		.replace("-", "")
+		.replace("(", "")
+		.replace(")", "")
+		.replace("+", "")
+	)
+
+
+class PhoneNumberMatcher:
+	"""Memoized `are_same_phone_number`, parses every distinct number only once."""
+
+	def __init__(self, default_region="IN"):
+		self.default_region = default_region
+		self.parsed = {}
+
+	def parse(self, number):
+		if not number:
+			return None
+		if number not in self.parsed:
+			try:
+				parsed = phonenumbers.parse(number, self.default_region)
+				self.parsed[number] = (
+					phonenumbers.is_valid_number(parsed),
+					phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164),
+				)
+			except phonenumbers.NumberParseException:
+				self.parsed[number] = None
+		return self.parsed[number]
+
+	def same(self, number1, number2, validate=True):
+		parsed1, parsed2 = self.parse(number1), self.parse(number2)
+		if not (parsed1 and parsed2):
+			return False
+		if validate and not (parsed1[0] and parsed2[0]):
+			return False
+		return parsed1[1] == parsed2[1]
@@ -2,9 +2,9 @@ import bleach
 import frappe
 import requests
 from frappe import _
-from frappe.integrations.utils import create_request_log
 
 from crm.integrations.api import get_contact_by_phone_number
+from crm.integrations.webhook_log import log_webhook
 
 # Endpoints for webhook
 
@@ -23,16 +23,8 @@ def handle_request(**kwargs):
 	if not is_integration_enabled():
 		return
 
-	request_log = create_request_log(
-		kwargs,
-		request_description="Exotel Call",
-		service_name="Exotel",
-		request_headers=frappe.request.headers,
-		is_remote_request=1,
-	)
-
+	error = None
 	try:
-		request_log.status = "Completed"
 		exotel_settings = get_exotel_settings()
 		if not exotel_settings.enabled:
 			return
@@ -56,14 +48,12 @@ def handle_request(**kwargs):
 				agent=call_payload.get("AgentEmail"),
 			)
 	except Exception:
-		request_log.status = "Failed"
-		request_log.error = frappe.get_traceback()
+		error = frappe.get_traceback()
 		frappe.db.rollback()
 		frappe.log_error(title="Error while creating/updating call record")
 		frappe.db.commit()
 	finally:
-		request_log.save(ignore_permissions=True)
-		frappe.db.commit()
+		log_webhook("Exotel", kwargs, status="Failed" if error else "Completed", error=error)
 
 
 # Outgoing Call
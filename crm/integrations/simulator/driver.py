@@ -0,0 +1,271 @@
+"""
+Telephony load-test harness.
+
+Replays realistic Twilio/Exotel webhook traffic against the real handlers, with the remote
+APIs replaced by the offline stand-ins in `crm.integrations.simulator.stubs`. Meant for
+development sites only, generated call logs are removed afterwards unless `cleanup` is off.
+
+Usage:
+	bench --site crm.localhost execute crm.integrations.simulator.driver.run \
+		--kwargs "{'calls': 200, 'concurrency': 16, 'provider': 'Mixed', 'out_of_order': 0.2}"
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe.utils import cint, now_datetime
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+from crm.integrations.exotel import handler as exotel_handler
+from crm.integrations.simulator.scenarios import build_call, shuffle_deliveries
+from crm.integrations.simulator.stubs import EXOTEL_WEBHOOK_TOKEN, RemoteCallRegistry, simulate
+from crm.integrations.twilio import api as twilio_api
+from crm.utils.benchmark import count_queries, percentile, to_ms
+
+ENDPOINTS = {
+	"voice": twilio_api.voice,
+	"twilio_incoming_call_handler": twilio_api.twilio_incoming_call_handler,
+	"update_call_status_info": twilio_api.update_call_status_info,
+	"update_recording_info": twilio_api.update_recording_info,
+	"handle_request": exotel_handler.handle_request,
+	"make_a_call": exotel_handler.make_a_call,
+}
+
+
+def run(
+	calls=50,
+	concurrency=8,
+	provider="Mixed",
+	agent=None,
+	out_of_order=0.1,
+	duplicates=0.1,
+	seed=None,
+	cleanup=True,
+):
+	"""
+	Simulate `calls` concurrent calls and report webhook latency, DB queries per webhook and
+	whether every call log ended up in the state the provider last reported.
+
+	:param provider: `Twilio`, `Exotel` or `Mixed`
+	:param agent: User receiving/making the calls, defaults to Administrator
+	:param out_of_order: Probability of a callback being delivered after the next one
+	:param duplicates: Probability of a callback being delivered twice
+	:param seed: Seed to replay the exact same traffic
+	"""
+	calls, concurrency = cint(calls), cint(concurrency) or 1
+	agent = agent or "Administrator"
+	seed = seed if seed is not None else random.randrange(1 << 32)
+	rng = random.Random(seed)
+	prefix = f"SIM{frappe.generate_hash(length=6).upper()}"
+
+	scenarios = []
+	for i in range(calls):
+		call_provider = rng.choice(["Twilio", "Exotel"]) if provider == "Mixed" else provider
+		direction = rng.choice(["Incoming", "Outgoing"])
+		sid = f"{prefix}{i:06d}"
+		events, expected = build_call(sid, call_provider, direction, agent, rng, now_datetime())
+		events = shuffle_deliveries(events, rng, float(out_of_order), float(duplicates))
+		scenarios.append(frappe._dict(sid=sid, provider=call_provider, events=events, expected=expected))
+
+	registry = RemoteCallRegistry()
+	metrics = Metrics()
+	site, sites_path = frappe.local.site, frappe.local.sites_path
+	frappe.db.commit()
+
+	started = time.perf_counter()
+	with simulate(registry):
+		with ThreadPoolExecutor(
+			max_workers=concurrency, initializer=connect, initargs=(site, sites_path)
+		) as executor:
+			for _ in executor.map(lambda s: play(s, registry, metrics), scenarios):
+				pass
+		disconnect()
+	elapsed = time.perf_counter() - started
+
+	frappe.db.rollback()
+	report = metrics.report()
+	report.update(
+		{
+			"seed": seed,
+			"prefix": prefix,
+			"calls": calls,
+			"concurrency": concurrency,
+			"provider": provider,
+			"elapsed": round(elapsed, 3),
+			"webhooks_per_second": round(metrics.total / elapsed, 2) if elapsed else 0,
+			"background_jobs": count_jobs(registry),
+			"correctness": verify(scenarios),
+		}
+	)
+
+	if cint(cleanup):
+		delete_simulated_records(prefix)
+
+	return report
+
+
+_connections = []
+
+
+def connect(site, sites_path):
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	count_queries(frappe.db)
+	_connections.append(frappe.db)
+
+
+def disconnect():
+	while _connections:
+		_connections.pop().close()
+
+
+def play(scenario, registry: RemoteCallRegistry, metrics: "Metrics"):
+	for event in scenario.events:
+		if event.remote is not None:
+			registry.advance(scenario.sid, event.seq, **event.remote)
+		if event.endpoint == "make_a_call":
+			registry.expect_outgoing_call(event.kwargs["to_number"], scenario.sid)
+		deliver(event, scenario.provider, metrics)
+
+
+def deliver(event, provider, metrics: "Metrics"):
+	"""Process one webhook the way a request would: as Guest, then commit or roll back."""
+	frappe.set_user(event.user or "Guest")
+	frappe.local.form_dict = frappe._dict(event.kwargs)
+	frappe.local.request = make_request(event)
+	frappe.db.query_count = 0
+
+	failed = False
+	started = time.perf_counter()
+	try:
+		ENDPOINTS[event.endpoint](**event.kwargs)
+		frappe.db.commit()
+	except Exception:
+		failed = True
+		frappe.db.rollback()
+	latency = time.perf_counter() - started
+
+	metrics.add(f"{provider}.{event.endpoint}", latency, frappe.db.query_count, failed)
+
+
+def make_request(event):
+	path = f"/api/method/{ENDPOINTS[event.endpoint].__module__}.{event.endpoint}"
+	builder = EnvironBuilder(
+		method="POST",
+		path=path,
+		query_string={"key": EXOTEL_WEBHOOK_TOKEN},
+		data={k: v for k, v in event.kwargs.items() if v is not None},
+	)
+	try:
+		return Request(builder.get_environ())
+	finally:
+		builder.close()
+
+
+def verify(scenarios):
+	"""Compare final call log state against what the provider reported last."""
+	sids = [s.sid for s in scenarios]
+	actual = {
+		d.name: d
+		for d in frappe.get_all(
+			"CRM Call Log",
+			filters={"name": ("in", sids)},
+			fields=["name", "status", "duration", "recording_url"],
+		)
+	}
+
+	mismatches = []
+	for scenario in scenarios:
+		call_log = actual.get(scenario.sid)
+		if not call_log:
+			mismatches.append({"sid": scenario.sid, "error": "missing call log"})
+			continue
+
+		expected = scenario.expected
+		diff = {}
+		if call_log.status != expected.status:
+			diff["status"] = (call_log.status, expected.status)
+		if cint(call_log.duration) != cint(expected.duration):
+			diff["duration"] = (call_log.duration, expected.duration)
+		if (call_log.recording_url or "") != expected.recording_url:
+			diff["recording_url"] = (call_log.recording_url, expected.recording_url)
+		if diff:
+			mismatches.append({"sid": scenario.sid, "provider": scenario.provider, **diff})
+
+	return {
+		"checked": len(scenarios),
+		"correct": len(scenarios) - len(mismatches),
+		"mismatches": mismatches[:50],
+	}
+
+
+def count_jobs(registry: RemoteCallRegistry):
+	jobs = defaultdict(int)
+	for job in registry.jobs:
+		method = (
+			job.method if isinstance(job.method, str) else f"{job.method.__module__}.{job.method.__name__}"
+		)
+		jobs[method] += 1
+	return dict(jobs)
+
+
+def delete_simulated_records(prefix):
+	frappe.db.delete("Dynamic Link", {"parenttype": "CRM Call Log", "parent": ("like", f"{prefix}%")})
+	frappe.db.delete("CRM Call Log", {"name": ("like", f"{prefix}%")})
+	frappe.db.delete(
+		"Integration Request",
+		{"integration_request_service": "Exotel", "data": ("like", f"%{prefix}%")},
+	)
+	frappe.db.commit()
+
+
+class Metrics:
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.latencies = defaultdict(list)
+		self.queries = defaultdict(list)
+		self.errors = defaultdict(int)
+		self.total = 0
+
+	def add(self, endpoint, latency, queries, failed=False):
+		with self.lock:
+			self.latencies[endpoint].append(latency)
+			self.queries[endpoint].append(queries)
+			self.errors[endpoint] += int(failed)
+			self.total += 1
+
+	def report(self):
+		endpoints = {}
+		for endpoint, latencies in sorted(self.latencies.items()):
+			queries = self.queries[endpoint]
+			endpoints[endpoint] = {
+				"count": len(latencies),
+				"errors": self.errors[endpoint],
+				"latency_ms": {
+					"p50": to_ms(percentile(latencies, 50)),
+					"p95": to_ms(percentile(latencies, 95)),
+					"p99": to_ms(percentile(latencies, 99)),
+					"max": to_ms(max(latencies)),
+				},
+				"queries": {
+					"avg": round(sum(queries) / len(queries), 2),
+					"p95": percentile(queries, 95),
+					"max": max(queries),
+				},
+			}
+
+		latencies = [latency for values in self.latencies.values() for latency in values]
+		return {
+			"webhooks": self.total,
+			"latency_ms": {
+				"p50": to_ms(percentile(latencies, 50)),
+				"p95": to_ms(percentile(latencies, 95)),
+				"p99": to_ms(percentile(latencies, 99)),
+			},
+			"endpoints": endpoints,
+		}
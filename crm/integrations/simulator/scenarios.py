@@ -0,0 +1,233 @@
+"""
+Webhook sequences of simulated calls.
+
+Every call is described by the events its provider would deliver, in the order they
+happened, and by the call log state that has to exist once all of them are processed.
+"""
+
+import random
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+import frappe
+
+from crm.integrations.simulator.stubs import (
+	EXOTEL_EXOPHONES,
+	TWILIO_ACCOUNT_SID,
+	TWILIO_APPLICATION_SID,
+	to_utc,
+)
+from crm.integrations.twilio.twilio_handler import Twilio, TwilioCallDetails
+
+TWILIO_OUTCOMES = {"completed": 70, "no-answer": 15, "busy": 10, "failed": 5}
+EXOTEL_INCOMING_OUTCOMES = {
+	("completed", "completed"): 70,
+	("incomplete", "no-answer"): 15,
+	("client-hangup", "canceled"): 10,
+	("incomplete", "failed"): 5,
+}
+EXOTEL_OUTGOING_OUTCOMES = {"completed": 75, "no-answer": 15, "failed": 10}
+EXOTEL_STATUS = {
+	"completed": "Completed",
+	"no-answer": "No Answer",
+	"canceled": "Canceled",
+	"failed": "Failed",
+}
+
+
+class Event(frappe._dict):
+	"""
+	A single webhook delivery.
+
+	`endpoint` is the handler to call, `kwargs` the form data sent by the provider, `seq` the
+	position of the event in the real timeline and `remote` the provider side state of the call
+	at that point.
+	"""
+
+
+def build_call(sid, provider, direction, agent, rng: random.Random, started_at: datetime):
+	contact_number = "+9198" + "".join(rng.choice("0123456789") for _ in range(8))
+	if provider == "Twilio":
+		return twilio_call(sid, direction, agent, contact_number, rng, started_at)
+	return exotel_call(sid, direction, agent, contact_number, rng, started_at)
+
+
+def twilio_call(sid, direction, agent, contact_number, rng, started_at):
+	outcome = pick(rng, TWILIO_OUTCOMES)
+	duration = rng.randint(5, 900) if outcome == "completed" else 0
+	ended_at = started_at + timedelta(seconds=duration + rng.randint(5, 30))
+	twilio_number = "+15005550006"
+
+	if direction == "Outgoing":
+		create = Event(
+			endpoint="voice",
+			kwargs={
+				"AccountSid": TWILIO_ACCOUNT_SID,
+				"ApplicationSid": TWILIO_APPLICATION_SID,
+				"CallSid": sid,
+				"Caller": f"client:{Twilio.safe_identity(agent)}",
+				"From": f"client:{Twilio.safe_identity(agent)}",
+				"To": contact_number,
+				"CallStatus": "ringing",
+				"Direction": "inbound",
+			},
+		)
+	else:
+		create = Event(
+			endpoint="twilio_incoming_call_handler",
+			kwargs={
+				"AccountSid": TWILIO_ACCOUNT_SID,
+				"CallSid": sid,
+				"Caller": contact_number,
+				"From": contact_number,
+				"To": twilio_number,
+				"CallStatus": "ringing",
+				"Direction": "inbound",
+			},
+		)
+	create.remote = {"status": "ringing", "start_time": started_at}
+
+	statuses = [("initiated", started_at), ("ringing", started_at + timedelta(seconds=1))]
+	if outcome == "completed":
+		statuses.append(("in-progress", started_at + timedelta(seconds=rng.randint(2, 20))))
+	statuses.append((outcome, ended_at))
+
+	callbacks = []
+	for status, timestamp in statuses:
+		is_final = status == outcome
+		remote = {"status": status}
+		if is_final:
+			remote.update(duration=duration, end_time=ended_at)
+		callbacks.append(
+			Event(
+				endpoint="update_call_status_info",
+				kwargs={
+					"AccountSid": TWILIO_ACCOUNT_SID,
+					"ParentCallSid": sid,
+					"CallSid": sid + "C",
+					"CallStatus": status,
+					"CallDuration": str(duration) if is_final else None,
+					"Timestamp": format_datetime(to_utc(timestamp)),
+					"From": create.kwargs["From"],
+					"To": create.kwargs["To"],
+				},
+				remote=remote,
+			)
+		)
+
+	recording_url = ""
+	if outcome == "completed":
+		recording_url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Recordings/RE{sid}"
+		callbacks.append(
+			Event(
+				endpoint="update_recording_info",
+				kwargs={
+					"AccountSid": TWILIO_ACCOUNT_SID,
+					"CallSid": sid,
+					"RecordingSid": "RE" + sid,
+					"RecordingUrl": recording_url,
+					"RecordingStatus": "completed",
+					"RecordingDuration": str(duration),
+				},
+				remote={},
+			)
+		)
+
+	expected = frappe._dict(
+		status=TwilioCallDetails.get_call_status(outcome),
+		duration=duration,
+		recording_url=recording_url,
+	)
+	return [create, *callbacks], expected
+
+
+def exotel_call(sid, direction, agent, contact_number, rng, started_at):
+	agent_number = "+9197" + "".join(rng.choice("0123456789") for _ in range(8))
+	exophone = EXOTEL_EXOPHONES[0]
+	start_time = started_at.strftime("%Y-%m-%d %H:%M:%S")
+
+	if direction == "Incoming":
+		call_type, dial_call_status = pick(rng, EXOTEL_INCOMING_OUTCOMES)
+		duration = rng.randint(5, 900) if dial_call_status == "completed" else 0
+		common = {
+			"CallSid": sid,
+			"CallFrom": contact_number,
+			"To": exophone,
+			"DialWhomNumber": agent_number,
+			"Direction": "incoming",
+			"AgentEmail": agent,
+		}
+		create = Event(
+			endpoint="handle_request",
+			kwargs={**common, "CallType": "call-attempt", "StartTime": start_time},
+		)
+		final_status = dial_call_status
+		final = {**common, "CallType": call_type, "DialCallStatus": dial_call_status}
+	else:
+		final_status = pick(rng, EXOTEL_OUTGOING_OUTCOMES)
+		duration = rng.randint(5, 900) if final_status == "completed" else 0
+		common = {
+			"CallSid": sid,
+			"CallFrom": agent_number,
+			"To": contact_number,
+			"Direction": "outbound-api",
+		}
+		create = Event(
+			endpoint="make_a_call",
+			kwargs={"to_number": contact_number, "from_number": agent_number, "caller_id": exophone},
+			user=agent,
+		)
+		final = {**common, "Status": final_status}
+
+	ended_at = started_at + timedelta(seconds=duration + rng.randint(5, 30))
+	recording_url = f"https://recordings.exotel.local/{sid}.mp3" if duration else ""
+	final.update(
+		{
+			"DialCallDuration": str(duration),
+			"RecordingUrl": recording_url,
+			"StartTime": start_time,
+			"EndTime": ended_at.strftime("%Y-%m-%d %H:%M:%S"),
+		}
+	)
+
+	callbacks = []
+	if direction == "Outgoing" and final_status == "completed":
+		callbacks.append(Event(endpoint="handle_request", kwargs={**common, "Status": "in-progress"}))
+	callbacks.append(Event(endpoint="handle_request", kwargs=final))
+	# agent is freed once the call is over, exotel reports it on the same webhook
+	callbacks.append(Event(endpoint="handle_request", kwargs={**common, "Status": "free"}))
+
+	expected = frappe._dict(
+		status=EXOTEL_STATUS[final_status],
+		duration=duration,
+		recording_url=recording_url,
+	)
+	return [create, *callbacks], expected
+
+
+def shuffle_deliveries(events, rng: random.Random, out_of_order=0.0, duplicates=0.0):
+	"""
+	Turn the real timeline of a call into the order webhooks arrive in.
+
+	The first event always stays first, it is the request that creates the call at the
+	provider. Later callbacks are swapped with their neighbour with `out_of_order` probability
+	and redelivered once more, at a random later point, with `duplicates` probability.
+	"""
+	for seq, event in enumerate(events):
+		event.seq = seq
+
+	head, callbacks = events[:1], list(events[1:])
+	for i in range(len(callbacks) - 1):
+		if rng.random() < out_of_order:
+			callbacks[i], callbacks[i + 1] = callbacks[i + 1], callbacks[i]
+
+	for event in list(callbacks):
+		if rng.random() < duplicates:
+			position = callbacks.index(event) + 1
+			callbacks.insert(rng.randint(position, len(callbacks)), Event(event, duplicate=True))
+
+	return head + callbacks
+
+
+def pick(rng: random.Random, weighted: dict):
+	return rng.choices(list(weighted), weights=list(weighted.values()))[0]
@@ -0,0 +1,185 @@
+"""
+Offline stand-ins for the Twilio and Exotel REST APIs.
+
+Only the remote side is replaced, webhooks are still processed by the real handlers in
+`crm.integrations.twilio.api` and `crm.integrations.exotel.handler`.
+"""
+
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import frappe
+
+from crm.integrations.exotel import handler as exotel_handler
+from crm.integrations.twilio.twilio_handler import Twilio
+
+TWILIO_ACCOUNT_SID = "ACsimulator"
+TWILIO_APPLICATION_SID = "APsimulator"
+EXOTEL_WEBHOOK_TOKEN = "simulator"
+EXOTEL_EXOPHONES = ["+918000000000"]
+
+
+class RemoteCallRegistry:
+	"""State of every simulated call as the telephony provider sees it."""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.calls = {}
+		self.messages = []
+		self.jobs = []
+		self.outgoing_sids = {}
+
+	def advance(self, sid, seq, **state):
+		"""Move the remote call forward, events delivered late never move it back."""
+		with self.lock:
+			call = self.calls.setdefault(sid, frappe._dict(seq=-1))
+			if seq > call.seq:
+				call.update(state, seq=seq)
+
+	def fetch(self, sid):
+		with self.lock:
+			call = self.calls.get(sid) or frappe._dict()
+			return frappe._dict(
+				sid=sid,
+				status=call.get("status") or "queued",
+				duration=str(call.get("duration") or 0),
+				start_time=to_utc(call.get("start_time")),
+				end_time=to_utc(call.get("end_time")),
+			)
+
+	def add_message(self, sid, content):
+		with self.lock:
+			self.messages.append(frappe._dict(sid=sid, content=content))
+
+	def enqueue(self, method, **kwargs):
+		"""Record background jobs instead of handing them to workers that are not patched."""
+		with self.lock:
+			self.jobs.append(frappe._dict(method=method, kwargs=kwargs))
+
+	def expect_outgoing_call(self, to_number, sid):
+		with self.lock:
+			self.outgoing_sids[to_number] = sid
+
+	def pop_outgoing_call(self, to_number):
+		with self.lock:
+			return self.outgoing_sids.pop(to_number, None)
+
+
+class FakeTwilio(Twilio):
+	def __init__(self, registry):
+		self.settings = frappe._dict(record_calls=1)
+		self.account_sid = TWILIO_ACCOUNT_SID
+		self.application_sid = TWILIO_APPLICATION_SID
+		self.api_key = None
+		self.api_secret = None
+		self.twilio_client = FakeTwilioClient(registry)
+
+
+class FakeTwilioClient:
+	def __init__(self, registry):
+		self.registry = registry
+
+	def calls(self, sid):
+		return FakeTwilioCall(self.registry, sid)
+
+
+class FakeTwilioCall:
+	def __init__(self, registry, sid):
+		self.registry = registry
+		self.sid = sid
+		self.user_defined_messages = FakeUserDefinedMessages(registry, sid)
+
+	def fetch(self):
+		return self.registry.fetch(self.sid)
+
+
+class FakeUserDefinedMessages:
+	def __init__(self, registry, sid):
+		self.registry = registry
+		self.sid = sid
+
+	def create(self, content):
+		self.registry.add_message(self.sid, content)
+
+
+class FakeExotelSettings(frappe._dict):
+	def get_password(self, fieldname):
+		return "simulator"
+
+
+class FakeExotelResponse:
+	def __init__(self, data):
+		self.data = data
+
+	def raise_for_status(self):
+		pass
+
+	def json(self):
+		return self.data
+
+
+class FakeExotelAPI:
+	"""Replaces the `requests` module inside the Exotel handler."""
+
+	exceptions = exotel_handler.requests.exceptions
+
+	def __init__(self, registry):
+		self.registry = registry
+
+	def post(self, endpoint, data=None, **kwargs):
+		data = data or {}
+		sid = self.registry.pop_outgoing_call(data.get("To")) or frappe.generate_hash(length=32)
+		return FakeExotelResponse(
+			{
+				"Call": {
+					"Sid": sid,
+					"From": data.get("From"),
+					"To": data.get("To"),
+					"PhoneNumberSid": data.get("CallerId"),
+					"Status": "in-progress",
+				}
+			}
+		)
+
+	def get(self, endpoint, **kwargs):
+		return FakeExotelResponse(
+			{"incoming_phone_numbers": [{"friendly_name": n} for n in EXOTEL_EXOPHONES]}
+		)
+
+
+def validate_exotel_request():
+	if frappe.request.args.get("key") != EXOTEL_WEBHOOK_TOKEN:
+		frappe.throw("Unauthorized request", exc=frappe.PermissionError)
+
+
+@contextmanager
+def simulate(registry):
+	"""Route every outbound Twilio/Exotel API call to the local stand-ins."""
+	exotel_settings = FakeExotelSettings(
+		enabled=1,
+		api_key="simulator",
+		subdomain="api.exotel.local",
+		account_sid="simulator",
+		record_call=1,
+	)
+	with ExitStack() as stack:
+		stack.enter_context(patch.object(Twilio, "connect", lambda *args: FakeTwilio(registry)))
+		stack.enter_context(
+			patch.object(Twilio, "get_twilio_client", lambda *args: FakeTwilioClient(registry))
+		)
+		stack.enter_context(patch.object(frappe, "enqueue", registry.enqueue))
+		stack.enter_context(patch.object(exotel_handler, "requests", FakeExotelAPI(registry)))
+		stack.enter_context(patch.object(exotel_handler, "is_integration_enabled", lambda: True))
+		stack.enter_context(patch.object(exotel_handler, "get_exotel_settings", lambda: exotel_settings))
+		stack.enter_context(patch.object(exotel_handler, "validate_request", validate_exotel_request))
+		yield registry
+
+
+def to_utc(value):
+	if not value:
+		return None
+	if isinstance(value, str):
+		value = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+	return value.replace(tzinfo=timezone.utc)
@@ -2,12 +2,15 @@ import json
 
 import frappe
 from frappe import _
+from frappe.utils import cint
 from werkzeug.wrappers import Response
 
 from crm.integrations.api import get_contact_by_phone_number
 
 from .twilio_handler import IncomingCall, Twilio, TwilioCallDetails
 
+FINAL_CALL_STATUSES = ("Completed", "Busy", "No Answer", "Failed", "Canceled")
+
 
 @frappe.whitelist()
 def is_enabled():
@@ -97,35 +100,76 @@ def link(contact_number, call_log):
 		call_log.link_with_reference_doc(doctype, docname)
 
 
-def update_call_log(call_sid, status=None):
-	"""Update call log status."""
-	twilio = Twilio.connect()
-	if not (twilio and frappe.db.exists("CRM Call Log", call_sid)):
+def update_call_log(call_sid, call_info=None):
+	"""Update call log from the fields Twilio sends with a status callback."""
+	call_info = frappe._dict(call_info or {})
+	if not frappe.db.exists("CRM Call Log", call_sid):
 		return
 
 	try:
-		call_details = twilio.get_call_info(call_sid)
 		call_log = frappe.get_doc("CRM Call Log", call_sid)
-		call_log.status = TwilioCallDetails.get_call_status(status or call_details.status)
-		call_log.duration = call_details.duration
-		call_log.start_time = get_datetime_from_timestamp(call_details.start_time)
-		call_log.end_time = get_datetime_from_timestamp(call_details.end_time)
+		status = TwilioCallDetails.get_call_status(call_info.CallStatus) if call_info.CallStatus else None
+		timestamp = get_datetime_from_timestamp(parse_twilio_timestamp(call_info.Timestamp))
+
+		# callbacks can arrive out of order, a late "ringing" must not reopen a finished call
+		if status and get_status_rank(status) >= get_status_rank(call_log.status):
+			call_log.status = status
+
+		if timestamp and not call_log.start_time:
+			call_log.start_time = timestamp
+
+		is_final = status in FINAL_CALL_STATUSES
+		if is_final:
+			if call_info.CallDuration is not None:
+				call_log.duration = cint(call_info.CallDuration)
+			if timestamp:
+				call_log.end_time = timestamp
+
 		call_log.save(ignore_permissions=True)
 		frappe.db.commit()
+
+		if is_final and (call_info.CallDuration is None or not call_log.start_time or not call_log.end_time):
+			frappe.enqueue(
+				reconcile_call_log,
+				queue="short",
+				job_id=f"reconcile_twilio_call_log_{call_sid}",
+				deduplicate=True,
+				enqueue_after_commit=True,
+				call_sid=call_sid,
+			)
 		return call_log
 	except Exception:
 		frappe.log_error(title="Error while updating call record")
 		frappe.db.commit()
 
 
+def reconcile_call_log(call_sid):
+	"""Fill in the call log fields that were missing from the callbacks by fetching the call from Twilio."""
+	twilio = Twilio.connect()
+	if not (twilio and frappe.db.exists("CRM Call Log", call_sid)):
+		return
+
+	call_details = twilio.get_call_info(call_sid)
+	call_log = frappe.get_doc("CRM Call Log", call_sid)
+	if not call_log.duration and call_details.duration:
+		call_log.duration = cint(call_details.duration)
+	if not call_log.start_time and call_details.start_time:
+		call_log.start_time = get_datetime_from_timestamp(call_details.start_time)
+	if not call_log.end_time and call_details.end_time:
+		call_log.end_time = get_datetime_from_timestamp(call_details.end_time)
+
+	# saved as a document so that the call log rollups see the new duration
+	call_log.save(ignore_permissions=True)
+
+
 @frappe.whitelist(allow_guest=True)
 def update_recording_info(**kwargs):
 	try:
 		args = frappe._dict(kwargs)
 		recording_url = args.RecordingUrl
 		call_sid = args.CallSid
-		update_call_log(call_sid)
-		frappe.db.set_value("CRM Call Log", call_sid, "recording_url", recording_url)
+		if frappe.db.exists("CRM Call Log", call_sid):
+			frappe.db.set_value("CRM Call Log", call_sid, "recording_url", recording_url)
 	except Exception:
 		frappe.log_error(title=_("Failed to capture Twilio recording"))
 
@@ -135,7 +179,7 @@ def update_call_status_info(**kwargs):
 	try:
 		args = frappe._dict(kwargs)
 		parent_call_sid = args.ParentCallSid
-		update_call_log(parent_call_sid, status=args.CallStatus)
+		update_call_log(parent_call_sid, args)
 
 		call_info = {
 			"ParentCallSid": args.ParentCallSid,
@@ -146,12 +190,46 @@ def update_call_status_info(**kwargs):
 			"To": args.To,
 		}
 
-		client = Twilio.get_twilio_client()
-		client.calls(args.ParentCallSid).user_defined_messages.create(content=json.dumps(call_info))
+		frappe.enqueue(
+			send_call_info_to_client,
+			queue="short",
+			enqueue_after_commit=True,
+			call_sid=parent_call_sid,
+			call_info=call_info,
+		)
 	except Exception:
 		frappe.log_error(title=_("Failed to update Twilio call status"))
 
 
+def send_call_info_to_client(call_sid, call_info):
+	"""Push call status to the agent's browser as a user defined message on the call."""
+	try:
+		client = Twilio.get_twilio_client()
+		client.calls(call_sid).user_defined_messages.create(content=json.dumps(call_info))
+	except Exception:
+		frappe.log_error(title=_("Failed to send Twilio call status to client"))
+
+
+def get_status_rank(status):
+	if status in FINAL_CALL_STATUSES:
+		return 3
+	return {"Queued": 0, "Initiated": 0, "Ringing": 1, "In Progress": 2}.get(status, 0)
+
+
+def parse_twilio_timestamp(timestamp):
+	"""Parse RFC 2822 `Timestamp` sent with Twilio callbacks, e.g. `Mon, 16 Aug 2010 03:45:01 +0000`."""
+	from datetime import timezone
+	from email.utils import parsedate_to_datetime
+
+	if not timestamp:
+		return None
+	try:
+		timestamp = parsedate_to_datetime(timestamp)
+	except (TypeError, ValueError):
+		return None
+	return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
 def get_datetime_from_timestamp(timestamp):
 	from datetime import datetime
 	from zoneinfo import ZoneInfo
@@ -0,0 +1,128 @@
+import json
+import random
+
+import frappe
+from frappe.utils import add_days, cint, flt, now_datetime
+
+WEBHOOK_LOG_BUFFER = "crm:webhook_log_buffer"
+WEBHOOK_LOG_SERVICES = ("Exotel",)
+FLUSH_BATCH_SIZE = 1000
+DELETE_CHUNK_SIZE = 10000
+
+
+def log_webhook(service, payload, status="Completed", error=None, description=None):
+	"""
+	Record a telephony webhook as an Integration Request, as configured in FCRM Settings.
+
+	Logs are not written in the webhook's own transaction, they are buffered in redis and
+	inserted in batches by `flush_webhook_logs`.
+	"""
+	settings = frappe.get_cached_doc("FCRM Settings")
+	if not should_log(settings, status):
+		return
+
+	headers = None
+	if settings.webhook_log_headers and getattr(frappe.local, "request", None):
+		headers = json.dumps(dict(frappe.request.headers), default=str)
+
+	log = {
+		"name": frappe.generate_hash(length=10),
+		"creation": str(now_datetime()),
+		"integration_request_service": service,
+		"request_description": description or f"{service} Call",
+		"is_remote_request": 1,
+		"status": status,
+		"data": json.dumps(payload, default=str),
+		"error": error,
+		"request_headers": headers,
+	}
+
+	try:
+		frappe.cache.rpush(WEBHOOK_LOG_BUFFER, json.dumps(log))
+	except Exception:
+		# redis is down, do not lose failures
+		insert_logs([log])
+
+
+def should_log(settings, status):
+	level = settings.webhook_log_level or "Full"
+	if level == "Full" or status == "Failed":
+		return True
+	if level == "Sampled":
+		return random.random() * 100 < flt(settings.webhook_log_sample_rate)
+	return False
+
+
+def flush_webhook_logs():
+	"""Move buffered webhook logs to Integration Request, in batches."""
+	while True:
+		logs = frappe.cache.lrange(WEBHOOK_LOG_BUFFER, 0, FLUSH_BATCH_SIZE - 1)
+		if not logs:
+			return
+
+		insert_logs([json.loads(frappe.safe_decode(log)) for log in logs])
+		frappe.db.commit()
+		frappe.cache.ltrim(WEBHOOK_LOG_BUFFER, len(logs), -1)
+
+		if len(logs) < FLUSH_BATCH_SIZE:
+			return
+
+
+def insert_logs(logs):
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"integration_request_service",
+		"request_description",
+		"is_remote_request",
+		"status",
+		"data",
+		"error",
+		"request_headers",
+	]
+	values = [
+		(
+			log["name"],
+			log["creation"],
+			log["creation"],
+			"Guest",
+			"Guest",
+			log["integration_request_service"],
+			log["request_description"],
+			log["is_remote_request"],
+			log["status"],
+			log["data"],
+			log["error"],
+			log["request_headers"],
+		)
+		for log in logs
+	]
+	frappe.db.bulk_insert("Integration Request", fields, values, ignore_duplicates=True)
+
+
+def delete_old_webhook_logs():
+	"""Delete telephony webhook logs past the retention period, a chunk at a time."""
+	retention_days = cint(frappe.db.get_single_value("FCRM Settings", "webhook_log_retention_days"))
+	if not retention_days:
+		return
+
+	cutoff = add_days(now_datetime(), -retention_days)
+	while True:
+		names = frappe.get_all(
+			"Integration Request",
+			filters={
+				"integration_request_service": ("in", WEBHOOK_LOG_SERVICES),
+				"creation": ("<", cutoff),
+			},
+			pluck="name",
+			limit=DELETE_CHUNK_SIZE,
+			order_by="creation asc",
+		)
+		if not names:
+			return
+
+		frappe.db.delete("Integration Request", {"name": ("in", names)})
+		frappe.db.commit()
@@ -0,0 +1,5 @@
+from crm.fcrm.doctype.crm_call_log_rollup.crm_call_log_rollup import rebuild_rollups
+
+
+def execute():
+	rebuild_rollups()
@@ -0,0 +1,5 @@
+from crm.fcrm.doctype.crm_dedupe_key.crm_dedupe_key import rebuild_keys
+
+
+def execute():
+	rebuild_keys()
@@ -0,0 +1,5 @@
+from crm.fcrm.doctype.crm_search_entry.crm_search_entry import rebuild_index
+
+
+def execute():
+	rebuild_index()
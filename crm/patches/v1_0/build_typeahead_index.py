@@ -0,0 +1,5 @@
+from crm.fcrm.doctype.crm_typeahead_entry.crm_typeahead_entry import rebuild_index
+
+
+def execute():
+	rebuild_index()
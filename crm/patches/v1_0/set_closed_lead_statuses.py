@@ -0,0 +1,8 @@
+import frappe
+
+
+def execute():
+	"""Mark the default statuses that meant a closed lead before statuses could say so"""
+	frappe.db.set_value(
+		"CRM Lead Status", {"name": ("in", ["Unqualified", "Junk"])}, "is_closed", 1, update_modified=False
+	)
@@ -0,0 +1,43 @@
+import frappe
+
+from crm.fcrm.doctype.crm_notification.crm_notification import DEDUPE_FIELDS, get_dedupe_key
+
+CHUNK_SIZE = 5000
+
+
+def execute():
+	"""
+	Set the dedupe key of notifications created before it existed. Only the oldest of a set of
+	identical notifications gets it, the key is unique and the others are the duplicates it
+	now prevents.
+	"""
+	seen = set(frappe.get_all("CRM Notification", filters={"dedupe_key": ("is", "set")}, pluck="dedupe_key"))
+	fields = ["name", "creation", *DEDUPE_FIELDS]
+
+	last = ("1900-01-01", "")
+	while True:
+		notifications = frappe.db.sql(
+			f"""
+			select {", ".join(f"`{field}`" for field in fields)}
+			from `tabCRM Notification`
+			where ifnull(dedupe_key, '') = ''
+				and (creation > %(creation)s or (creation = %(creation)s and name > %(name)s))
+			order by creation asc, name asc
+			limit %(limit)s
+			""",
+			{"creation": last[0], "name": last[1], "limit": CHUNK_SIZE},
+			as_dict=True,
+		)
+		if not notifications:
+			break
+
+		updates = {}
+		for notification in notifications:
+			key = get_dedupe_key(notification)
+			if key not in seen:
+				seen.add(key)
+				updates[notification.name] = {"dedupe_key": key}
+		if updates:
+			frappe.db.bulk_update("CRM Notification", updates, chunk_size=1000, update_modified=False)
+		frappe.db.commit()
+		last = (notifications[-1].creation, notifications[-1].name)
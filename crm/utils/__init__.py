@@ -1,3 +1,4 @@
+import frappe
 import phonenumbers
 from frappe.utils import floor
 from phonenumbers import NumberParseException
@@ -93,3 +94,7 @@ def seconds_to_duration(seconds):
 		return f"{seconds}s"
 	else:
 		return "0s"
+
+
+def is_manager():
+	return frappe.session.user == "Administrator" or "Sales Manager" in frappe.get_roles()
@@ -0,0 +1,27 @@
+"""Helpers shared by the benchmarks and the telephony simulator."""
+
+import math
+
+
+def count_queries(db):
+	"""Count the queries `db` runs in `db.query_count`, `del db.sql` stops counting"""
+	sql = db.sql
+
+	def counted_sql(*args, **kwargs):
+		db.query_count += 1
+		return sql(*args, **kwargs)
+
+	db.query_count = 0
+	db.sql = counted_sql
+
+
+def percentile(values, q):
+	"""Nearest-rank percentile."""
+	if not values:
+		return 0
+	values = sorted(values)
+	return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def to_ms(seconds):
+	return round(seconds * 1000, 2)
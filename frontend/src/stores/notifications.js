@@ -2,24 +2,55 @@ import { defineStore } from 'pinia'
 import { createResource } from 'frappe-ui'
 import { computed, ref } from 'vue'
 
+const PAGE_LENGTH = 20
+
 export const visible = ref(false)
+export const hasMoreNotifications = ref(false)
 
 export const notifications = createResource({
   url: 'crm.api.notifications.get_notifications',
+  params: { limit: PAGE_LENGTH },
   initialData: [],
   auto: true,
+  onSuccess: (data) => {
+    hasMoreNotifications.value = data.length === PAGE_LENGTH
+  },
+})
+
+const moreNotifications = createResource({
+  url: 'crm.api.notifications.get_notifications',
+  onSuccess: (data) => {
+    notifications.data = [...notifications.data, ...data]
+    hasMoreNotifications.value = data.length === PAGE_LENGTH
+  },
+})
+
+const unreadCount = createResource({
+  url: 'crm.api.notifications.get_unread_count',
+  initialData: 0,
+  auto: true,
 })
 
-export const unreadNotificationsCount = computed(
-  () => notifications.data?.filter((n) => !n.read).length || 0,
-)
+export const unreadNotificationsCount = computed(() => unreadCount.data || 0)
+
+export function reloadNotifications() {
+  notifications.reload()
+  unreadCount.reload()
+}
+
+export function loadMoreNotifications() {
+  moreNotifications.submit({
+    limit: PAGE_LENGTH,
+    cursor: notifications.data.at(-1)?.name,
+  })
+}
 
 export const notificationsStore = defineStore('crm-notifications', () => {
   const mark_as_read = createResource({
     url: 'crm.api.notifications.mark_as_read',
     onSuccess: () => {
       mark_as_read.params = {}
-      notifications.reload()
+      reloadNotifications()
     },
   })
 